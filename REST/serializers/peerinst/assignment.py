@@ -68,7 +68,7 @@ class QuestionSerializer(DynamicFieldsModelSerializer):
     collaborators = UserSerializer(many=True, read_only=True)
 
     def get_answer_count(self, obj):
-        return obj.answer_set.count()
+        return obj.get_statistics().answer_count
 
     def get_choices(self, obj):
         return obj.get_choices()
@@ -10,9 +10,9 @@ from peerinst.models import (
     AnswerAnnotation,
     Discipline,
     Question,
+    QuestionSearchTerm,
     Teacher,
 )
-from peerinst.util import question_search_function
 from REST.pagination import SearchPagination
 from REST.serializers import (
     AssignmentSerializer,
@@ -68,8 +68,20 @@ class QuestionListViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsNotStudent, InAssignmentOwnerList]
 
     def get_queryset(self):
-        return AssignmentQuestions.objects.filter(
-            assignment__owner=self.request.user
+        return (
+            AssignmentQuestions.objects.filter(
+                assignment__owner=self.request.user
+            )
+            .select_related(
+                "question__discipline",
+                "question__statistics",
+                "question__user",
+            )
+            .prefetch_related(
+                "question__answerchoice_set",
+                "question__category",
+                "question__collaborators",
+            )
         )
 
     def destroy(self, request, *args, **kwargs):
@@ -111,14 +123,14 @@ class QuestionSearchList(generics.ListAPIView):
             return queryset
 
         # Call search function
-        queryset = question_search_function(
-            search_string, pre_filtered_list=queryset, is_old_query=True
-        )
+        queryset = QuestionSearchTerm.search(search_string, queryset)
 
         if discipline:
             queryset = queryset.filter(discipline=discipline)
 
-        return queryset
+        return queryset.select_related(
+            "discipline", "statistics", "user"
+        ).prefetch_related("answerchoice_set", "category", "collaborators")
 
     def get_serializer(self, *args, **kwargs):
         kwargs["context"] = self.get_serializer_context()
@@ -76,7 +76,7 @@ def get_teacher_information(req):
     if teacher.reputation is None:
         teacher.reputation = Reputation.create(teacher)
 
-    _, reputations = teacher.reputation.evaluate()
+    _, reputations = teacher.reputation.get_cached()
 
     data = {
         "username": teacher.user.username,
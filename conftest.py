@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    """
+    Replaces the cache by an empty local memory cache for the tests relying
+    on values actually being cached.
+    """
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+        }
+    }
+    cache.clear()
@@ -1,13 +1,19 @@
 import os
-from functools import wraps
+from functools import partial, wraps
 
-import celery
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_ready
 from celery.utils.log import get_logger
 
 logger = get_logger("peerinst-scheduled")
 
+WORKERS_AVAILABLE_KEY = "celery:workers_available"
+TRY_ASYNC_POLICIES = ("auto", "queue", "sync")
+
+# names of the tasks decorated with `try_async`
+try_async_tasks = set()
+
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dalite.settings")
 
@@ -31,56 +37,200 @@ def debug_task(self):
 @app.task
 def heartbeat():
     logger.info("Heartbeat check")
+    set_workers_available()
+
+
+@worker_ready.connect
+def mark_workers_available(**kwargs):
+    set_workers_available()
+
+
+@worker_process_init.connect
+def warm_up_likelihood_models(**kwargs):
+    """
+    Loads the likelihood models when a worker process starts instead of on
+    the first evaluation. The n-gram tables are memory-mapped so their pages
+    are shared between the processes.
+    """
+    from quality.models import LikelihoodLanguage
+
+    try:
+        LikelihoodLanguage.warm_up()
+    except Exception as e:
+        logger.warning("The likelihood models couldn't be loaded: %s", e)
+
+
+def set_workers_available():
+    """
+    Records that a worker is running. Called by the workers when they start
+    and each time they execute the periodic heartbeat so that web processes
+    can know if workers are available without contacting them.
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+
+    cache.set(WORKERS_AVAILABLE_KEY, True, settings.WORKER_AVAILABLE_TIMEOUT)
+
+
+def workers_available():
+    """
+    Returns if a worker has recently signaled that it is running.
+
+    Returns
+    -------
+    bool
+        If workers are available
+    """
+    from django.core.cache import cache
+
+    return bool(cache.get(WORKERS_AVAILABLE_KEY, False))
 
 
-def try_async(func):
+def try_async(func=None, policy="auto"):
     """
     Decorator for celery tasks such that they default to synchronous operation
-    if no workers are available
+    if no workers are available. Can be used with or without arguments.
+
+    The worker availability is read from the state cached by the workers'
+    heartbeats so the decision never waits on the broker or the workers.
+    The heartbeat is a periodic task, so celery beat must be running for the
+    workers to be seen as available. Each decision is logged (as a warning
+    when falling back to synchronous operation) and counted (see
+    `get_try_async_stats`).
+
+    Parameters
+    ----------
+    func : Task
+        Celery task to decorate
+    policy : str (default : "auto")
+        How the task is executed, overridable by task name with the setting
+        ASYNC_TASK_POLICIES:
+            "auto": asynchronously if workers are available, else
+                synchronously
+            "queue": always sent to the broker (to be executed when a worker
+                is available), synchronously only if the broker is down
+            "sync": always synchronously
     """
+    if func is None:
+        return partial(try_async, policy=policy)
+
+    if policy not in TRY_ASYNC_POLICIES:
+        raise ValueError(
+            "The policy must be one of {}.".format(TRY_ASYNC_POLICIES)
+        )
+
+    name = getattr(func, "name", func.__name__)
+    try_async_tasks.add(name)
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        try:
-            logger.info("Checking for celery message broker...")
-            heartbeat.delay()
+        from django.conf import settings
+
+        policy_ = getattr(settings, "ASYNC_TASK_POLICIES", {}).get(
+            name, policy
+        )
 
-        except heartbeat.OperationalError as e:
-            info = "Celery unavailable ({}).  Executing {} synchronously.".format(  # noqa
-                e, func.__name__
+        if policy_ == "sync":
+            _record_try_async(name, "sync")
+            logger.info(
+                "Executing %s synchronously: synchronous policy.", name
             )
-            logger.info(info)
             return func(*args, **kwargs)
 
+        if policy_ == "auto" and not workers_available():
+            reason = (
+                "no workers available (is celery beat running to schedule "
+                "the heartbeat?)"
+            )
         else:
-            logger.info("Checking for available workers...")
-            available_workers = celery.current_app.control.inspect().active()
-
-            if available_workers:
-                info = "Celery workers available ({}).  Executing {} asynchronously.".format(  # noqa
-                    list(available_workers.keys()), func.__name__
-                )
-                logger.info(info)
-                return func.delay(*args, **kwargs)
+            try:
+                result = func.delay(*args, **kwargs)
+            except heartbeat.OperationalError as e:
+                reason = "celery unavailable ({})".format(e)
             else:
-                info = "No celery workers available.  Executing {} synchronously.".format(  # noqa
-                    func.__name__
-                )
-                logger.info(info)
-                return func(*args, **kwargs)
+                _record_try_async(name, "async")
+                logger.info("Executing %s asynchronously.", name)
+                return result
+
+        _record_try_async(name, "sync")
+        logger.warning("Executing %s synchronously: %s.", name, reason)
+        return func(*args, **kwargs)
 
     return wrapper
 
 
+def get_try_async_stats():
+    """
+    Returns how many times each task decorated with `try_async` was executed
+    asynchronously and synchronously since the counters were last evicted
+    from the cache.
+
+    Returns
+    -------
+    Dict[str, Dict[str, int]]
+        Counts by task name under the format
+            {
+                async: int
+                    Number of asynchronous executions
+                sync: int
+                    Number of synchronous executions
+            }
+    """
+    from django.core.cache import cache
+
+    counts = cache.get_many(
+        [
+            _try_async_key(name, mode)
+            for name in try_async_tasks
+            for mode in ("async", "sync")
+        ]
+    )
+    return {
+        name: {
+            mode: counts.get(_try_async_key(name, mode), 0)
+            for mode in ("async", "sync")
+        }
+        for name in sorted(try_async_tasks)
+    }
+
+
+def _try_async_key(name, mode):
+    return "celery:try_async:{}:{}".format(name, mode)
+
+
+def _record_try_async(name, mode):
+    from django.core.cache import cache
+
+    key = _try_async_key(name, mode)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
 @app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
+    from django.conf import settings
+
     app.conf.beat_schedule = {
         "clean_notifications": {
             "task": "peerinst.tasks.clean_notifications",
             "schedule": crontab(hour=0, minute=0),
         },
+        "clean_stage_states": {
+            "task": "peerinst.tasks.clean_stage_states",
+            "schedule": crontab(hour=0, minute=0),
+        },
         "update_reputation_history": {
             "task": "reputation.tasks.update_reputation_history",
             "schedule": crontab(hour=0, minute=0),
         },
+        "build_rationale_scoring_queues": {
+            "task": "peerinst.tasks.build_rationale_scoring_queues_async",
+            "schedule": crontab(minute=0),
+        },
+        "heartbeat": {
+            "task": "dalite.celery.heartbeat",
+            "schedule": settings.WORKER_HEARTBEAT_INTERVAL,
+        },
     }
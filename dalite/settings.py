@@ -110,6 +110,42 @@ CACHES = {
     }
 }
 
+# Seconds during which the student progress of a group assignment is cached
+STUDENT_PROGRESS_CACHE_TIMEOUT = 10
+
+# Seconds after which the state of a question a student stopped answering is
+# discarded
+STAGE_DATA_TIMEOUT = 24 * 60 * 60
+
+# Destinations of the tracking events of the question views, by name ("log"
+# for the student log, "lti_event" for the LtiEvent table) or dotted path to a
+# function taking a list of events
+EVENT_SINKS = ("log",)
+
+# Events are written in batches every EVENT_BUFFER_INTERVAL seconds (directly
+# if 0) or as soon as EVENT_BUFFER_SIZE events are waiting
+EVENT_BUFFER_INTERVAL = 2
+EVENT_BUFFER_SIZE = 100
+
+# Seconds during which the group and teacher memberships given by the LTI
+# parameters of a student are considered up to date
+LTI_MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+# Seconds during which an evaluated reputation is served from the cache
+REPUTATION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Seconds during which the live state and vote tallies of blink questions are
+# cached; they are invalidated on changes so this only bounds stale entries
+BLINK_CACHE_TIMEOUT = 60 * 60
+
+# Maximum number of seconds a long polling blink request waits for a change
+# and number of seconds between two checks of the cache
+BLINK_POLL_TIMEOUT = 5
+BLINK_POLL_INTERVAL = 0.5
+
+# Maximum number of rationales kept in the scoring queue of each discipline
+RATIONALE_SCORING_QUEUE_SIZE = 200
+
 # Custom authentication for object-level permissions
 AUTHENTICATION_BACKENDS = (
     "axes.backends.AxesBackend",
@@ -304,6 +340,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "peerinst.events": {
+            "handlers": ["file_student_log"],
+            "level": "INFO",
+            "propagate": True,
+        },
         "tos-views": {
             "handlers": ["tos_file_log", "tos_console_log"],
             "level": "INFO",
@@ -409,6 +450,17 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_ACKS_LATE = True
 CELERYD_PREFETCH_MULTIPLIER = 1
 
+# Workers signal they are running every WORKER_HEARTBEAT_INTERVAL seconds and
+# are considered unavailable WORKER_AVAILABLE_TIMEOUT seconds after the last
+# signal, in which case the `try_async` tasks are executed synchronously. The
+# signal is a periodic task, so celery beat must be running alongside them.
+WORKER_HEARTBEAT_INTERVAL = 30
+WORKER_AVAILABLE_TIMEOUT = 90
+
+# Execution policy ("auto", "queue" or "sync") of `try_async` tasks by name,
+# overriding the one given in the code
+ASYNC_TASK_POLICIES = {}
+
 # CSP
 CSP_DEFAULT_SRC = ["'self'", "*.mydalite.org"]
 CSP_SCRIPT_SRC = [
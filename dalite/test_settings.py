@@ -2,6 +2,11 @@ from .settings import *  # noqa
 
 AXES_ENABLED = False
 
+EVENT_BUFFER_INTERVAL = 0
+
+# tasks sent to the broker are executed directly
+CELERY_TASK_ALWAYS_EAGER = True
+
 SSL_CONTEXT = False
 SECURE_HSTS_SECONDS = 0
 CSRF_COOKIE_NAME = "csrftoken"
@@ -0,0 +1,79 @@
+import mock
+import pytest
+
+from dalite.celery import (
+    get_try_async_stats,
+    heartbeat,
+    set_workers_available,
+    try_async,
+)
+
+pytestmark = pytest.mark.usefixtures("locmem_cache")
+
+
+def new_task(name):
+    def task(a, b):
+        return a + b
+
+    task.__name__ = name
+    task.delay = mock.Mock(return_value="async")
+    return task
+
+
+def test_try_async__no_workers():
+    task = new_task("test_no_workers")
+
+    with mock.patch("dalite.celery.logger") as logger:
+        assert try_async(task)(1, 2) == 3
+        logger.warning.assert_called_once()
+    task.delay.assert_not_called()
+    assert get_try_async_stats()["test_no_workers"] == {"async": 0, "sync": 1}
+
+
+def test_try_async__workers_available():
+    task = new_task("test_workers_available")
+    set_workers_available()
+
+    assert try_async(task)(1, 2) == "async"
+    task.delay.assert_called_once_with(1, 2)
+    assert get_try_async_stats()["test_workers_available"] == {
+        "async": 1,
+        "sync": 0,
+    }
+
+
+def test_try_async__queue_policy():
+    task = new_task("test_queue_policy")
+
+    assert try_async(policy="queue")(task)(1, 2) == "async"
+
+
+def test_try_async__sync_policy():
+    task = new_task("test_sync_policy")
+    set_workers_available()
+
+    with mock.patch("dalite.celery.logger") as logger:
+        assert try_async(policy="sync")(task)(1, 2) == 3
+        logger.warning.assert_not_called()
+    task.delay.assert_not_called()
+
+
+def test_try_async__policy_setting(settings):
+    task = new_task("test_policy_setting")
+    settings.ASYNC_TASK_POLICIES = {"test_policy_setting": "sync"}
+    set_workers_available()
+
+    assert try_async(task)(1, 2) == 3
+
+
+def test_try_async__broker_unavailable():
+    task = new_task("test_broker_unavailable")
+    task.delay.side_effect = heartbeat.OperationalError("down")
+    set_workers_available()
+
+    assert try_async(task)(1, 2) == 3
+
+
+def test_try_async__wrong_policy():
+    with pytest.raises(ValueError):
+        try_async(new_task("test_wrong_policy"), policy="wrong")
@@ -1,4 +1,5 @@
 import collections
+import datetime
 import itertools
 import urllib.request
 import urllib.parse
@@ -10,12 +11,16 @@ from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.urls import reverse
 from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 from django.utils.translation import ugettext_lazy as _
 from django.utils.safestring import mark_safe
-from django.views.generic.base import TemplateView
+from django.views.generic.base import TemplateView, View
 from django.views.generic.edit import FormView
 
+from dalite.views.errors import response_400
+
 from . import models
 from .admin import AnswerAdmin
 from .forms import (
@@ -28,7 +33,12 @@ from .mixins import (
     NoStudentsMixin,
     TOSAcceptanceRequiredMixin,
 )
-from .util import make_percent_function, student_list_from_student_groups
+from .util import (
+    iter_ltievents,
+    iter_ltievents_csv,
+    make_percent_function,
+    student_list_from_student_groups,
+)
 
 
 class StaffMemberRequiredMixin(object):
@@ -53,7 +63,14 @@ def get_question_aggregates(assignment, question, student_groups=None):
     function returns a pair (sums, students), where 'sums' is a
     collections.Counter object mapping labels to integers, and 'students' is
     the set of all user tokens of the submitted answers.
+
+    Without student groups, the stored aggregates of the question are used.
     """
+    if not student_groups:
+        return models.AssignmentQuestionStatistics.get(
+            assignment, [question]
+        )[question.pk].get_aggregates()
+
     # Get indices of the correct answer choices (usually only one)
     answerchoice_correct = question.answerchoice_set.values_list(
         "correct", flat=True
@@ -61,18 +78,13 @@ def get_question_aggregates(assignment, question, student_groups=None):
     correct_choices = list(
         itertools.compress(itertools.count(1), answerchoice_correct)
     )
-    if not student_groups:
-        # Select answers entered by students, not example answers
-        answers = question.answer_set.filter(assignment=assignment).exclude(
-            user_token=""
-        )
-    else:
-        student_ids = student_list_from_student_groups(student_groups)
-        answers = (
-            question.answer_set.filter(assignment=assignment)
-            .exclude(user_token="")
-            .filter(user_token__in=student_ids)
-        )
+    student_ids = student_list_from_student_groups(student_groups)
+    # Select answers entered by students, not example answers
+    answers = (
+        question.answer_set.filter(assignment=assignment)
+        .exclude(user_token="")
+        .filter(user_token__in=student_ids)
+    )
 
     switched_answers = answers.exclude(
         second_answer_choice=F("first_answer_choice")
@@ -111,10 +123,20 @@ def get_assignment_aggregates(assignment, student_groups=None):
     sums = collections.Counter()
     students = set()
     question_data = []
-    for question in assignment.questions.order_by("assignmentquestions__rank"):
-        q_sums, q_students = get_question_aggregates(
-            assignment, question, student_groups
+    questions = assignment.questions.order_by(
+        "assignmentquestions__rank"
+    ).prefetch_related("answerchoice_set")
+    if not student_groups:
+        statistics = models.AssignmentQuestionStatistics.get(
+            assignment, questions
         )
+    for question in questions:
+        if student_groups:
+            q_sums, q_students = get_question_aggregates(
+                assignment, question, student_groups
+            )
+        else:
+            q_sums, q_students = statistics[question.pk].get_aggregates()
         sums += q_sums
         students |= q_students
         q_sums.update(total_students=len(q_students))
@@ -947,3 +969,38 @@ class StudentGroupAssignmentManagement(StaffMemberRequiredMixin, TemplateView):
         context.update(student_assignment_list=student_assignment_list)
 
         return context
+
+
+class LtiEventExport(StaffMemberRequiredMixin, View):
+    """
+    Streams the LtiEvents between the `start` and optional `stop` dates
+    (YYYY-MM-DD, inclusive) as csv, optionally only for `username`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start = parse_date(request.GET["start"])
+            stop = parse_date(request.GET.get("stop", ""))
+        except (KeyError, ValueError):
+            start = None
+        if start is None:
+            return response_400(
+                request,
+                msg=_("A valid start date is required."),
+                use_template=False,
+            )
+        stop = stop or datetime.date.today()
+        username = request.GET.get("username") or None
+
+        events = iter_ltievents(
+            start_date=datetime.datetime.combine(start, datetime.time.min),
+            stop_date=datetime.datetime.combine(stop, datetime.time.max),
+            username=username,
+        )
+        response = StreamingHttpResponse(
+            iter_ltievents_csv(events), content_type="text/csv"
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="lti_events_{}_{}.csv"'.format(start, stop)
+        )
+        return response
@@ -0,0 +1,174 @@
+"""
+Buffered emission of the tracking events of the question views.
+
+Events are queued in memory and written in batches by a background thread
+every `EVENT_BUFFER_INTERVAL` seconds, or as soon as `EVENT_BUFFER_SIZE`
+events are waiting, so that answering a question never waits on the
+destinations. The destinations are given by the `EVENT_SINKS` setting, either
+by name for the ones defined here or by dotted path to a function taking a
+list of events.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("peerinst-views")
+events_logger = logging.getLogger("peerinst.events")
+
+
+def write_to_log(events):
+    """
+    Writes the events as JSON lines to the event log.
+
+    Parameters
+    ----------
+    events : List[Dict[str, Any]]
+        Events to write
+    """
+    for event in events:
+        events_logger.info(json.dumps(event))
+
+
+def write_to_lti_events(events):
+    """
+    Saves the events as `LtiEvent` in a single query.
+
+    Parameters
+    ----------
+    events : List[Dict[str, Any]]
+        Events to write
+    """
+    # Prevent circular import
+    from peerinst.models import LtiEvent
+
+    LtiEvent.objects.bulk_create(
+        [
+            LtiEvent(
+                event_type=event["event_type"],
+                event_log=event,
+                username=event["username"],
+                assignment_id=event["event"].get("assignment_id"),
+                question_id=event["event"].get("question_id"),
+            )
+            for event in events
+        ]
+    )
+
+
+sinks = {"log": write_to_log, "lti_event": write_to_lti_events}
+
+
+def write_events(events):
+    """
+    Writes the events to each destination of `EVENT_SINKS`. An error in one
+    destination doesn't prevent the others from being written.
+
+    Parameters
+    ----------
+    events : List[Dict[str, Any]]
+        Events to write
+    """
+    for name in settings.EVENT_SINKS:
+        try:
+            sink = sinks[name] if name in sinks else import_string(name)
+            sink(events)
+        except Exception:
+            logger.exception(
+                "%d events couldn't be written to %s.", len(events), name
+            )
+
+
+class EventBuffer(object):
+    """
+    Queue of events written in batches by a background thread, started with
+    the first event of each process.
+    """
+
+    def __init__(self):
+        self._events = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def emit(self, event):
+        """
+        Adds the event to the queue, or writes it directly if the
+        `EVENT_BUFFER_INTERVAL` setting is 0.
+
+        Parameters
+        ----------
+        event : Dict[str, Any]
+            Event to write
+        """
+        if not settings.EVENT_BUFFER_INTERVAL:
+            write_events([event])
+            return
+
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= settings.EVENT_BUFFER_SIZE
+        self._start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Writes all the queued events.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+        if events:
+            write_events(events)
+
+    def reset(self):
+        """
+        Forgets the queue and thread inherited from the parent in a forked
+        process, the parent being the one writing those events.
+        """
+        self._events = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="event-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.EVENT_BUFFER_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+buffer = EventBuffer()
+atexit.register(buffer.flush)
+os.register_at_fork(after_in_child=buffer.reset)
+
+
+def emit(event):
+    """
+    Emits a tracking event.
+
+    Parameters
+    ----------
+    event : Dict[str, Any]
+        Event in a JSON format similar to the edx-platform tracking logs
+    """
+    buffer.emit(event)
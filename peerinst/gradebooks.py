@@ -2,11 +2,14 @@
 
 
 import csv
+from collections import defaultdict
 
 from django.db.models.functions import Lower
 
 from .models import (
     Answer,
+    AssignmentQuestions,
+    StudentAssignment,
     StudentGroup,
     StudentGroupAssignment,
     StudentGroupMembership,
@@ -91,18 +94,36 @@ def compute_gradebook(group_pk, assignment_pk=None):
     group = StudentGroup.objects.get(pk=group_pk)
 
     if assignment_pk is not None:
-        assignment = StudentGroupAssignment.objects.get(pk=assignment_pk)
+        assignment = StudentGroupAssignment.objects.select_related(
+            "assignment"
+        ).get(pk=assignment_pk)
     else:
         assignment = None
 
-    memberships = StudentGroupMembership.objects.filter(group=group).order_by(
-        Lower("student__student__email")
+    memberships = list(
+        StudentGroupMembership.objects.filter(group=group)
+        .select_related("student__student")
+        .order_by(Lower("student__student__email"))
     )
+    usernames = [
+        membership.student.student.username for membership in memberships
+    ]
 
     if assignment is None:
-        assignments = group.studentgroupassignment_set.filter(
-            distribution_date__isnull=False
-        ).order_by("distribution_date")
+        assignments = list(
+            group.studentgroupassignment_set.filter(
+                distribution_date__isnull=False
+            )
+            .select_related("assignment")
+            .order_by("distribution_date")
+        )
+        questions = _get_questions(assignments)
+        answers = _get_answers(assignments, usernames, questions)
+        student_assignments = set(
+            StudentAssignment.objects.filter(
+                group_assignment__in=assignments
+            ).values_list("student", "group_assignment")
+        )
         results = {
             "group": group.title,
             "assignments": [
@@ -117,16 +138,20 @@ def compute_gradebook(group_pk, assignment_pk=None):
                     else None,
                     "email": membership.student.student.email,
                     "assignments": [
-                        {
-                            key: val
-                            for key, val in _assignment.studentassignment_set.get(  # noqa
-                                student=membership.student
-                            ).results.items()
-                            if key in ("n_completed", "grade")
-                        }
-                        if _assignment.studentassignment_set.filter(
-                            student=membership.student
-                        ).exists()
+                        _compute_results(
+                            [
+                                answers.get(
+                                    (
+                                        _assignment.assignment.pk,
+                                        membership.student.student.username,
+                                        question.pk,
+                                    )
+                                )
+                                for question in questions[_assignment.pk]
+                            ]
+                        )
+                        if (membership.student.pk, _assignment.pk)
+                        in student_assignments
                         else None
                         for _assignment in assignments
                     ],
@@ -136,8 +161,9 @@ def compute_gradebook(group_pk, assignment_pk=None):
         }
 
     else:
-        answers = Answer.objects.filter(assignment=assignment.assignment)
-        questions = assignment.questions
+        questions = _get_questions([assignment])
+        answers = _get_answers([assignment], usernames, questions)
+        questions = questions[assignment.pk]
         results = {
             "group": group.title,
             "assignment": assignment.assignment.title,
@@ -150,14 +176,19 @@ def compute_gradebook(group_pk, assignment_pk=None):
                     else None,
                     "email": membership.student.student.email,
                     "questions": [
-                        answers.get(
-                            question=question,
-                            user_token=membership.student.student.username,
-                        ).grade
-                        if answers.filter(
-                            question=question,
-                            user_token=membership.student.student.username,
-                        ).exists()
+                        answers[
+                            (
+                                assignment.assignment.pk,
+                                membership.student.student.username,
+                                question.pk,
+                            )
+                        ].grade
+                        if (
+                            assignment.assignment.pk,
+                            membership.student.student.username,
+                            question.pk,
+                        )
+                        in answers
                         else None
                         for question in questions
                     ],
@@ -169,6 +200,117 @@ def compute_gradebook(group_pk, assignment_pk=None):
     return results
 
 
+def _get_questions(assignments):
+    """
+    Returns the questions of each group assignment in their order with their
+    answer choices prefetched, in two queries.
+
+    Parameters
+    ----------
+    assignments : List[StudentGroupAssignment]
+        Group assignments
+
+    Returns
+    -------
+    Dict[int, List[Question]]
+        Questions for each group assignment pk
+    """
+    assignment_questions = defaultdict(list)
+    for assignment_question in (
+        AssignmentQuestions.objects.filter(
+            assignment__in={a.assignment_id for a in assignments}
+        )
+        .select_related("question")
+        .prefetch_related("question__answerchoice_set")
+        .order_by("rank", "pk")
+    ):
+        assignment_questions[assignment_question.assignment_id].append(
+            assignment_question.question
+        )
+
+    questions = {}
+    for assignment in assignments:
+        questions_ = assignment_questions[assignment.assignment_id]
+        order = assignment.order or ",".join(
+            map(str, range(len(questions_)))
+        )
+        questions[assignment.pk] = (
+            [questions_[i] for i in map(int, order.split(","))]
+            if questions_
+            else []
+        )
+    return questions
+
+
+def _get_answers(assignments, usernames, questions):
+    """
+    Returns the first answer of each student to each question of the
+    assignments in a single query. The questions of the answers are replaced
+    by the given ones so that grading doesn't need any other query.
+
+    Parameters
+    ----------
+    assignments : List[StudentGroupAssignment]
+        Group assignments
+    usernames : List[str]
+        Usernames of the students
+    questions : Dict[int, List[Question]]
+        Questions for each group assignment pk, as returned by
+        `_get_questions`
+
+    Returns
+    -------
+    Dict[Tuple[str, str, int], Answer]
+        Answer for each assignment identifier, username and question pk
+    """
+    questions_ = {
+        question.pk: question
+        for questions__ in questions.values()
+        for question in questions__
+    }
+    answers = {}
+    for answer in Answer.objects.filter(
+        Answer.student_filter(usernames),
+        assignment__in={a.assignment_id for a in assignments},
+    ).order_by("pk"):
+        if answer.question_id in questions_:
+            answer.question = questions_[answer.question_id]
+        key = (answer.assignment_id, answer.user_token, answer.question_id)
+        if key not in answers:
+            answers[key] = answer
+    return answers
+
+
+def _compute_results(answers):
+    """
+    Computes the same results as `StudentAssignment.results` from the answers
+    to each question.
+
+    Parameters
+    ----------
+    answers : List[Optional[Answer]]
+        Answer to each question of the assignment or None if not answered
+
+    Returns
+    -------
+    Dict[str, Any]
+        {
+            n_completed: int
+                Number of completed questions
+            grade: float
+                Grade for the assignment
+        }
+    """
+    return {
+        "n_completed": sum(
+            answer is not None and answer.completed for answer in answers
+        ),
+        "grade": sum(
+            0 if answer is None else answer.grade for answer in answers
+        ),
+    }
+
+
 def convert_gradebook_to_csv(results):
     """
     Converts the gradebook results to a csv generator.
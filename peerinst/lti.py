@@ -2,8 +2,10 @@ import base64
 import hashlib
 import logging
 
+from django.conf import settings
 from django.contrib.auth import get_permission_codename, login
 from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
 from django.urls import reverse
 from django_lti_tool_provider import AbstractApplicationHookManager
 
@@ -49,6 +51,59 @@ def get_permissions_for_staff_user():
             )
 
 
+def sync_lti_membership(user, course_id, course_title=None, teacher_hash=None):
+    """
+    Adds the user to the group of the LTI course, creating it if needed, and
+    the teacher given by the LTI parameters to that group. The result is
+    remembered for `LTI_MEMBERSHIP_CACHE_TIMEOUT` seconds so that the
+    memberships are only checked again after that and only written if they
+    changed.
+
+    Parameters
+    ----------
+    user : User
+        User doing the request
+    course_id : str
+        LTI course id, used as the group name
+    course_title : Optional[str] (default : None)
+        LTI course title, used as the title of a new group
+    teacher_hash : Optional[str] (default : None)
+        Hash of the teacher of the course
+    """
+    # Prevent circular import
+    from peerinst.models import Student, StudentGroup, Teacher
+
+    key = "peerinst:lti_membership:{}".format(
+        hashlib.md5(
+            "{}:{}:{}:{}".format(
+                user.pk, course_id, course_title, teacher_hash
+            ).encode()
+        ).hexdigest()
+    )
+    if cache.get(key):
+        return
+
+    group, _ = StudentGroup.objects.get_or_create(
+        name=course_id, defaults={"title": course_title or None}
+    )
+
+    if teacher_hash is not None:
+        teacher = Teacher.get(teacher_hash)
+        if (
+            teacher is not None
+            and not group.teacher.filter(pk=teacher.pk).exists()
+        ):
+            group.teacher.add(teacher)
+            teacher.current_groups.add(group)
+
+    student = Student.objects.filter(student=user).first()
+    if student is not None:
+        # only inserts the membership if it doesn't exist
+        student.groups.add(group)
+
+    cache.set(key, True, settings.LTI_MEMBERSHIP_CACHE_TIMEOUT)
+
+
 class ApplicationHookManager(AbstractApplicationHookManager):
     LTI_KEYS = ["custom_assignment_id", "custom_question_id"]
     ADMIN_ACCESS_ROLES = {LTIRoles.INSTRUCTOR, LTIRoles.STAFF}
@@ -5,7 +5,7 @@ import time
 import pytz
 from django.core.management.base import BaseCommand
 
-from peerinst.task import populate_answer_start_time_from_ltievent_logs_task
+from peerinst.tasks import populate_answer_start_time_from_ltievent_logs_task
 from peerinst.util import make_daterange
 
 LOGGER = logging.getLogger("peerinst-models")
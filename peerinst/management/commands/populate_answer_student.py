@@ -0,0 +1,88 @@
+import logging
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from peerinst.models import Answer, Student
+
+logger = logging.getLogger("peerinst")
+
+
+class Command(BaseCommand):
+    help = (
+        "Link answers to their student using their user token. Answers are "
+        "read in chunks of primary keys so it can run while the site is in "
+        "use, and can be stopped and restarted at any time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of answers read at once",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help="Primary key from which to start",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches to limit the load",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last = Answer.objects.aggregate(last=Max("pk"))["last"]
+        if last is None:
+            print("There are no answers to link.")
+            return
+
+        start = options["start"]
+        linked = 0
+
+        while start <= last:
+            stop = start + batch_size
+            answers = list(
+                Answer.objects.filter(
+                    pk__gte=start, pk__lt=stop, student__isnull=True
+                )
+                .exclude(user_token="")
+                .values_list("pk", "user_token")
+            )
+            students = dict(
+                Student.objects.filter(
+                    student__username__in={
+                        username for _, username in answers
+                    }
+                ).values_list("student__username", "pk")
+            )
+            updated = [
+                Answer(pk=pk, student_id=students[username])
+                for pk, username in answers
+                if username in students
+            ]
+            Answer.objects.bulk_update(updated, ["student"])
+            linked += len(updated)
+
+            print(
+                "{} - ({:>6.2f}%) - Linked {} answers up to {}".format(
+                    datetime.now(),
+                    min(stop, last) / last * 100,
+                    linked,
+                    stop,
+                )
+            )
+
+            start = stop
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        logger.info("Linked %d answers to their student.", linked)
@@ -0,0 +1,46 @@
+import logging
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from peerinst.models import AssignmentQuestions, AssignmentQuestionStatistics
+from peerinst.utils import batch
+
+logger = logging.getLogger("peerinst")
+
+
+class Command(BaseCommand):
+    help = "Recompute the answer aggregates of all questions of assignments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of questions computed at once per assignment",
+        )
+
+    def handle(self, *args, **options):
+        assignment_questions = AssignmentQuestions.objects.order_by(
+            "assignment", "question"
+        ).values_list("assignment", "question")
+
+        n = assignment_questions.count()
+        done = 0
+
+        for assignment_questions_ in batch(
+            assignment_questions.iterator(), options["batch_size"]
+        ):
+            questions = {}
+            for assignment, question in assignment_questions_:
+                questions.setdefault(assignment, []).append(question)
+            for assignment, questions_ in questions.items():
+                AssignmentQuestionStatistics.build(assignment, questions_)
+                done += len(questions_)
+            print(
+                "{} - ({:>6.2f}%) - Computed {} of {} assignment "
+                "questions".format(datetime.now(), done / n * 100, done, n)
+            )
+
+        logger.info("Computed aggregates of %d assignment questions.", done)
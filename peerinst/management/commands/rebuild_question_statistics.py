@@ -0,0 +1,42 @@
+import logging
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from peerinst.models import Question, QuestionStatistics
+from peerinst.utils import batch
+
+logger = logging.getLogger("peerinst")
+
+
+class Command(BaseCommand):
+    help = "Recompute the answer statistics of all questions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of questions computed at once",
+        )
+
+    def handle(self, *args, **options):
+        questions = Question.objects.order_by("pk").values_list(
+            "pk", flat=True
+        )
+
+        n = questions.count()
+        done = 0
+
+        for questions_ in batch(questions.iterator(), options["batch_size"]):
+            questions_ = list(questions_)
+            QuestionStatistics.build(questions_)
+            done += len(questions_)
+            print(
+                "{} - ({:>6.2f}%) - Computed {} of {} questions".format(
+                    datetime.now(), done / n * 100, done, n
+                )
+            )
+
+        logger.info("Computed statistics of %d questions.", done)
@@ -0,0 +1,51 @@
+import logging
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from peerinst.models import StudentAssignment, StudentAssignmentResults
+from peerinst.utils import batch
+
+logger = logging.getLogger("peerinst")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored results of all student assignments (or those "
+        "of a group)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-g", "--group", type=str, help="Only rebuild for group (name)"
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of student assignments rebuilt at once",
+        )
+
+    def handle(self, *args, **options):
+        student_assignments = StudentAssignment.objects.order_by("pk")
+        if options.get("group"):
+            student_assignments = student_assignments.filter(
+                group_assignment__group__name=options["group"]
+            )
+
+        n = student_assignments.count()
+        done = 0
+
+        for student_assignments_ in batch(
+            student_assignments.iterator(), options["batch_size"]
+        ):
+            student_assignments_ = list(student_assignments_)
+            StudentAssignmentResults.build(student_assignments_)
+            done += len(student_assignments_)
+            print(
+                "{} - ({:>6.2f}%) - Rebuilt results for {} of {} student "
+                "assignments".format(datetime.now(), done / n * 100, done, n)
+            )
+
+        logger.info("Rebuilt results for %d student assignments.", done)
@@ -1,30 +1,38 @@
 from django.contrib.contenttypes.models import ContentType
+from pinax.forums.models import ThreadSubscription
 
 from .models import TeacherNotification
 
 
 class NotificationMiddleware(object):
+    """
+    Keeps the forum notifications of the teacher in the session, only
+    reading them again when their version changed or isn't known.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         if request.user.is_authenticated:
-            try:
-                notification_type = ContentType.objects.get(
-                    app_label="pinax_forums", model="ThreadSubscription"
+            version = TeacherNotification.get_version(request.user)
+            # without a version (cache unavailable), they are always read
+            if (
+                version is None
+                or request.session.get("forum_notifications_version")
+                != version
+            ):
+                notification_type = ContentType.objects.get_for_model(
+                    ThreadSubscription
                 )
                 request.session["forum_notifications"] = [
                     int(i)
-                    for i in list(
-                        TeacherNotification.objects.filter(
-                            teacher=request.user.teacher
-                        )
-                        .filter(notification_type=notification_type)
-                        .values_list("object_id", flat=True)
-                    )
+                    for i in TeacherNotification.objects.filter(
+                        teacher__user=request.user,
+                        notification_type=notification_type,
+                    ).values_list("object_id", flat=True)
                 ]
-            except Exception:
-                pass
+                request.session["forum_notifications_version"] = version
 
         response = self.get_response(request)
 
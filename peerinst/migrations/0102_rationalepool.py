@@ -0,0 +1,23 @@
+# Generated by Django 2.2.14 on 2020-08-10 15:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0101_auto_20200731_1407'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RationalePool',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pool', models.TextField(default='{}')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rationale_pool', to='peerinst.Question')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.14 on 2020-08-12 10:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0102_rationalepool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAssignmentResults',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('questions', models.TextField(default='[]')),
+                ('results', models.TextField(default='{}')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('student_assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stored_results', to='peerinst.StudentAssignment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.14 on 2020-08-14 09:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0103_studentassignmentresults'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=64)),
+                ('weight', models.FloatField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='peerinst.Question')),
+            ],
+            options={
+                'unique_together': {('question', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.14 on 2020-08-17 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0104_questionsearchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer_count', models.PositiveIntegerField(default=0)),
+                ('counts', models.TextField(default='{}')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='peerinst.Question')),
+            ],
+        ),
+    ]
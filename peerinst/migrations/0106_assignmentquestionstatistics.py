@@ -0,0 +1,28 @@
+# Generated by Django 2.2.14 on 2020-08-24 09:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0105_questionstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentQuestionStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counts', models.TextField(default='{}')),
+                ('students', models.TextField(default='{}')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='peerinst.Assignment')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='peerinst.Question')),
+            ],
+            options={
+                'unique_together': {('assignment', 'question')},
+            },
+        ),
+    ]
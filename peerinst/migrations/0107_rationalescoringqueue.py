@@ -0,0 +1,23 @@
+# Generated by Django 2.2.14 on 2020-08-31 14:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0106_assignmentquestionstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RationaleScoringQueue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidates', models.TextField(default='[]')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('discipline', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rationale_scoring_queue', to='peerinst.Discipline')),
+            ],
+        ),
+    ]
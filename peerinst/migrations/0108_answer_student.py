@@ -0,0 +1,31 @@
+# Generated by Django 2.2.14 on 2020-09-02 10:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0107_rationalescoringqueue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='student',
+            field=models.ForeignKey(blank=True, help_text='Student who gave the answer, if any.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='peerinst.Student'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['student', 'assignment', 'question'], name='answer_student_assignment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'first_answer_choice'], name='answer_question_choice_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['assignment', 'question'], name='answer_assignment_question_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.14 on 2020-09-14 09:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_rationale_pools(apps, schema_editor):
+    # pools are rebuilt on their next use
+    RationalePool = apps.get_model("peerinst", "RationalePool")
+    RationalePool.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0108_answer_student'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_rationale_pools, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='rationalepool',
+            name='pool',
+        ),
+        migrations.AddField(
+            model_name='rationalepool',
+            name='stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='RationalePoolEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_answer_choice', models.PositiveSmallIntegerField()),
+                ('expert', models.BooleanField(default=False)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rationale_pool_entry', to='peerinst.Answer')),
+                ('pool', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='peerinst.RationalePool')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.14 on 2020-09-21 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peerinst', '0109_rationalepoolentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StageState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(max_length=40)),
+                ('custom_key', models.CharField(max_length=200)),
+                ('data', models.TextField()),
+                ('expires', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'unique_together': {('session_key', 'custom_key')},
+            },
+        ),
+    ]
@@ -1,24 +1,39 @@
+import copy
+import heapq
+import json
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    Q,
+    QuerySet,
+    Value,
+    When,
+)
 from django.utils import timezone
+from django.utils.html import escape, strip_tags
 from django.utils.translation import ugettext_lazy as _
 
 from quality.models import Quality
+from tos.models import Consent
+
+from ..utils import batch
 
 from .assignment import Assignment
-from .question import GradingScheme, Question
+from .question import Discipline, GradingScheme, Question
 
 
 class AnswerMayShowManager(models.Manager):
     def get_queryset(self):
-        never_show = [
-            a
-            for a in set(
-                AnswerAnnotation.objects.filter(score=0).values_list(
-                    "answer", flat=True
-                )
-            )
-        ]
+        never_show = AnswerAnnotation.objects.filter(score=0).values("answer")
         return (
             super(AnswerMayShowManager, self)
             .get_queryset()
@@ -71,6 +86,13 @@ class Answer(models.Model):
         blank=True,
         help_text=_("Corresponds to the user's username."),
     )
+    student = models.ForeignKey(
+        "Student",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        help_text=_("Student who gave the answer, if any."),
+    )
     show_to_others = models.BooleanField(_("Show to others?"), default=True)
     expert = models.BooleanField(
         _("Expert rationale?"),
@@ -100,6 +122,107 @@ class Answer(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["student", "assignment", "question"],
+                name="answer_student_assignment_idx",
+            ),
+            models.Index(
+                fields=["question", "first_answer_choice"],
+                name="answer_question_choice_idx",
+            ),
+            models.Index(
+                fields=["assignment", "question"],
+                name="answer_assignment_question_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        answer = super(Answer, cls).from_db(db, field_names, values)
+        answer._loaded_values = dict(zip(field_names, values))
+        return answer
+
+    def save(self, *args, **kwargs):
+        super(Answer, self).save(*args, **kwargs)
+        # the post_save receivers compare with the values before this save
+        update_fields = kwargs.get("update_fields")
+        saved = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (
+                update_fields is None
+                or field.name in update_fields
+                or field.attname in update_fields
+            )
+        }
+        if update_fields is None:
+            self._loaded_values = saved
+        else:
+            self._loaded_values = dict(
+                getattr(self, "_loaded_values", None) or {}, **saved
+            )
+
+    def get_previous(self, fields):
+        """
+        Returns a copy of the answer with the values the fields had when it
+        was loaded from the db or last saved. Used by the `post_save`
+        receivers to update what depends on these fields incrementally.
+
+        Parameters
+        ----------
+        fields : Iterable[str]
+            Names of the fields
+
+        Returns
+        -------
+        Optional[Answer]
+            Copy of the answer with the previous values, or None if they
+            aren't known
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return None
+        previous = copy.copy(self)
+        for name in fields:
+            attname = self._meta.get_field(name).attname
+            if attname not in loaded:
+                return None
+            setattr(previous, attname, loaded[attname])
+        return previous
+
+    def has_changed(self, fields, update_fields=None):
+        """
+        Returns if any of the fields may have changed in the last save, i.e.
+        if they were saved and their value differs from the previous one (or
+        the previous one isn't known).
+
+        Parameters
+        ----------
+        fields : Iterable[str]
+            Names of the fields
+        update_fields : Optional[FrozenSet[str]] (default : None)
+            Fields given to `save`, as passed to the `post_save` receivers
+
+        Returns
+        -------
+        bool
+            If any of the fields may have changed
+        """
+        attnames = [self._meta.get_field(name).attname for name in fields]
+        if update_fields is not None and not any(
+            name in update_fields or attname in update_fields
+            for name, attname in zip(fields, attnames)
+        ):
+            return False
+        previous = self.get_previous(fields)
+        return previous is None or any(
+            getattr(previous, attname) != getattr(self, attname)
+            for attname in attnames
+        )
+
     def first_answer_choice_label(self):
         return self.question.get_choice_label(self.first_answer_choice)
 
@@ -125,6 +248,48 @@ class Answer(models.Model):
 
     show_chosen_rationale.short_description = "Display chosen rationale"
 
+    @staticmethod
+    def student_filter(usernames, prefix=""):
+        """
+        Returns the filter matching the answers of the given students. The
+        usernames are resolved to students first to filter on the indexed
+        student foreign key. Answers not linked to a student yet (legacy
+        rows, teachers) are matched on their user token in a separate query
+        and added by primary key, only if there are any.
+
+        Parameters
+        ----------
+        usernames : Union[Iterable[str], QuerySet]
+            Usernames of the students, or a queryset of them used as a
+            subquery
+        prefix : str (default : "")
+            Lookup prefix when filtering a related model on its answer, e.g.
+            "answer__"
+
+        Returns
+        -------
+        Q
+            Filter to apply
+        """
+        from .student import Student
+
+        if not isinstance(usernames, QuerySet):
+            usernames = list(usernames)
+        students = list(
+            Student.objects.filter(
+                student__username__in=usernames
+            ).values_list("pk", flat=True)
+        )
+        unlinked = list(
+            Answer.objects.filter(
+                student__isnull=True, user_token__in=usernames
+            ).values_list("pk", flat=True)
+        )
+        filter_ = Q(**{"{}student__in".format(prefix): students})
+        if unlinked:
+            filter_ |= Q(**{"{}pk__in".format(prefix): unlinked})
+        return filter_
+
     @property
     def correct(self):
         """
@@ -274,6 +439,7 @@ class RationaleOnlyQuestion(Question):
             first_answer_choice=0,
             rationale=rationale,
             user_token=view.user_token,
+            student=view.get_student(),
             datetime_start=datetime_start,
             datetime_first=timezone.now(),
         )
@@ -328,3 +494,1215 @@ class AnswerAnnotation(models.Model):
 
     def __str__(self):
         return "{}: {} by {}".format(self.answer, self.score, self.annotator)
+
+
+class RationalePool(models.Model):
+    """
+    Rationales of a question which may be shown to students during the review
+    step, maintained incrementally so the selection algorithms don't need to
+    query the answers, annotations, consents and qualities on each review.
+
+    Each rationale of the pool is a `RationalePoolEntry` so that adding,
+    removing or voting for a rationale only touches its own row. Pools are
+    marked stale when the global validation quality changes and rebuilt on
+    their next use.
+    """
+
+    # fields of an answer on which its eligibility depends
+    ELIGIBILITY_FIELDS = (
+        "rationale",
+        "first_answer_choice",
+        "second_answer_choice",
+        "user_token",
+        "expert",
+        "show_to_others",
+    )
+
+    question = models.OneToOneField(
+        Question, related_name="rationale_pool", on_delete=models.CASCADE
+    )
+    stale = models.BooleanField(default=False)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "Rationale pool for question {}".format(self.question_id)
+
+    @property
+    def rationales(self):
+        """
+        Returns the primary keys of the rationales by first answer choice,
+        under the keys "expert" and "other".
+        """
+        if not hasattr(self, "_rationales_cache"):
+            rationales = defaultdict(lambda: {"expert": [], "other": []})
+            for pk, choice, expert, _votes in self._entries:
+                rationales[choice]["expert" if expert else "other"].append(pk)
+            self._rationales_cache = dict(rationales)
+        return self._rationales_cache
+
+    @property
+    def votes(self):
+        """
+        Returns the number of times each rationale was chosen, for the
+        rationales chosen at least once.
+        """
+        return {pk: votes for pk, _, _, votes in self._entries if votes}
+
+    @property
+    def _entries(self):
+        if not hasattr(self, "_entries_cache"):
+            self._entries_cache = list(
+                self.entries.order_by("answer").values_list(
+                    "answer", "first_answer_choice", "expert", "votes"
+                )
+            )
+        return self._entries_cache
+
+    def get_rationales(self, choice, expert=None):
+        """
+        Returns the primary keys of the rationales in the pool for the given
+        choice.
+
+        Parameters
+        ----------
+        choice : int
+            Index of the answer choice (starting at 1)
+        expert : Optional[bool] (default : None)
+            If only expert (True) or non expert (False) rationales should be
+            returned. If None, both are returned.
+
+        Returns
+        -------
+        List[int]
+            Sorted primary keys of the rationales
+        """
+        rationales = self.rationales.get(choice, {})
+        if expert is None:
+            return sorted(
+                rationales.get("expert", []) + rationales.get("other", [])
+            )
+        return list(rationales.get("expert" if expert else "other", []))
+
+    def count(self, choice, expert=None):
+        rationales = self.rationales.get(choice, {})
+        if expert is None:
+            return len(rationales.get("expert", [])) + len(
+                rationales.get("other", [])
+            )
+        return len(rationales.get("expert" if expert else "other", []))
+
+    @classmethod
+    def get(cls, question):
+        """
+        Returns the pool for the question, building it if it doesn't exist
+        yet or is stale.
+
+        Parameters
+        ----------
+        question : Question
+            Question for which to get the pool
+
+        Returns
+        -------
+        RationalePool
+            Pool of the question
+        """
+        pool = cls.objects.filter(question=question).first()
+        if pool is None or pool.stale:
+            return cls.build(question)
+        return pool
+
+    @classmethod
+    def build(cls, question):
+        """
+        Computes the pool of a question from scratch, replacing any existing
+        one.
+
+        Parameters
+        ----------
+        question : Question
+            Question for which to build the pool
+
+        Returns
+        -------
+        RationalePool
+            Pool of the question
+        """
+        eligible = cls._eligible(Answer.objects.filter(question=question))
+        votes = cls._count_votes([pk for pk, _, _ in eligible])
+
+        # created stale so that it isn't used before its entries exist
+        pool, _ = cls.objects.get_or_create(
+            question=question, defaults={"stale": True}
+        )
+        with transaction.atomic():
+            pool = cls.objects.select_for_update().get(pk=pool.pk)
+            pool.entries.all().delete()
+            RationalePoolEntry.objects.bulk_create(
+                [
+                    RationalePoolEntry(
+                        pool=pool,
+                        answer_id=pk,
+                        first_answer_choice=choice,
+                        expert=expert,
+                        votes=votes.get(pk, 0),
+                    )
+                    for pk, choice, expert in eligible
+                ],
+                ignore_conflicts=True,
+            )
+            pool.stale = False
+            pool.save()
+        return pool
+
+    @classmethod
+    def refresh(cls, answers):
+        """
+        Re-evaluates if each of the given answers should be part of the pool
+        of their question. Pools which haven't been built yet or are stale
+        are left alone as they will be computed entirely on next use.
+
+        Parameters
+        ----------
+        answers : QuerySet[Answer]
+            Answers to re-evaluate
+        """
+        by_question = defaultdict(set)
+        for pk, question_pk in answers.values_list("pk", "question"):
+            by_question[question_pk].add(pk)
+
+        pools = cls.objects.filter(
+            question__in=list(by_question), stale=False
+        ).values_list("question", "pk")
+
+        for question_pk, pool_pk in pools:
+            pks = by_question[question_pk]
+            eligible = cls._eligible(Answer.objects.filter(pk__in=pks))
+            votes = cls._count_votes([pk for pk, _, _ in eligible])
+            with transaction.atomic():
+                RationalePoolEntry.objects.filter(answer__in=pks).delete()
+                RationalePoolEntry.objects.bulk_create(
+                    [
+                        RationalePoolEntry(
+                            pool_id=pool_pk,
+                            answer_id=pk,
+                            first_answer_choice=choice,
+                            expert=expert,
+                            votes=votes.get(pk, 0),
+                        )
+                        for pk, choice, expert in eligible
+                    ],
+                    ignore_conflicts=True,
+                )
+
+    @classmethod
+    def mark_stale(cls):
+        """
+        Marks all the pools to be rebuilt on their next use, for when the
+        global validation quality changes.
+        """
+        cls.objects.filter(stale=False).update(stale=True)
+
+    @classmethod
+    def remove(cls, answer):
+        """
+        Forgets the vote a deleted answer had given to its chosen rationale.
+        The answer itself is removed from the pool with its entry.
+
+        Parameters
+        ----------
+        answer : Answer
+            Deleted answer
+        """
+        if answer.chosen_rationale_id is None:
+            return
+        RationalePoolEntry.objects.filter(
+            answer=answer.chosen_rationale_id, votes__gt=0
+        ).update(votes=F("votes") - 1)
+
+    @classmethod
+    def add_vote(cls, answer):
+        """
+        Counts the chosen rationale of a new answer as voted once more.
+
+        Parameters
+        ----------
+        answer : Answer
+            New answer
+        """
+        if answer.chosen_rationale_id is None:
+            return
+        RationalePoolEntry.objects.filter(
+            answer=answer.chosen_rationale_id
+        ).update(votes=F("votes") + 1)
+
+    @staticmethod
+    def _count_votes(pks):
+        return dict(
+            Answer.objects.filter(chosen_rationale__in=pks)
+            .values("chosen_rationale")
+            .annotate(n=Count("id"))
+            .values_list("chosen_rationale", "n")
+        )
+
+    @staticmethod
+    def _eligible(answers):
+        """
+        Filters the answers to those which may be shown to other students,
+        i.e. shareable, not marked as never show, from students who didn't
+        refuse the terms of service and passing the global validation quality.
+
+        Parameters
+        ----------
+        answers : QuerySet[Answer]
+            Answers to filter
+
+        Returns
+        -------
+        List[Tuple[int, int, bool]]
+            Primary key, first answer choice and expert flag of each eligible
+            answer
+        """
+        # Rationales are selected based on those who have not refused
+        # to include rationales prior to implementation of TOS
+        usernames_to_exclude = (
+            Consent.objects.filter(tos__role="student")
+            .values("user__username")
+            .annotate(Max("datetime"))
+            .filter(accepted=False)
+            .values_list("user__username")
+        )
+        answers = (
+            Answer.may_show.filter(
+                pk__in=answers.values("pk"), show_to_others=True
+            )
+            .exclude(user_token__in=usernames_to_exclude)
+            .order_by("pk")
+        )
+
+        try:
+            quality = Quality.objects.get(
+                quality_type__type="global",
+                quality_use_type__type="validation",
+            )
+        except Quality.DoesNotExist:
+            quality = None
+
+        if quality is None or not quality.criterions.exists():
+            return list(
+                answers.values_list("pk", "first_answer_choice", "expert")
+            )
+
+        eligible = []
+        batch_size = getattr(settings, "BATCH_SIZE", 128)
+        for answers_ in batch(answers.iterator(), batch_size):
+            answers_ = list(answers_)
+            for answer, q in zip(answers_, quality.batch_evaluate(answers_)):
+                if all(
+                    c["quality"]["quality"] >= c["quality"]["threshold"]
+                    for c in q[1]
+                ):
+                    eligible.append(
+                        (answer.pk, answer.first_answer_choice, answer.expert)
+                    )
+        return eligible
+
+
+class RationalePoolEntry(models.Model):
+    """
+    Rationale of a `RationalePool` with the number of times it was chosen.
+    """
+
+    pool = models.ForeignKey(
+        RationalePool, related_name="entries", on_delete=models.CASCADE
+    )
+    answer = models.OneToOneField(
+        Answer, related_name="rationale_pool_entry", on_delete=models.CASCADE
+    )
+    first_answer_choice = models.PositiveSmallIntegerField()
+    expert = models.BooleanField(default=False)
+    votes = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return "Answer {} in rationale pool {}".format(
+            self.answer_id, self.pool_id
+        )
+
+
+class RationaleScoringQueue(models.Model):
+    """
+    Student rationales of a discipline which still need to be scored by
+    teachers, maintained in the background so that teachers can be given
+    rationales to score without evaluating every answer of their disciplines.
+
+    Candidates are the rationales chosen by other students which have been
+    scored fewer than `MAX_SCORES` times, stored as json lists
+    `[<answer pk>, <times chosen>, <quality>]` ordered by decreasing times
+    chosen and then increasing quality (missing qualities last). Queues are
+    rebuilt periodically and updated in between as rationales are chosen and
+    scored, new candidates having no quality until the next build.
+    """
+
+    MAX_SCORES = 3
+
+    discipline = models.OneToOneField(
+        Discipline,
+        related_name="rationale_scoring_queue",
+        on_delete=models.CASCADE,
+    )
+    candidates = models.TextField(default="[]")
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "Rationale scoring queue for discipline {}".format(
+            self.discipline_id
+        )
+
+    @classmethod
+    def build(cls, discipline):
+        """
+        Computes the queue of the discipline from scratch, replacing any
+        existing one.
+
+        Parameters
+        ----------
+        discipline : Union[Discipline, int]
+            Discipline (or its primary key) for which to build the queue
+
+        Returns
+        -------
+        RationaleScoringQueue
+            Queue of the discipline
+        """
+        discipline = getattr(discipline, "pk", discipline)
+
+        scored = (
+            AnswerAnnotation.objects.filter(score__isnull=False)
+            .values("answer")
+            .annotate(n=Count("pk"))
+            .filter(n__gte=cls.MAX_SCORES)
+            .values("answer")
+        )
+        times_chosen = (
+            Answer.objects.filter(
+                chosen_rationale__question__discipline=discipline
+            )
+            .exclude(chosen_rationale__in=scored)
+            .values_list("chosen_rationale")
+            .annotate(n=Count("pk"))
+            .order_by("-n", "chosen_rationale")[
+                : settings.RATIONALE_SCORING_QUEUE_SIZE
+            ]
+        )
+        times_chosen = dict(times_chosen)
+
+        qualities = {}
+        try:
+            quality = Quality.objects.get(
+                quality_type__type="global",
+                quality_use_type__type="validation",
+            )
+        except Quality.DoesNotExist:
+            quality = None
+        if quality is not None and quality.criterions.exists():
+            answers = list(Answer.objects.filter(pk__in=times_chosen))
+            qualities = {
+                answer.pk: q[0]
+                for answer, q in zip(
+                    answers, quality.batch_evaluate(answers, cache=True)
+                )
+            }
+
+        candidates = sorted(
+            ([pk, n, qualities.get(pk)] for pk, n in times_chosen.items()),
+            key=cls._order,
+        )
+
+        queue, _ = cls.objects.update_or_create(
+            discipline_id=discipline,
+            defaults={"candidates": json.dumps(candidates)},
+        )
+        return queue
+
+    @classmethod
+    def choose(cls, teacher, n=5):
+        """
+        Returns the first `n` candidates of the queues of the disciplines of
+        the teacher which they haven't annotated yet. Missing queues are
+        queued to be built and are empty until then.
+
+        Parameters
+        ----------
+        teacher : Teacher
+            Teacher for whom the rationales should be chosen
+        n : int (default : 5)
+            Number of answers to return
+
+        Returns
+        -------
+        List[Answer]
+            Rationales for the teacher to score
+        """
+        from ..tasks import build_rationale_scoring_queues_async
+
+        disciplines = list(teacher.disciplines.values_list("pk", flat=True))
+        queues = list(cls.objects.filter(discipline__in=disciplines))
+
+        missing = set(disciplines) - {q.discipline_id for q in queues}
+        if missing:
+            # the empty queues prevent other requests from building them too
+            cls.objects.bulk_create(
+                [cls(discipline_id=pk) for pk in missing],
+                ignore_conflicts=True,
+            )
+            build_rationale_scoring_queues_async(sorted(missing))
+            # the queues are built in place if the broker is unavailable
+            queues = list(cls.objects.filter(discipline__in=disciplines))
+
+        candidates = [json.loads(queue.candidates) for queue in queues]
+        annotated = set(
+            AnswerAnnotation.objects.filter(
+                annotator=teacher.user,
+                answer__in=[c[0] for c in chain(*candidates)],
+            ).values_list("answer", flat=True)
+        )
+
+        chosen = []
+        for candidate in heapq.merge(*candidates, key=cls._order):
+            if len(chosen) == n:
+                break
+            pk = candidate[0]
+            if pk not in annotated and pk not in chosen:
+                chosen.append(pk)
+
+        answers = Answer.objects.select_related("question").in_bulk(chosen)
+        return [answers[pk] for pk in chosen if pk in answers]
+
+    @classmethod
+    def refresh(cls, answer):
+        """
+        Updates the answer in the queue of its discipline after it was chosen
+        or scored: it is removed if it has been scored enough times and
+        otherwise added or moved with the number of times it was chosen.
+
+        Parameters
+        ----------
+        answer : Union[Answer, int]
+            Answer (or its primary key) which was chosen or scored
+        """
+        pk = getattr(answer, "pk", answer)
+        scored = (
+            AnswerAnnotation.objects.filter(
+                answer=pk, score__isnull=False
+            ).count()
+            >= cls.MAX_SCORES
+        )
+        times_chosen = (
+            0 if scored else Answer.objects.filter(chosen_rationale=pk).count()
+        )
+        with transaction.atomic():
+            queue = (
+                cls.objects.select_for_update()
+                .filter(
+                    discipline__in=Question.objects.filter(
+                        answer=pk
+                    ).values("discipline")
+                )
+                .first()
+            )
+            if queue is None:
+                return
+            candidates = json.loads(queue.candidates)
+            quality = next((c[2] for c in candidates if c[0] == pk), None)
+            candidates = [c for c in candidates if c[0] != pk]
+            if times_chosen:
+                candidates = sorted(
+                    candidates + [[pk, times_chosen, quality]], key=cls._order
+                )[: settings.RATIONALE_SCORING_QUEUE_SIZE]
+            candidates = json.dumps(candidates)
+            if candidates != queue.candidates:
+                queue.candidates = candidates
+                queue.save()
+
+    @staticmethod
+    def _order(candidate):
+        times_chosen, quality = candidate[1:]
+        return (-times_chosen, quality is None, quality or 0)
+
+
+class QuestionStatistics(models.Model):
+    """
+    Answer statistics of a question, maintained incrementally so that the
+    answer count, frequencies and difficulty matrix don't need to be
+    aggregated from the answers each time they are shown.
+
+    The answers are counted by
+    "<expert>|<has user token>|<first answer choice>|<second answer choice>"
+    (booleans as 0 or 1 and missing choices as 0) so that the statistics
+    stay correct when the correct answer choices are modified.
+    """
+
+    # fields of an answer which determine how it is counted
+    COUNTED_FIELDS = (
+        "question",
+        "expert",
+        "user_token",
+        "first_answer_choice",
+        "second_answer_choice",
+    )
+
+    question = models.OneToOneField(
+        Question, related_name="statistics", on_delete=models.CASCADE
+    )
+    answer_count = models.PositiveIntegerField(default=0)
+    counts = models.TextField(default="{}")
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "Statistics for question {}".format(self.question_id)
+
+    @property
+    def _counts(self):
+        if not hasattr(self, "_counts_cache"):
+            self._counts_cache = [
+                (tuple(int(v) for v in key.split("|")), n)
+                for key, n in json.loads(self.counts).items()
+            ]
+        return self._counts_cache
+
+    def get_matrix(self):
+        """
+        Returns the proportion of student answers which were correct at both
+        steps (easy), wrong at both steps (hard), correct then wrong (tricky)
+        and wrong then correct (peer).
+
+        Returns
+        -------
+        Dict[str, float]
+            Proportion for each of "easy", "hard", "tricky" and "peer"
+        """
+        matrix = {"easy": 0, "hard": 0, "tricky": 0, "peer": 0}
+
+        answer_choices = self.question.answerchoice_set.all()
+        correct_choices = {
+            i for i, choice in enumerate(answer_choices, 1) if choice.correct
+        }
+
+        # There must be more choices than correct choices for valid matrix
+        if len(answer_choices) <= len(correct_choices):
+            return matrix
+
+        counts = [
+            (first in correct_choices, second in correct_choices, n)
+            for (expert, has_user, first, second), n in self._counts
+            if not expert and has_user and second > 0
+        ]
+        N = sum(n for _, _, n in counts)
+        if N > 0:
+            for level, first, second in (
+                ("easy", True, True),
+                ("hard", False, False),
+                ("tricky", True, False),
+                ("peer", False, True),
+            ):
+                matrix[level] = (
+                    float(
+                        sum(
+                            n
+                            for first_, second_, n in counts
+                            if first_ == first and second_ == second
+                        )
+                    )
+                    / N
+                )
+
+        return matrix
+
+    def get_frequency(self, all_rationales=False):
+        """
+        Returns the number of times each answer choice was chosen at the first
+        and second steps.
+
+        Parameters
+        ----------
+        all_rationales : bool (default : False)
+            If the sample answers entered by teachers and the answers without
+            a second step should be counted (expert answers never are)
+
+        Returns
+        -------
+        Dict[str, Dict[str, int]]
+            Counts under the keys "first_choice" and "second_choice", indexed
+            by choice label
+        """
+        first_choice = defaultdict(int)
+        second_choice = defaultdict(int)
+        for (expert, has_user, first, second), n in self._counts:
+            if expert or first <= 0 or (not all_rationales and second <= 0):
+                continue
+            first_choice[first] += n
+            second_choice[second] += n
+
+        frequency = {"first_choice": {}, "second_choice": {}}
+        for i, answer_choice in enumerate(
+            self.question.answerchoice_set.all(), 1
+        ):
+            label = (
+                self.question.get_choice_label(i)
+                + ". "
+                + escape(strip_tags(answer_choice.text)).replace(
+                    "&amp;nbsp;", " "
+                )
+            )
+            if len(label) > 50:
+                label = label[0:50] + "..."
+            frequency["first_choice"][label] = first_choice[i]
+            frequency["second_choice"][label] = second_choice[i]
+
+        return frequency
+
+    @classmethod
+    def get(cls, questions):
+        """
+        Returns the statistics of the questions, building those which don't
+        exist yet with a single query.
+
+        Parameters
+        ----------
+        questions : Iterable[Question]
+            Questions for which to get the statistics
+
+        Returns
+        -------
+        Dict[int, QuestionStatistics]
+            Statistics by question primary key
+        """
+        questions = {question.pk: question for question in questions}
+        statistics = {
+            statistics.question_id: statistics
+            for statistics in cls.objects.filter(question__in=questions)
+        }
+        missing = [pk for pk in questions if pk not in statistics]
+        if missing:
+            statistics.update(cls.build(missing))
+        for pk, statistics_ in statistics.items():
+            statistics_.question = questions[pk]
+        return statistics
+
+    @classmethod
+    def build(cls, questions):
+        """
+        Computes the statistics of the questions from scratch, replacing any
+        existing ones.
+
+        Parameters
+        ----------
+        questions : Iterable[Union[Question, int]]
+            Questions (or their primary keys) for which to build the statistics
+
+        Returns
+        -------
+        Dict[int, QuestionStatistics]
+            Statistics by question primary key
+        """
+        pks = [getattr(question, "pk", question) for question in questions]
+
+        counts = defaultdict(dict)
+        for question, expert, has_user, first, second, n in (
+            Answer.objects.filter(question__in=pks)
+            .annotate(
+                has_user=Case(
+                    When(user_token="", then=Value(False)),
+                    default=Value(True),
+                    output_field=models.BooleanField(),
+                )
+            )
+            .values_list(
+                "question",
+                "expert",
+                "has_user",
+                "first_answer_choice",
+                "second_answer_choice",
+            )
+            .annotate(n=Count("pk"))
+            .order_by()
+        ):
+            key = cls._key(expert, has_user, first, second)
+            counts[question][key] = counts[question].get(key, 0) + n
+
+        with transaction.atomic():
+            cls.objects.filter(question__in=pks).delete()
+            statistics = cls.objects.bulk_create(
+                [
+                    cls(
+                        question_id=pk,
+                        answer_count=sum(counts[pk].values()),
+                        counts=json.dumps(counts[pk]),
+                    )
+                    for pk in pks
+                ],
+                ignore_conflicts=True,
+            )
+        return {
+            statistics_.question_id: statistics_ for statistics_ in statistics
+        }
+
+    @classmethod
+    def refresh(cls, question):
+        """
+        Rebuilds the statistics of the question if they exist. Missing
+        statistics are left alone as they are computed on first use.
+
+        Parameters
+        ----------
+        question : Union[Question, int]
+            Question (or its primary key) to refresh
+        """
+        pk = getattr(question, "pk", question)
+        if cls.objects.filter(question=pk).exists():
+            cls.build([pk])
+
+    @classmethod
+    def add_answer(cls, answer):
+        """
+        Counts a new answer in the statistics of its question.
+
+        Parameters
+        ----------
+        answer : Answer
+            New answer
+        """
+        cls._count(answer, 1)
+
+    @classmethod
+    def remove_answer(cls, answer):
+        """
+        Removes a deleted answer from the statistics of its question.
+
+        Parameters
+        ----------
+        answer : Answer
+            Deleted answer
+        """
+        cls._count(answer, -1)
+
+    @classmethod
+    def update_answer(cls, answer, update_fields=None):
+        """
+        Moves a modified answer from where it was counted in the statistics
+        of its question to where it is now counted, if any of the counted
+        fields changed.
+
+        Parameters
+        ----------
+        answer : Answer
+            Modified answer
+        update_fields : Optional[FrozenSet[str]] (default : None)
+            Fields given to `save`, as passed to the `post_save` receivers
+        """
+        if not answer.has_changed(cls.COUNTED_FIELDS, update_fields):
+            return
+        previous = answer.get_previous(cls.COUNTED_FIELDS)
+        if previous is None:
+            cls.refresh(answer.question_id)
+        else:
+            cls._count(previous, -1)
+            cls._count(answer, 1)
+
+    @classmethod
+    def _count(cls, answer, n):
+        with transaction.atomic():
+            statistics = (
+                cls.objects.select_for_update()
+                .filter(question=answer.question_id)
+                .first()
+            )
+            if statistics is None:
+                return
+            counts = json.loads(statistics.counts)
+            key = cls._key(
+                answer.expert,
+                answer.user_token != "",
+                answer.first_answer_choice,
+                answer.second_answer_choice,
+            )
+            counts[key] = max(counts.get(key, 0) + n, 0)
+            if not counts[key]:
+                del counts[key]
+            statistics.counts = json.dumps(counts)
+            statistics.answer_count = sum(counts.values())
+            statistics.save()
+
+    @staticmethod
+    def _key(expert, has_user, first, second):
+        return "{}|{}|{}|{}".format(
+            int(bool(expert)), int(bool(has_user)), first or 0, second or 0
+        )
+
+
+class AssignmentQuestionStatistics(models.Model):
+    """
+    Aggregates of the student answers to a question of an assignment,
+    maintained incrementally so that assignment and collection results don't
+    need to be computed from the answers each time they are shown.
+
+    The answers are counted by "<first answer choice>|<second answer choice>"
+    (missing choices as 0) so that the aggregates stay correct when the
+    correct answer choices are modified, and the students are stored with
+    their number of answers so that deleted answers can be removed.
+    """
+
+    # fields of an answer which determine how it is counted
+    COUNTED_FIELDS = (
+        "assignment",
+        "question",
+        "user_token",
+        "first_answer_choice",
+        "second_answer_choice",
+    )
+
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    counts = models.TextField(default="{}")
+    students = models.TextField(default="{}")
+    last_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("assignment", "question")
+
+    def __str__(self):
+        return "Statistics for question {} of assignment {}".format(
+            self.question_id, self.assignment_id
+        )
+
+    def get_aggregates(self):
+        """
+        Returns the aggregates in the format of
+        `admin_views.get_question_aggregates`.
+
+        Returns
+        -------
+        collections.Counter
+            Total answers, correct first and second answers, switches and
+            switches to each answer choice (if any)
+        Set[str]
+            User tokens of the students who answered
+        """
+        answer_choices = self.question.answerchoice_set.all()
+        correct_choices = {
+            i for i, choice in enumerate(answer_choices, 1) if choice.correct
+        }
+        counts = [
+            (tuple(int(v) for v in key.split("|")), n)
+            for key, n in json.loads(self.counts).items()
+        ]
+        # a missing second answer choice counts as a switch
+        switches = [
+            (second, n) for (first, second), n in counts if second != first
+        ]
+
+        sums = Counter(
+            total_answers=sum(n for _, n in counts),
+            correct_first_answers=sum(
+                n for (first, _), n in counts if first in correct_choices
+            ),
+            correct_second_answers=sum(
+                n for (_, second), n in counts if second in correct_choices
+            ),
+            switches=sum(n for _, n in switches),
+        )
+        for choice_index in range(1, len(answer_choices) + 1):
+            count = sum(n for second, n in switches if second == choice_index)
+            if count:
+                sums[("switches", choice_index)] = count
+
+        return sums, set(json.loads(self.students))
+
+    @classmethod
+    def get(cls, assignment, questions):
+        """
+        Returns the statistics of the questions of the assignment, building
+        those which don't exist yet with a single query.
+
+        Parameters
+        ----------
+        assignment : Assignment
+            Assignment of the questions
+        questions : Iterable[Question]
+            Questions for which to get the statistics
+
+        Returns
+        -------
+        Dict[int, AssignmentQuestionStatistics]
+            Statistics by question primary key
+        """
+        questions = {question.pk: question for question in questions}
+        statistics = {
+            statistics.question_id: statistics
+            for statistics in cls.objects.filter(
+                assignment=assignment, question__in=questions
+            )
+        }
+        missing = [pk for pk in questions if pk not in statistics]
+        if missing:
+            statistics.update(cls.build(assignment, missing))
+        for pk, statistics_ in statistics.items():
+            statistics_.question = questions[pk]
+        return statistics
+
+    @classmethod
+    def build(cls, assignment, questions):
+        """
+        Computes the statistics of the questions of the assignment from
+        scratch, replacing any existing ones.
+
+        Parameters
+        ----------
+        assignment : Union[Assignment, str]
+            Assignment (or its primary key)
+        questions : Iterable[Union[Question, int]]
+            Questions (or their primary keys) for which to build the statistics
+
+        Returns
+        -------
+        Dict[int, AssignmentQuestionStatistics]
+            Statistics by question primary key
+        """
+        assignment_pk = getattr(assignment, "pk", assignment)
+        pks = [getattr(question, "pk", question) for question in questions]
+
+        counts = defaultdict(dict)
+        students = defaultdict(dict)
+        for question, user_token, first, second, n in (
+            Answer.objects.filter(assignment=assignment_pk, question__in=pks)
+            .exclude(user_token="")
+            .values_list(
+                "question",
+                "user_token",
+                "first_answer_choice",
+                "second_answer_choice",
+            )
+            .annotate(n=Count("pk"))
+            .order_by()
+        ):
+            key = cls._key(first, second)
+            counts[question][key] = counts[question].get(key, 0) + n
+            students[question][user_token] = (
+                students[question].get(user_token, 0) + n
+            )
+
+        with transaction.atomic():
+            cls.objects.filter(
+                assignment=assignment_pk, question__in=pks
+            ).delete()
+            statistics = cls.objects.bulk_create(
+                [
+                    cls(
+                        assignment_id=assignment_pk,
+                        question_id=pk,
+                        counts=json.dumps(counts[pk]),
+                        students=json.dumps(students[pk]),
+                    )
+                    for pk in pks
+                ],
+                ignore_conflicts=True,
+            )
+        return {
+            statistics_.question_id: statistics_ for statistics_ in statistics
+        }
+
+    @classmethod
+    def refresh(cls, assignment, question):
+        """
+        Rebuilds the statistics of the question of the assignment if they
+        exist. Missing statistics are left alone as they are computed on first
+        use.
+
+        Parameters
+        ----------
+        assignment : Union[Assignment, str]
+            Assignment (or its primary key)
+        question : Union[Question, int]
+            Question (or its primary key) to refresh
+        """
+        assignment = getattr(assignment, "pk", assignment)
+        question = getattr(question, "pk", question)
+        if cls.objects.filter(
+            assignment=assignment, question=question
+        ).exists():
+            cls.build(assignment, [question])
+
+    @classmethod
+    def add_answer(cls, answer):
+        """
+        Counts a new answer in the statistics of its assignment and question.
+
+        Parameters
+        ----------
+        answer : Answer
+            New answer
+        """
+        cls._count(answer, 1)
+
+    @classmethod
+    def remove_answer(cls, answer):
+        """
+        Removes a deleted answer from the statistics of its assignment and
+        question.
+
+        Parameters
+        ----------
+        answer : Answer
+            Deleted answer
+        """
+        cls._count(answer, -1)
+
+    @classmethod
+    def update_answer(cls, answer, update_fields=None):
+        """
+        Moves a modified answer from where it was counted in the statistics
+        of its assignment and question to where it is now counted, if any of
+        the counted fields changed.
+
+        Parameters
+        ----------
+        answer : Answer
+            Modified answer
+        update_fields : Optional[FrozenSet[str]] (default : None)
+            Fields given to `save`, as passed to the `post_save` receivers
+        """
+        if not answer.has_changed(cls.COUNTED_FIELDS, update_fields):
+            return
+        previous = answer.get_previous(cls.COUNTED_FIELDS)
+        if previous is None:
+            if answer.assignment_id is not None:
+                cls.refresh(answer.assignment_id, answer.question_id)
+        else:
+            cls._count(previous, -1)
+            cls._count(answer, 1)
+
+    @classmethod
+    def _count(cls, answer, n):
+        if answer.assignment_id is None or not answer.user_token:
+            return
+        with transaction.atomic():
+            statistics = (
+                cls.objects.select_for_update()
+                .filter(
+                    assignment=answer.assignment_id,
+                    question=answer.question_id,
+                )
+                .first()
+            )
+            if statistics is None:
+                return
+            counts = json.loads(statistics.counts)
+            students = json.loads(statistics.students)
+            for values, key in (
+                (
+                    counts,
+                    cls._key(
+                        answer.first_answer_choice,
+                        answer.second_answer_choice,
+                    ),
+                ),
+                (students, answer.user_token),
+            ):
+                values[key] = max(values.get(key, 0) + n, 0)
+                if not values[key]:
+                    del values[key]
+            statistics.counts = json.dumps(counts)
+            statistics.students = json.dumps(students)
+            statistics.save()
+
+    @staticmethod
+    def _key(first, second):
+        return "{}|{}".format(first or 0, second or 0)
+
+
+class StageState(models.Model):
+    """
+    Durable copy of the data kept between the stages of a question being
+    answered (see `peerinst.util.StageData`), read when it isn't in the
+    cache anymore. Kept apart from the session so that going through the
+    stages never rewrites the session row.
+    """
+
+    session_key = models.CharField(max_length=40)
+    custom_key = models.CharField(max_length=200)
+    data = models.TextField()
+    expires = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = (("session_key", "custom_key"),)
+
+    def __str__(self):
+        return "Stage state {} for session {}".format(
+            self.custom_key, self.session_key
+        )
+
+    @classmethod
+    def get(cls, session_key, custom_key):
+        """
+        Returns the stored data if it hasn't expired.
+
+        Parameters
+        ----------
+        session_key : str
+            Key of the session
+        custom_key : str
+            Key identifying the assignment and question
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            Stored data
+        """
+        data = (
+            cls.objects.filter(
+                session_key=session_key,
+                custom_key=custom_key,
+                expires__gt=timezone.now(),
+            )
+            .values_list("data", flat=True)
+            .first()
+        )
+        return None if data is None else json.loads(data)
+
+    @classmethod
+    def set(cls, session_key, custom_key, data):
+        """
+        Stores the data, or removes it if None, resetting its expiry to
+        `STAGE_DATA_TIMEOUT` seconds.
+
+        Parameters
+        ----------
+        session_key : str
+            Key of the session
+        custom_key : str
+            Key identifying the assignment and question
+        data : Optional[str]
+            Data dumped as json
+        """
+        states = cls.objects.filter(
+            session_key=session_key, custom_key=custom_key
+        )
+        if data is None:
+            states.delete()
+            return
+        expires = timezone.now() + timedelta(
+            seconds=settings.STAGE_DATA_TIMEOUT
+        )
+        if not states.update(data=data, expires=expires):
+            cls.objects.update_or_create(
+                session_key=session_key,
+                custom_key=custom_key,
+                defaults={"data": data, "expires": expires},
+            )
+
+    @classmethod
+    def clean(cls):
+        """
+        Removes the expired states.
+        """
+        cls.objects.filter(expires__lte=timezone.now()).delete()
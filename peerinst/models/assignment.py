@@ -1,10 +1,12 @@
 import base64
 import logging
+import uuid
 from datetime import datetime, timedelta
 
 import pytz
 from django.contrib.auth.models import User
 from django.core import validators
+from django.core.cache import cache
 from django.urls import reverse
 from django.db import models
 from django.utils import timezone
@@ -14,10 +16,7 @@ from quality.models import Quality
 from reputation.models import Reputation
 
 from ..tasks import distribute_assignment_to_students_async
-from ..util import (
-    get_average_time_spent_on_all_question_start,
-    student_list_from_student_groups,
-)
+from ..util import get_average_time_spent_by_question
 from ..utils import format_time
 from .group import StudentGroup
 from .question import Question
@@ -424,10 +423,51 @@ class StudentGroupAssignment(models.Model):
             }
         ]
         """
+        return self.get_student_progress()
+
+    def get_student_progress(self, cache_timeout=None):
+        """
+        Computes `student_progress` from the stored student results and a
+        single grouped query for the time spent on each question.
+
+        Parameters
+        ----------
+        cache_timeout : Optional[int] (default : None)
+            If given, the progress is cached for this many seconds, keyed by
+            the question order and the version of the answers to the
+            assignment
+
+        Returns
+        -------
+        Same as `student_progress`
+        """
+        from .student import StudentAssignmentResults
+
+        if cache_timeout:
+            key = "student_progress:{}:{}:{}".format(
+                self.pk, self.get_progress_version(), self.order
+            )
+            progress = cache.get(key)
+            if progress is None:
+                progress = self.get_student_progress()
+                cache.set(key, progress, cache_timeout)
+            return progress
+
         results = [
-            student_assignment.detailed_results
-            for student_assignment in self.studentassignment_set.all()
+            results.detailed_results
+            for results in StudentAssignmentResults.get(
+                self.studentassignment_set.all()
+            ).values()
         ]
+        questions = self.questions
+        time_spent = get_average_time_spent_by_question(
+            [question.pk for question in questions],
+            student_list=list(
+                self.group.student_set.exclude(
+                    student__username="student"
+                ).values_list("student__username", flat=True)
+            ),
+        )
         return [
             {
                 "question_title": question.title,
@@ -439,18 +479,53 @@ class StudentGroupAssignment(models.Model):
                     result[i]["first_correct"] for result in results
                 ),
                 "n_correct": sum(result[i]["correct"] for result in results),
-                "time_spent": format_time(
-                    get_average_time_spent_on_all_question_start(
-                        student_list=student_list_from_student_groups(
-                            group_list=[self.group.pk]
-                        ),
-                        question_id=question.pk,
-                    )
-                ),
+                "time_spent": format_time(time_spent[question.pk]),
             }
-            for i, question in enumerate(self.questions)
+            for i, question in enumerate(questions)
         ]
 
+    def get_progress_version(self):
+        """
+        Returns the current version of the answers to the group assignment,
+        which changes each time one of them is saved or deleted. Versions are
+        random tokens so that a version evicted from the cache is never
+        reused.
+
+        Returns
+        -------
+        Optional[str]
+            Version of the answers or None if the cache is unavailable
+        """
+        key = StudentGroupAssignment._progress_version_key(self)
+        cache.add(key, uuid.uuid4().hex, None)
+        return cache.get(key)
+
+    @staticmethod
+    def invalidate_progress(group_assignments):
+        """
+        Changes the version of the answers to the group assignments.
+
+        Parameters
+        ----------
+        group_assignments : Iterable[Union[StudentGroupAssignment, int]]
+            Group assignments (or their primary keys)
+        """
+        cache.set_many(
+            {
+                StudentGroupAssignment._progress_version_key(
+                    group_assignment
+                ): uuid.uuid4().hex
+                for group_assignment in group_assignments
+            },
+            None,
+        )
+
+    @staticmethod
+    def _progress_version_key(group_assignment):
+        return "student_progress:{}:version".format(
+            getattr(group_assignment, "pk", group_assignment)
+        )
+
     @property
     def hash(self):
         return base64.urlsafe_b64encode(str(self.id).encode()).decode()
@@ -485,6 +560,8 @@ class StudentGroupAssignment(models.Model):
 
     @property
     def last_modified(self):
+        from .answer import Answer
+
         questions = self.questions
         students = [
             assignment.student.student.username
@@ -498,6 +575,6 @@ class StudentGroupAssignment(models.Model):
             else answer.datetime_start
             for question in questions
             for answer in question.answer_set.filter(
-                user_token__in=students
+                Answer.student_filter(students)
             ).exclude(datetime_start__isnull=True)
         )
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count
 from django.utils.translation import ugettext_lazy as _
 
 from .question import Question
@@ -24,12 +27,192 @@ class BlinkQuestion(models.Model):
         self.question.save()
         super(BlinkQuestion, self).save(*args, **kwargs)
 
+    @classmethod
+    def get_state(cls, pk):
+        """
+        Returns the live state of the blink question, reading it from the db
+        only if it isn't cached. The state is invalidated each time the
+        question or one of its rounds is saved or deleted.
+
+        Parameters
+        ----------
+        pk : str
+            Key of the blink question
+
+        Returns
+        -------
+        Dict[str, Any]
+            State under the format
+                {
+                    active: bool
+                        If the question accepts votes
+                    open_round: Optional[int]
+                        Primary key of the round accepting votes
+                    latest_round: Optional[int]
+                        Primary key of the latest round by deactivation time
+                    labels: List[str]
+                        Labels of the answer choices
+                }
+
+        Raises
+        ------
+        BlinkQuestion.DoesNotExist
+            If the question doesn't exist
+        """
+        key = cls._state_key(pk)
+        state = cache.get(key)
+        if state is None:
+            question = cls.objects.select_related("question").get(pk=pk)
+            rounds = BlinkRound.objects.filter(question=question)
+            state = {
+                "active": question.active,
+                "open_round": rounds.filter(deactivate_time__isnull=True)
+                .values_list("pk", flat=True)
+                .first(),
+                "latest_round": rounds.order_by("-deactivate_time")
+                .values_list("pk", flat=True)
+                .first(),
+                "labels": [
+                    label for label, _ in question.question.get_choices()
+                ],
+            }
+            cache.set(key, state, settings.BLINK_CACHE_TIMEOUT)
+        return state
+
+    @classmethod
+    def invalidate_state(cls, pk):
+        cache.delete(cls._state_key(pk))
+
+    @staticmethod
+    def current_url_cache_key(username):
+        """
+        Returns the cache key of the url of the current blink question of the
+        teacher.
+
+        Parameters
+        ----------
+        username : str
+            Username of the teacher
+
+        Returns
+        -------
+        str
+            Cache key
+        """
+        return "blink_teacher:{}:current_url".format(username)
+
+    @staticmethod
+    def invalidate_current_url(usernames):
+        """
+        Removes the cached url of the current blink question of the teachers.
+
+        Parameters
+        ----------
+        usernames : Iterable[str]
+            Usernames of the teachers
+        """
+        cache.delete_many(
+            [
+                BlinkQuestion.current_url_cache_key(username)
+                for username in usernames
+            ]
+        )
+
+    @staticmethod
+    def _state_key(pk):
+        return "blink_question:{}:state".format(pk)
+
 
 class BlinkRound(models.Model):
     question = models.ForeignKey(BlinkQuestion, on_delete=models.CASCADE)
     activate_time = models.DateTimeField()
     deactivate_time = models.DateTimeField(null=True)
 
+    @classmethod
+    def get_tally(cls, pk, n_choices):
+        """
+        Returns the number of votes for each answer choice of the round. The
+        counts are kept in the cache and incremented as votes come in, the db
+        only being read for the counts missing from the cache. These are only
+        added if no vote added them in the meantime.
+
+        Parameters
+        ----------
+        pk : int
+            Primary key of the round
+        n_choices : int
+            Number of answer choices of the question
+
+        Returns
+        -------
+        List[int]
+            Number of votes for each answer choice, in order
+        """
+        keys = [
+            cls._tally_key(pk, choice) for choice in range(1, n_choices + 1)
+        ]
+        counts = cache.get_many(keys)
+        if len(counts) < len(keys):
+            votes = cls._count_votes(pk)
+            missing = [key for key in keys if key not in counts]
+            for choice, key in enumerate(keys, 1):
+                if key in missing:
+                    cache.add(
+                        key, votes.get(choice, 0), settings.BLINK_CACHE_TIMEOUT
+                    )
+            counts.update(cache.get_many(missing))
+            # the cache may be unavailable
+            counts.update(
+                {
+                    key: votes.get(choice, 0)
+                    for choice, key in enumerate(keys, 1)
+                    if key not in counts
+                }
+            )
+        return [counts[key] for key in keys]
+
+    @classmethod
+    def add_to_tally(cls, pk, answer_choice):
+        """
+        Counts a new vote in the cached tally of the round. If the count isn't
+        cached, it is recounted from the db, including the new vote. If a
+        concurrent `get_tally` added it first, that count may or may not
+        include the vote so it is removed to be recounted on the next read.
+
+        Parameters
+        ----------
+        pk : int
+            Primary key of the round
+        answer_choice : int
+            Answer choice voted for
+        """
+        key = cls._tally_key(pk, answer_choice)
+        try:
+            cache.incr(key)
+        except ValueError:
+            count = cls._count_votes(pk, answer_choice).get(answer_choice, 0)
+            if not cache.add(key, count, settings.BLINK_CACHE_TIMEOUT):
+                cache.delete(key)
+
+    @staticmethod
+    def _count_votes(pk, answer_choice=None):
+        votes = BlinkAnswer.objects.filter(voting_round=pk)
+        if answer_choice is not None:
+            votes = votes.filter(answer_choice=answer_choice)
+        return dict(
+            votes.values_list("answer_choice").annotate(n=Count("pk"))
+        )
+
+    @classmethod
+    def invalidate_tally(cls, pk, n_choices):
+        cache.delete_many(
+            [cls._tally_key(pk, choice) for choice in range(1, n_choices + 1)]
+        )
+
+    @staticmethod
+    def _tally_key(pk, answer_choice):
+        return "blink_round:{}:tally:{}".format(pk, answer_choice)
+
 
 class BlinkAnswer(models.Model):
     question = models.ForeignKey(BlinkQuestion, on_delete=models.CASCADE)
@@ -15,7 +15,6 @@ from django.core import exceptions
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Q
-from django.utils.html import escape, strip_tags
 from django.utils.translation import ugettext_lazy as _
 
 from reputation.models import Reputation
@@ -412,115 +411,30 @@ class Question(models.Model):
     def is_correct(self, index):
         return self.answerchoice_set.all()[index - 1].correct
 
-    def get_matrix(self):
-        matrix = {}
-        matrix[str("easy")] = 0
-        matrix[str("hard")] = 0
-        matrix[str("tricky")] = 0
-        matrix[str("peer")] = 0
-
-        answer_choices = self.answerchoice_set.all()
-        answerchoice_correct = self.answerchoice_set.values_list(
-            "correct", flat=True
-        )
-        correct_choices = list(
-            itertools.compress(itertools.count(1), answerchoice_correct)
-        )
-
-        # There must be more choices than correct choices for valid matrix
-        if answer_choices.count() > len(correct_choices):
-            student_answers = (
-                self.answer_set.filter(expert=False)
-                .filter(second_answer_choice__gt=0)
-                .exclude(user_token="")
-            )
-            N = len(student_answers)
-            if N > 0:
-
-                easy = (
-                    student_answers.filter(
-                        first_answer_choice__in=correct_choices
-                    )
-                    .filter(second_answer_choice__in=correct_choices)
-                    .count()
-                )
-
-                hard = (
-                    student_answers.exclude(
-                        first_answer_choice__in=correct_choices
-                    )
-                    .exclude(second_answer_choice__in=correct_choices)
-                    .count()
-                )
-
-                tricky = (
-                    student_answers.filter(
-                        first_answer_choice__in=correct_choices
-                    )
-                    .exclude(second_answer_choice__in=correct_choices)
-                    .count()
-                )
-
-                # peer = (
-                #     student_answers.exclude(
-                #         first_answer_choice__in=correct_choices
-                #     )
-                #     .filter(second_answer_choice__in=correct_choices)
-                #     .count()
-                # )
-
-                # assert easy + hard + tricky + peer == N
+    def get_statistics(self):
+        """
+        Returns the answer statistics of the question, using those selected
+        with the question if available.
 
-                peer = N - easy - tricky - hard
+        Returns
+        -------
+        QuestionStatistics
+            Statistics of the question
+        """
+        from .answer import QuestionStatistics
 
-                matrix[str("easy")] = float(easy) / N
-                matrix[str("hard")] = float(hard) / N
-                matrix[str("tricky")] = float(tricky) / N
-                matrix[str("peer")] = float(peer) / N
+        try:
+            return self.statistics
+        except QuestionStatistics.DoesNotExist:
+            return QuestionStatistics.get([self])[self.pk]
 
-        return matrix
+    def get_matrix(self):
+        return self.get_statistics().get_matrix()
 
     def get_frequency(self, all_rationales=False):
-        choice1 = {}
-        choice2 = {}
-        frequency = {}
-        if all_rationales:
-            # all rationales, including those entered as samples by teachers,
-            # but exclude expert rationales, since they are no longer shown
-            # to students on review step
-            student_answers = self.answer_set.filter(
-                first_answer_choice__gt=0
-            ).exclude(expert=True)
-        else:
-            # only rationales entered by students
-            student_answers = (
-                self.answer_set.filter(expert=False)
-                .filter(first_answer_choice__gt=0)
-                .filter(second_answer_choice__gt=0)
-            )
-        c = 1
-        for answerChoice in self.answerchoice_set.all():
-            label = (
-                self.get_choice_label(c)
-                + ". "
-                + escape(strip_tags(answerChoice.text)).replace(
-                    "&amp;nbsp;", " "
-                )
-            )
-            if len(label) > 50:
-                label = label[0:50] + "..."
-            choice1[label] = student_answers.filter(
-                first_answer_choice=c
-            ).count()
-            choice2[label] = student_answers.filter(
-                second_answer_choice=c
-            ).count()
-            c = c + 1
-
-        frequency[str("first_choice")] = choice1
-        frequency[str("second_choice")] = choice2
-
-        return frequency
+        return self.get_statistics().get_frequency(
+            all_rationales=all_rationales
+        )
 
     def get_frequency_json(self, choice_index_name):
         frequency_dict = self.get_frequency(all_rationales=True)[
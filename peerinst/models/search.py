@@ -1,9 +1,31 @@
 # -*- coding: utf-8 -*-
 
 
-from django.db import models
+import html
+import re
+from collections import defaultdict
+
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils.html import strip_tags
+
+from ..stopwords import en, fr
+from ..utils import batch
+
+STOPWORDS = set(en) | set(fr)
 
 
 class MetaFeature(models.Model):
@@ -49,3 +71,198 @@ class MetaSearch(models.Model):
 
     def __str__(self):
         return "{}: {}".format(self.content_object, self.meta_feature)
+
+
+def tokenize(text, remove_stopwords=True):
+    """
+    Splits a text (possibly html) into lowercase search terms.
+
+    Parameters
+    ----------
+    text : str
+        Text to split
+    remove_stopwords : bool (default : True)
+        If english and french stop words should be removed
+
+    Returns
+    -------
+    List[str]
+        Terms in order of appearance
+    """
+    text = html.unescape(strip_tags(text or "")).lower()
+    return [
+        term[: QuestionSearchTerm.MAX_LENGTH]
+        for term in re.findall(r"\w+", text)
+        if not remove_stopwords or term not in STOPWORDS
+    ]
+
+
+class QuestionSearchTerm(models.Model):
+    """
+    Inverted index of the questions used for search. Each row gives the
+    weight of a term in a question, summed over the fields containing it.
+    """
+
+    MAX_LENGTH = 64
+    WEIGHTS = {
+        "pk": 4.0,
+        "title": 4.0,
+        "category": 2.0,
+        "discipline": 2.0,
+        "user": 2.0,
+        "text": 1.0,
+        "answer_choices": 1.0,
+    }
+    PREFIX_WEIGHT = 0.5
+    COMPLETE_KEY = "question_search_terms:complete"
+
+    question = models.ForeignKey(
+        "Question", related_name="search_terms", on_delete=models.CASCADE
+    )
+    term = models.CharField(max_length=MAX_LENGTH, db_index=True)
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = (("question", "term"),)
+
+    def __str__(self):
+        return "{} for question {}".format(self.term, self.question_id)
+
+    @classmethod
+    def index(cls, questions):
+        """
+        Replaces the index entries of the questions.
+
+        Parameters
+        ----------
+        questions : Iterable[Union[Question, int]]
+            Questions (or their primary keys) to index
+        """
+        from .question import Question
+
+        pks = [getattr(question, "pk", question) for question in questions]
+        questions = (
+            Question.objects.filter(pk__in=pks)
+            .select_related("discipline", "user")
+            .prefetch_related("category", "answerchoice_set")
+        )
+
+        terms = []
+        for question in questions:
+            fields = {
+                "pk": str(question.pk),
+                "title": question.title,
+                "category": " ".join(c.title for c in question.category.all()),
+                "discipline": question.discipline.title
+                if question.discipline
+                else "",
+                "user": question.user.username if question.user else "",
+                "text": question.text,
+                "answer_choices": " ".join(
+                    choice.text for choice in question.answerchoice_set.all()
+                ),
+            }
+            weights = defaultdict(float)
+            for field, text in fields.items():
+                for term in set(tokenize(text)):
+                    weights[term] += cls.WEIGHTS[field]
+            terms.extend(
+                cls(question=question, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+
+        with transaction.atomic():
+            cls.objects.filter(question__in=pks).delete()
+            cls.objects.bulk_create(terms, batch_size=1000)
+
+    @classmethod
+    def index_missing(cls, batch_size=500):
+        """
+        Indexes the questions missing from the index, such as all of them
+        right after the table is created. Every indexed question has at least
+        the term of its primary key, so the check is a single query, which is
+        skipped once the index is known to be complete.
+
+        Parameters
+        ----------
+        batch_size : int (default : 500)
+            Number of questions indexed at once
+        """
+        from .question import Question
+
+        if cache.get(cls.COMPLETE_KEY):
+            return
+
+        missing = (
+            Question.objects.filter(search_terms__isnull=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        for questions in batch(missing.iterator(), batch_size):
+            cls.index(list(questions))
+
+        cache.set(cls.COMPLETE_KEY, True, None)
+
+    @classmethod
+    def search(cls, search_string, queryset=None):
+        """
+        Returns the questions matching the search string, ordered by
+        relevance and then number of answers. Terms match exactly or as a
+        prefix (with a lower weight) and stop words are ignored unless the
+        search only contains stop words. Questions missing from the index are
+        indexed first.
+
+        Parameters
+        ----------
+        search_string : str
+            Searched text
+        queryset : Optional[QuerySet[Question]] (default : None)
+            Questions in which to search (all if None)
+
+        Returns
+        -------
+        QuerySet[Question]
+            Matching questions annotated with `relevance` and `answer_count`
+        """
+        from .question import Question
+
+        cls.index_missing()
+
+        if queryset is None:
+            queryset = Question.objects.all()
+
+        queryset = queryset.annotate(
+            answer_count=Coalesce(F("statistics__answer_count"), 0)
+        )
+
+        terms = tokenize(search_string) or tokenize(
+            search_string, remove_stopwords=False
+        )
+        if not terms:
+            return queryset.order_by("-answer_count", "pk")
+
+        matches = Q()
+        for term in terms:
+            matches |= Q(term__startswith=term)
+
+        relevance = (
+            cls.objects.filter(matches, question=OuterRef("pk"))
+            .order_by()
+            .values("question")
+            .annotate(
+                relevance=Sum(
+                    Case(
+                        When(term__in=terms, then=F("weight")),
+                        default=F("weight") * cls.PREFIX_WEIGHT,
+                        output_field=FloatField(),
+                    )
+                )
+            )
+            .values("relevance")
+        )
+
+        return (
+            queryset.annotate(relevance=Subquery(relevance))
+            .filter(relevance__gt=0)
+            .order_by("-relevance", "-answer_count", "pk")
+        )
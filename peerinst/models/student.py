@@ -1,4 +1,6 @@
+import json
 import logging
+from collections import defaultdict
 from datetime import datetime
 from operator import itemgetter
 
@@ -6,7 +8,8 @@ import pytz
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 from django.template import loader
 from django.utils.translation import ugettext_lazy as _
 
@@ -294,9 +297,9 @@ class Student(models.Model):
 
     def evaluate_reputation(self, criterion=None):
         """
-        Calculates the reputation for the student on all criteria or on a
+        Returns the reputation for the student on all criteria or on a
         specific criterion, creating the Reputation for them if it doesn't
-        already exist.
+        already exist. The last cached evaluation is used when available.
 
         Parameters
         ----------
@@ -317,7 +320,7 @@ class Student(models.Model):
         if self.reputation is None:
             self.reputation = Reputation.create("student")
             self.save()
-        return self.reputation.evaluate(criterion)[0]
+        return self.reputation.get_cached(criterion)[0]
 
     @property
     def current_groups(self):
@@ -345,7 +348,9 @@ class Student(models.Model):
 
     @property
     def answers(self):
-        return Answer.objects.filter(user_token=self.student.username)
+        return Answer.objects.filter(
+            Answer.student_filter([self.student.username])
+        )
 
     @property
     def answers_chosen_by_others(self):
@@ -375,7 +380,7 @@ class Student(models.Model):
             self.reputation = Reputation.create("student")
             self.save()
 
-        return self.reputation.evaluate("convincing_rationales")[0]
+        return self.reputation.get_cached("convincing_rationales")[0]
 
 
 class StudentGroupMembership(models.Model):
@@ -556,16 +561,35 @@ class StudentAssignment(models.Model):
 
         return err
 
+    def _get_answers(self):
+        """
+        Returns the answers of the student to the assignment in a single
+        query.
+
+        Returns
+        -------
+        Dict[int, List[Answer]]
+            Answers to each question by primary key, in order of creation
+        """
+        answers = defaultdict(list)
+        for answer in (
+            Answer.objects.filter(
+                Answer.student_filter([self.student.student.username]),
+                assignment=self.group_assignment.assignment_id,
+            )
+            .select_related("question")
+            .order_by("pk")
+        ):
+            answers[answer.question_id].append(answer)
+        return answers
+
     def get_current_question(self):
         questions = self.group_assignment.questions
 
         # get the answer or None for each question of the assignment
+        answers = self._get_answers()
         answers = [
-            Answer.objects.filter(
-                user_token=self.student.student.username,
-                question=question,
-                assignment=self.group_assignment.assignment,
-            ).first()
+            answers[question.pk][0] if question.pk in answers else None
             for question in questions
         ]
         has_first_answer = [
@@ -642,19 +666,10 @@ class StudentAssignment(models.Model):
         bool
             If the assignment was completed
         """
+        answers = self._get_answers()
         return not any(
-            not Answer.objects.filter(
-                assignment=self.group_assignment.assignment,
-                user_token=self.student.student.username,
-                question=question,
-            ).exists()
-            or not Answer.objects.filter(
-                assignment=self.group_assignment.assignment,
-                user_token=self.student.student.username,
-                question=question,
-            )
-            .last()
-            .completed
+            question.pk not in answers
+            or not answers[question.pk][-1].completed
             for question in self.group_assignment.questions
         )
 
@@ -677,15 +692,9 @@ class StudentAssignment(models.Model):
                 }
             ]
         """
+        answers = self._get_answers()
         answers = [
-            (
-                Answer.objects.filter(
-                    assignment=self.group_assignment.assignment,
-                    user_token=self.student.student.username,
-                    question=question,
-                )
-                or [None]
-            )[0]
+            answers[question.pk][0] if question.pk in answers else None
             for question in self.group_assignment.questions
         ]
 
@@ -732,6 +741,381 @@ class StudentAssignment(models.Model):
         return sum(map(itemgetter("grade"), self.detailed_results))
 
 
+class StudentAssignmentResults(models.Model):
+    """
+    Stored results of a student assignment, kept up to date when answers are
+    saved and when the questions of the group assignment change.
+
+    The results are stored as json under the format
+        {
+            <question pk>: {
+                completed: bool
+                    if completed
+                first_correct: bool
+                    if first answer correct
+                correct: bool
+                    if answer correct
+                grade: float
+                    grade for the question
+                last_completed: bool
+                    if the latest answer is completed
+            }
+        }
+    for every question answered, the first answer giving the results and the
+    latest one the completion of the assignment as in `StudentAssignment`,
+    and the questions of the group assignment as a json list of primary keys
+    in their order.
+    """
+
+    # fields of an answer on which its results depend
+    ANSWER_FIELDS = (
+        "assignment",
+        "question",
+        "user_token",
+        "student",
+        "first_answer_choice",
+        "second_answer_choice",
+    )
+    # fields of a question and of its answer choices on which the results of
+    # its answers depend
+    QUESTION_FIELDS = ("type", "grading_scheme", "second_answer_needed")
+    ANSWER_CHOICE_FIELDS = ("correct",)
+
+    student_assignment = models.OneToOneField(
+        StudentAssignment,
+        related_name="stored_results",
+        on_delete=models.CASCADE,
+    )
+    questions = models.TextField(default="[]")
+    results = models.TextField(default="{}")
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "Results for {}".format(self.student_assignment_id)
+
+    @property
+    def detailed_results(self):
+        """
+        Returns the same results as `StudentAssignment.detailed_results`.
+        """
+        results = json.loads(self.results)
+        return [
+            {
+                key: value
+                for key, value in results.get(
+                    str(question),
+                    {
+                        "completed": False,
+                        "first_correct": False,
+                        "correct": False,
+                        "grade": 0,
+                    },
+                ).items()
+                if key != "last_completed"
+            }
+            for question in json.loads(self.questions)
+        ]
+
+    @property
+    def aggregated_results(self):
+        """
+        Returns the same results as `StudentAssignment.results`.
+        """
+        results = self.detailed_results
+        return {
+            "n": len(results),
+            "n_completed": sum(map(itemgetter("completed"), results)),
+            "n_first_correct": sum(map(itemgetter("first_correct"), results)),
+            "n_correct": sum(map(itemgetter("correct"), results)),
+            "grade": sum(map(itemgetter("grade"), results)),
+        }
+
+    @property
+    def completed(self):
+        """
+        Returns the same value as `StudentAssignment.completed`, using the
+        latest answer to each question.
+        """
+        results = json.loads(self.results)
+        return all(
+            str(question) in results
+            and results[str(question)].get(
+                "last_completed", results[str(question)]["completed"]
+            )
+            for question in json.loads(self.questions)
+        )
+
+    @classmethod
+    def get(cls, student_assignments):
+        """
+        Returns the stored results of the student assignments, building the
+        missing ones.
+
+        Parameters
+        ----------
+        student_assignments : Iterable[StudentAssignment]
+            Student assignments
+
+        Returns
+        -------
+        Dict[int, StudentAssignmentResults]
+            Results for each student assignment pk
+        """
+        student_assignments = list(student_assignments)
+        results = {
+            results.student_assignment_id: results
+            for results in cls.objects.filter(
+                student_assignment__in=student_assignments
+            )
+        }
+        missing = [
+            student_assignment
+            for student_assignment in student_assignments
+            if student_assignment.pk not in results
+        ]
+        if missing:
+            results.update(
+                {
+                    results_.student_assignment_id: results_
+                    for results_ in cls.build(missing)
+                }
+            )
+        return results
+
+    @classmethod
+    def build(cls, student_assignments):
+        """
+        Computes and stores the results of the student assignments with one
+        answer query per group assignment.
+
+        Parameters
+        ----------
+        student_assignments : Iterable[StudentAssignment]
+            Student assignments
+
+        Returns
+        -------
+        List[StudentAssignmentResults]
+            Stored results
+        """
+        by_group_assignment = defaultdict(list)
+        for student_assignment in StudentAssignment.objects.filter(
+            pk__in=[s.pk for s in student_assignments]
+        ).select_related("student__student", "group_assignment"):
+            by_group_assignment[student_assignment.group_assignment].append(
+                student_assignment
+            )
+
+        built = []
+        for (
+            group_assignment,
+            student_assignments_,
+        ) in by_group_assignment.items():
+            questions = json.dumps(cls.get_question_pks(group_assignment))
+            students = {
+                s.student.student.username: s.student_id
+                for s in student_assignments_
+            }
+            answers = defaultdict(dict)
+            for answer in (
+                Answer.objects.filter(
+                    Answer.student_filter(students),
+                    assignment=group_assignment.assignment_id,
+                )
+                .select_related("question")
+                .prefetch_related("question__answerchoice_set")
+                .order_by("pk")
+            ):
+                student = answer.student_id or students[answer.user_token]
+                question = str(answer.question_id)
+                # the first answer gives the results and the latest one the
+                # completion
+                if question not in answers[student]:
+                    answers[student][question] = cls._evaluate(answer)
+                answers[student][question]["last_completed"] = (
+                    answer.completed
+                )
+
+            results = [
+                cls(
+                    student_assignment=student_assignment,
+                    questions=questions,
+                    results=json.dumps(
+                        answers[student_assignment.student_id]
+                    ),
+                )
+                for student_assignment in student_assignments_
+            ]
+            try:
+                with transaction.atomic():
+                    cls.objects.filter(
+                        student_assignment__in=student_assignments_
+                    ).delete()
+                    built.extend(cls.objects.bulk_create(results))
+            except IntegrityError:
+                # built at the same time by another request
+                built.extend(
+                    cls.objects.filter(
+                        student_assignment__in=student_assignments_
+                    )
+                )
+        return built
+
+    @classmethod
+    def update_answer(cls, answer):
+        """
+        Updates the results of the question of the answer for every student
+        assignment of the student containing it.
+
+        Parameters
+        ----------
+        answer : Answer
+            Saved or deleted answer
+        """
+        if answer.assignment_id is None:
+            return
+
+        if answer.student_id is None:
+            student = Q(
+                student_assignment__student__student__username=(
+                    answer.user_token
+                )
+            )
+        else:
+            student = Q(student_assignment__student=answer.student_id)
+
+        with transaction.atomic():
+            stored = list(
+                cls.objects.select_for_update()
+                .filter(
+                    student,
+                    student_assignment__group_assignment__assignment=(
+                        answer.assignment_id
+                    ),
+                )
+                .select_related("student_assignment__student__student")
+            )
+            if not stored:
+                return
+
+            answers = Answer.objects.filter(
+                Answer.student_filter(
+                    [
+                        stored[0].student_assignment.student.student.username
+                    ]
+                ),
+                assignment=answer.assignment_id,
+                question=answer.question_id,
+            ).order_by("pk")
+            first = answers.first()
+            if first is None:
+                result = None
+            else:
+                result = cls._evaluate(first)
+                result["last_completed"] = answers.last().completed
+
+            for results_ in stored:
+                results = json.loads(results_.results)
+                if result is None:
+                    results.pop(str(answer.question_id), None)
+                else:
+                    results[str(answer.question_id)] = result
+                results_.results = json.dumps(results)
+                results_.save()
+
+    @classmethod
+    def update_modified_answer(cls, answer, update_fields=None):
+        """
+        Updates the results of a modified answer if any of the fields they
+        depend on changed, as well as the results where it was previously
+        counted if it moved to another student, assignment or question.
+
+        Parameters
+        ----------
+        answer : Answer
+            Modified answer
+        update_fields : Optional[FrozenSet[str]] (default : None)
+            Fields given to `save`, as passed to the `post_save` receivers
+        """
+        if not answer.has_changed(cls.ANSWER_FIELDS, update_fields):
+            return
+        cls.update_answer(answer)
+        previous = answer.get_previous(cls.ANSWER_FIELDS)
+        if previous is not None and any(
+            getattr(previous, attname) != getattr(answer, attname)
+            for attname in (
+                "assignment_id",
+                "question_id",
+                "user_token",
+                "student_id",
+            )
+        ):
+            cls.update_answer(previous)
+
+    @classmethod
+    def refresh_question(cls, question):
+        """
+        Rebuilds the stored results of the student assignments containing the
+        question, for when its correct answer choices or grading change.
+
+        Parameters
+        ----------
+        question : Union[Question, int]
+            Question (or its primary key)
+        """
+        student_assignments = StudentAssignment.objects.filter(
+            stored_results__isnull=False,
+            group_assignment__assignment__questions=getattr(
+                question, "pk", question
+            ),
+        ).distinct()
+        if student_assignments.exists():
+            cls.build(student_assignments)
+
+    @classmethod
+    def update_questions(cls, group_assignment):
+        """
+        Updates the order of the questions of all the results of the group
+        assignment.
+
+        Parameters
+        ----------
+        group_assignment : StudentGroupAssignment
+            Modified group assignment
+        """
+        cls.objects.filter(
+            student_assignment__group_assignment=group_assignment
+        ).update(questions=json.dumps(cls.get_question_pks(group_assignment)))
+
+    @staticmethod
+    def get_question_pks(group_assignment):
+        """
+        Returns the primary keys of the questions of the group assignment in
+        the same order as `StudentGroupAssignment.questions`, without saving
+        the group assignment.
+        """
+        questions = list(
+            group_assignment.assignment.questions.order_by(
+                "assignmentquestions__rank"
+            ).values_list("pk", flat=True)
+        )
+        if not questions:
+            return []
+        order = group_assignment.order or ",".join(
+            map(str, range(len(questions)))
+        )
+        return [questions[i] for i in map(int, order.split(","))]
+
+    @staticmethod
+    def _evaluate(answer):
+        return {
+            "completed": answer.completed,
+            "first_correct": answer.first_correct,
+            "correct": answer.correct,
+            "grade": answer.grade,
+        }
+
+
 class StudentNotificationType(models.Model):
     type = models.CharField(max_length=32, unique=True)
     icon = models.TextField()
@@ -1,8 +1,10 @@
 import base64
+import uuid
 
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.urls import reverse
 from django.db import models
 from django.db.models import Q
@@ -143,6 +145,52 @@ class TeacherNotification(models.Model):
             self.notification_type.model, self.object_id, self.teacher
         )
 
+    @staticmethod
+    def get_version(user):
+        """
+        Returns the current version of the notifications of the teacher,
+        which changes each time one of their notifications is added or
+        removed. Versions are random tokens so that a version evicted from
+        the cache is never reused.
+
+        Parameters
+        ----------
+        user : Union[User, int]
+            User (or its primary key) of the teacher
+
+        Returns
+        -------
+        Optional[str]
+            Version of the notifications or None if the cache is unavailable
+        """
+        key = TeacherNotification._version_key(user)
+        cache.add(key, uuid.uuid4().hex, None)
+        return cache.get(key)
+
+    @staticmethod
+    def invalidate(users):
+        """
+        Changes the version of the notifications of the teachers.
+
+        Parameters
+        ----------
+        users : Iterable[Union[User, int]]
+            Users (or their primary keys) of the teachers
+        """
+        cache.set_many(
+            {
+                TeacherNotification._version_key(user): uuid.uuid4().hex
+                for user in users
+            },
+            None,
+        )
+
+    @staticmethod
+    def _version_key(user):
+        return "teacher_notifications:{}:version".format(
+            getattr(user, "pk", user)
+        )
+
 
 class VerifiedDomain(models.Model):
     domain = models.CharField(
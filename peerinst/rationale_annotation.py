@@ -7,7 +7,13 @@ from django.db.models import Count, Q
 
 from quality.models import Quality
 
-from .models import Answer, AnswerAnnotation, Question, Teacher
+from .models import (
+    Answer,
+    AnswerAnnotation,
+    Question,
+    RationaleScoringQueue,
+    Teacher,
+)
 
 
 def choose_questions(teacher):
@@ -82,6 +88,39 @@ def choose_rationales(teacher, n=5):
     return answers[:n]
 
 
+def choose_rationales_to_score(teacher, n=5):
+    """
+    Returns the top `n` rationales for the `teacher` to score from the
+    scoring queues of their disciplines, completed with rationales from their
+    own students as in `choose_rationales_no_quality` when the queues don't
+    have enough (or the teacher has no disciplines).
+
+    Parameters
+    ----------
+    teacher : Teacher
+        Teacher for whom the rationales should be chosen
+    n : int (default : 5)
+        Number of answers to return
+
+    Returns
+    -------
+    List[Answer]
+        Rationales for the teacher to score
+    """
+    assert isinstance(teacher, Teacher), "Precondition failed for `teacher`"
+    assert isinstance(n, int), "Precondition failed for `n`"
+
+    chosen = RationaleScoringQueue.choose(teacher, n)
+    if len(chosen) < n:
+        pks = {answer.pk for answer in chosen}
+        chosen.extend(
+            answer
+            for answer in choose_rationales_no_quality(teacher, n)
+            if answer.pk not in pks
+        )
+    return chosen[:n]
+
+
 def choose_rationales_no_quality(teacher, n=5):
     """
     Evaluates each rationale based on if the `teacher` should evaluate and
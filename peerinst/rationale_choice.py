@@ -28,17 +28,13 @@ the "algorithms" dictionary at the end of this file.
 """
 
 import random
-from itertools import chain
 
-from django.conf import settings
-from django.db.models import Count, Max
 from django.utils.translation import ugettext
 from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ugettext_noop
 
-from quality.models import Quality
-from tos.models import Consent
-
-from .utils import batch
+# Text of the option to keep one's own rationale, added to the first choice
+OWN_RATIONALE = ugettext_noop("I stick with my own rationale.")
 
 
 class RationaleSelectionError(Exception):
@@ -55,79 +51,61 @@ def _base_selection_algorithm(
     question,
     selection_callback,
 ):
-    """Select the rationales at random."""
+    """Select the rationales at random.
+
+    The rationales are taken from the precomputed pool of the question (see
+    `RationalePool`) and `selection_callback` is called with the random number
+    generator, the sorted primary keys of the candidate rationales and the
+    pool.
+    """
     from . import models  # Local import to avoid circular dependency
 
     first_choice = first_answer_choice
     answer_choices = question.answerchoice_set.all()
     # Find all public rationales for this question.
-    # Rationales are selected based on those who have not refused
-    # to include rationales prior to implementation of TOS
-    usernames_to_exclude = (
-        Consent.objects.filter(tos__role="student")
-        .values("user__username")
-        .annotate(Max("datetime"))
-        .filter(accepted=False)
-        .values_list("user__username")
-    )
-    all_rationales = models.Answer.may_show.filter(
-        question=question, show_to_others=True
-    ).exclude(user_token__in=usernames_to_exclude)
-
-    try:
-        quality = Quality.objects.get(
-            quality_type__type="global", quality_use_type__type="validation"
+    pool = models.RationalePool.get(question)
+    counts = {
+        choice: n
+        for choice, n in (
+            (choice, pool.count(choice)) for choice in pool.rationales
         )
-        batch_size = getattr(settings, "BATCH_SIZE", 128)
-        qualities = chain(
-            *(
-                quality.batch_evaluate(answers)
-                for answers in batch(all_rationales.iterator(), batch_size)
-            )
-        )
-        kept_answers = [
-            answer.pk
-            for answer, q in zip(all_rationales.iterator(), qualities)
-            if all(
-                c["quality"]["quality"] >= c["quality"]["threshold"]
-                for c in q[1]
-            )
-        ]
-        all_rationales = all_rationales.filter(pk__in=kept_answers)
-    except Quality.DoesNotExist:
-        pass
-
-    try:
-        """
-        test
-        t = is there at least two answer choices with rationales
-        tt = does my choice have a sample rationale
-        ttt = does at least one correct choice have a sample rationale
-        """
-        t = all_rationales.values("first_answer_choice").annotate(
-            answer_count=Count("first_answer_choice")
-        )[1]
-        tt = (
-            all_rationales.filter(first_answer_choice=first_choice)
-            .values("first_answer_choice")
-            .annotate(answer_count=Count("first_answer_choice"))[0]
-        )
-        for i, answer_choice in enumerate(answer_choices, 1):
-            if answer_choice.correct:
-                ttt = (
-                    all_rationales.filter(first_answer_choice=i)
-                    .values("first_answer_choice")
-                    .annotate(answer_count=Count("first_answer_choice"))[0]
-                )
-                break
+        if n
+    }
 
-    except IndexError:
+    """
+    test
+    t = is there at least two answer choices with rationales
+    tt = does my choice have a sample rationale
+    ttt = does at least one correct choice have a sample rationale
+    """
+    t = len(counts) >= 2
+    tt = first_choice in counts
+    ttt = True
+    for i, answer_choice in enumerate(answer_choices, 1):
+        if answer_choice.correct:
+            ttt = i in counts
+            break
+    if not (t and tt and ttt):
         raise RationaleSelectionError(
             ugettext(
                 """Can't proceed since the course staff did not
                 provide example answers."""
             )
         )
+
+    def sorted_choices(exclude):
+        return [
+            choice
+            for choice, _ in sorted(
+                (
+                    (choice, n)
+                    for choice, n in counts.items()
+                    if choice not in exclude
+                ),
+                key=lambda c: (-c[1], c[0]),
+            )
+        ]
+
     # Select a second answer to offer at random.
     # If the user's answer wasn't correct, the
     # second answer choice offered must be correct.
@@ -135,36 +113,21 @@ def _base_selection_algorithm(
         # We must make sure that rationales for the second answer exist.
         # The choice is
         # weighted by the number of rationales available.
-        other_rationales = all_rationales.exclude(
-            first_answer_choice=first_choice
-        )
-
-        sorted_choices = (
-            other_rationales.values("first_answer_choice")
-            .annotate(answer_count=Count("first_answer_choice"))
-            .order_by("-answer_count")
-        )
+        sorted_choices_ = sorted_choices([first_choice])
 
-        if len(sorted_choices) > 0:
-            second_choice = sorted_choices[0]["first_answer_choice"]
+        if len(sorted_choices_) > 0:
+            second_choice = sorted_choices_[0]
         else:
-            second_choice = None
-        if len(sorted_choices) > 1:
-            third_choice = sorted_choices[1]["first_answer_choice"]
-        else:
-            third_choice = None
-
-        # We don't use rng.choice() to avoid fetching all rationales
-        # from the database.
-        try:
-            t = sorted_choices[0]
-        except IndexError:
             raise RationaleSelectionError(
                 ugettext(
                     """Can't proceed since the course staff did not
                     provide example answers."""
                 )
             )
+        if len(sorted_choices_) > 1:
+            third_choice = sorted_choices_[1]
+        else:
+            third_choice = None
 
     else:
         # Select a random correct answer.  We assume that a correct
@@ -173,16 +136,9 @@ def _base_selection_algorithm(
             [i for i, choice in enumerate(answer_choices, 1) if choice.correct]
         )
         if len(answer_choices) > 2:
-            other_rationales = all_rationales.exclude(
-                first_answer_choice__in=[first_choice, second_choice]
-            )
-            sorted_choices = (
-                other_rationales.values("first_answer_choice")
-                .annotate(answer_count=Count("first_answer_choice"))
-                .order_by("-answer_count")
-            )
-            if len(sorted_choices) > 0:
-                third_choice = sorted_choices[0]["first_answer_choice"]
+            sorted_choices_ = sorted_choices([first_choice, second_choice])
+            if len(sorted_choices_) > 0:
+                third_choice = sorted_choices_[0]
             else:
                 third_choice = None
         else:
@@ -205,25 +161,32 @@ def _base_selection_algorithm(
             only shows expert rationale if there aren't enough non-expert rationales
             """
             rationales = (
-                all_rationales.filter(first_answer_choice=choice, expert=False)
-                if all_rationales.filter(
-                    first_answer_choice=choice, expert=False
-                ).count()
-                > 1
-                else all_rationales.filter(first_answer_choice=choice)
+                pool.get_rationales(choice, expert=False)
+                if pool.count(choice, expert=False) > 1
+                else pool.get_rationales(choice)
             )
             # Select up to four rationales for each choice, if available.
             if rationales:
-                rationales = selection_callback(rng, rationales)
-                rationales = [(r.id, r.rationale) for r in rationales]
+                rationales = selection_callback(rng, rationales, pool)
             else:
                 rationales = []
             chosen_choices.append((choice, label, rationales))
-    # Include the rationale the student entered in the choices.
 
-    chosen_choices[0][2].append(
-        (None, ugettext("I stick with my own rationale."))
+    # Fetch the text of all selected rationales at once
+    texts = dict(
+        models.Answer.objects.filter(
+            pk__in=[
+                pk for _, _, rationales in chosen_choices for pk in rationales
+            ]
+        ).values_list("pk", "rationale")
     )
+    chosen_choices = [
+        (choice, label, [(pk, texts[pk]) for pk in rationales if pk in texts])
+        for choice, label, rationales in chosen_choices
+    ]
+
+    # Include the rationale the student entered in the choices.
+    chosen_choices[0][2].append((None, ugettext(OWN_RATIONALE)))
 
     return chosen_choices
 
@@ -231,10 +194,8 @@ def _base_selection_algorithm(
 def simple(
     rng, first_answer_choice, entered_rationale, question, max_rationales=10
 ):
-    def callback(rng, rationales):
-        return rng.sample(
-            list(rationales), min(max_rationales, rationales.count())
-        )
+    def callback(rng, rationales, pool):
+        return rng.sample(rationales, min(max_rationales, len(rationales)))
 
     return _base_selection_algorithm(
         rng, first_answer_choice, entered_rationale, question, callback
@@ -282,32 +243,35 @@ simple_sequential.description = _(
 def prefer_expert_and_highly_voted(
     rng, first_answer_choice, entered_rationale, question
 ):
-    def callback(rng, rationales):
+    def callback(rng, rationales, pool):
         chosen = []
+        expert = {
+            pk
+            for choice in pool.rationales
+            for pk in pool.get_rationales(choice, expert=True)
+        }
 
         # Add an expert rationale if one exists.
-        expert_rationales = rationales.filter(expert=True)
+        expert_rationales = [r for r in rationales if r in expert]
         if expert_rationales:
             chosen.append(rng.choice(expert_rationales))
-            rationales = rationales.exclude(pk=chosen[-1].pk)
+            rationales = [r for r in rationales if r != chosen[-1]]
             if not rationales:
                 return chosen
 
         # Add a highly voted rationale if one exists.
-        rationales_with_votes = rationales.annotate(votes=Count("answer"))
-        max_votes = rationales_with_votes.aggregate(Max("votes"))["votes__max"]
-        highly_voted_rationales = rationales_with_votes.filter(
-            votes__gt=max_votes // 2
-        )
+        votes = pool.votes
+        max_votes = max(votes.get(r, 0) for r in rationales)
+        highly_voted_rationales = [
+            r for r in rationales if votes.get(r, 0) > max_votes // 2
+        ]
         if highly_voted_rationales:
             chosen.append(rng.choice(highly_voted_rationales))
-            rationales = rationales.exclude(pk=chosen[-1].pk)
+            rationales = [r for r in rationales if r != chosen[-1]]
 
         # Fill up with random other rationales
         chosen.extend(
-            rng.sample(
-                list(rationales), min(10 - len(chosen), rationales.count())
-            )
+            rng.sample(rationales, min(10 - len(chosen), len(rationales)))
         )
         rng.shuffle(chosen)
         return chosen
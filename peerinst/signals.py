@@ -2,19 +2,55 @@ from django.contrib.auth.signals import user_logged_out
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.signals import request_started
-from django.db.models.signals import post_delete, post_migrate, post_save
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.utils import timezone
 from pinax.forums.models import ForumReply, ThreadSubscription
 from pinax.forums.views import thread_visited
 
+from quality.models import LikelihoodCriterionRules, Quality, UsesCriterion
+from quality.models.criterion.criterion_list import criterions
+from tos.models import Consent
+
 from .models import (
+    Answer,
+    AnswerAnnotation,
+    AnswerChoice,
+    Assignment,
+    AssignmentQuestions,
+    AssignmentQuestionStatistics,
+    BlinkAnswer,
+    BlinkAssignment,
+    BlinkQuestion,
+    BlinkRound,
+    Category,
+    Discipline,
     LastLogout,
     MessageType,
+    Question,
+    QuestionSearchTerm,
+    QuestionStatistics,
+    RationaleOnlyQuestion,
+    RationalePool,
+    ShownRationale,
+    StudentAssignmentResults,
+    StudentGroupAssignment,
     StudentNotificationType,
+    Teacher,
     TeacherNotification,
     UserType,
 )
+from .tasks import (
+    invalidate_reputations_async,
+    refresh_rationale_pools_async,
+    refresh_rationale_scoring_queues_async,
+)
 
 
 @receiver(request_started)
@@ -107,6 +143,16 @@ def update_forum_notifications(sender, user, thread, **kwarsg):
         pass
 
 
+@receiver(post_save, sender=TeacherNotification)
+@receiver(post_delete, sender=TeacherNotification)
+def invalidate_teacher_notifications(sender, instance, **kwargs):
+    TeacherNotification.invalidate(
+        Teacher.objects.filter(pk=instance.teacher_id).values_list(
+            "user", flat=True
+        )
+    )
+
+
 @receiver(user_logged_out)
 def update_last_logout(sender, request, user, **kwargs):
     if user and user.is_authenticated:
@@ -142,3 +188,393 @@ def init_user_types(sender, **kwargs):
     for type_ in types:
         if not UserType.objects.filter(type=type_["type"]).exists():
             UserType.objects.create(**type_)
+
+
+@receiver(post_save, sender=Answer)
+def update_rationale_pool(sender, instance, created, update_fields, **kwargs):
+    if created or instance.has_changed(
+        RationalePool.ELIGIBILITY_FIELDS, update_fields
+    ):
+        refresh_rationale_pools_async([instance.pk])
+    if created:
+        RationalePool.add_vote(instance)
+
+
+@receiver(post_delete, sender=Answer)
+def remove_from_rationale_pool(sender, instance, **kwargs):
+    RationalePool.remove(instance)
+
+
+@receiver(post_save, sender=AnswerAnnotation)
+@receiver(post_delete, sender=AnswerAnnotation)
+def update_rationale_pool_on_annotation(sender, instance, **kwargs):
+    refresh_rationale_pools_async([instance.answer_id])
+
+
+@receiver(post_save, sender=Answer)
+def update_rationale_scoring_queue(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created or instance.has_changed(("chosen_rationale",), update_fields):
+        previous = (
+            None if created else instance.get_previous(("chosen_rationale",))
+        )
+        pks = {
+            instance.chosen_rationale_id,
+            getattr(previous, "chosen_rationale_id", None),
+        } - {None}
+        if pks:
+            refresh_rationale_scoring_queues_async(sorted(pks))
+
+
+@receiver(post_delete, sender=Answer)
+def remove_from_rationale_scoring_queue(sender, instance, **kwargs):
+    if instance.chosen_rationale_id is not None:
+        refresh_rationale_scoring_queues_async(
+            [instance.chosen_rationale_id]
+        )
+
+
+@receiver(post_save, sender=AnswerAnnotation)
+@receiver(post_delete, sender=AnswerAnnotation)
+def update_rationale_scoring_queue_on_annotation(sender, instance, **kwargs):
+    if instance.score is not None:
+        refresh_rationale_scoring_queues_async([instance.answer_id])
+
+
+@receiver(post_save, sender=Consent)
+def update_rationale_pool_on_consent(sender, instance, **kwargs):
+    if instance.tos.role_id == "student":
+        refresh_rationale_pools_async(
+            list(
+                Answer.objects.filter(
+                    user_token=instance.user.username
+                ).values_list("pk", flat=True)
+            )
+        )
+
+
+@receiver(post_save, sender=UsesCriterion)
+@receiver(post_delete, sender=UsesCriterion)
+def reset_rationale_pools_on_criterion(sender, instance, **kwargs):
+    if Quality.objects.filter(
+        pk=instance.quality_id,
+        quality_type__type="global",
+        quality_use_type__type="validation",
+    ).exists():
+        RationalePool.mark_stale()
+
+
+def reset_rationale_pools_on_rules(sender, instance, **kwargs):
+    if _used_by_global_validation(sender, [instance.pk]):
+        RationalePool.mark_stale()
+
+
+def reset_rationale_pools_on_languages(
+    sender, instance, action, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if isinstance(instance, LikelihoodCriterionRules):
+        pks = [instance.pk]
+    elif pk_set is not None:
+        pks = pk_set
+    else:
+        pks = LikelihoodCriterionRules.objects.values_list("pk", flat=True)
+    if _used_by_global_validation(LikelihoodCriterionRules, pks):
+        RationalePool.mark_stale()
+
+
+def _used_by_global_validation(rules_class, pks):
+    return UsesCriterion.objects.filter(
+        name__in=[
+            name
+            for name, criterion in criterions.items()
+            if criterion["rules"] is rules_class
+        ],
+        rules__in=list(pks),
+        quality__quality_type__type="global",
+        quality__quality_use_type__type="validation",
+    ).exists()
+
+
+for criterion in criterions.values():
+    post_save.connect(
+        reset_rationale_pools_on_rules, sender=criterion["rules"]
+    )
+    post_delete.connect(
+        reset_rationale_pools_on_rules, sender=criterion["rules"]
+    )
+
+m2m_changed.connect(
+    reset_rationale_pools_on_languages,
+    sender=LikelihoodCriterionRules.languages.through,
+)
+
+
+@receiver(post_save, sender=Answer)
+def update_student_assignment_results(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created:
+        StudentAssignmentResults.update_answer(instance)
+    else:
+        StudentAssignmentResults.update_modified_answer(
+            instance, update_fields
+        )
+
+
+@receiver(post_delete, sender=Answer)
+def remove_from_student_assignment_results(sender, instance, **kwargs):
+    StudentAssignmentResults.update_answer(instance)
+
+
+def _grading_changed(instance, fields):
+    previous = (
+        type(instance)
+        ._base_manager.filter(pk=instance.pk)
+        .values(*fields)
+        .first()
+    )
+    return previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(pre_save, sender=Question)
+@receiver(pre_save, sender=RationaleOnlyQuestion)
+def check_student_assignment_results_grading(sender, instance, **kwargs):
+    instance._grading_changed = instance.pk is not None and _grading_changed(
+        instance, StudentAssignmentResults.QUESTION_FIELDS
+    )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=RationaleOnlyQuestion)
+def update_student_assignment_results_on_grading(sender, instance, **kwargs):
+    if getattr(instance, "_grading_changed", False):
+        StudentAssignmentResults.refresh_question(instance)
+
+
+@receiver(pre_save, sender=AnswerChoice)
+def check_student_assignment_results_answer_choice(
+    sender, instance, **kwargs
+):
+    instance._grading_changed = instance.pk is not None and _grading_changed(
+        instance, StudentAssignmentResults.ANSWER_CHOICE_FIELDS
+    )
+
+
+@receiver(post_save, sender=AnswerChoice)
+def update_student_assignment_results_on_answer_choice(
+    sender, instance, created, **kwargs
+):
+    # the answer choices are identified by their position
+    if created or getattr(instance, "_grading_changed", False):
+        StudentAssignmentResults.refresh_question(instance.question_id)
+
+
+@receiver(post_delete, sender=AnswerChoice)
+def remove_answer_choice_from_student_assignment_results(
+    sender, instance, **kwargs
+):
+    StudentAssignmentResults.refresh_question(instance.question_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_student_progress(sender, instance, **kwargs):
+    if instance.assignment_id is not None:
+        StudentGroupAssignment.invalidate_progress(
+            StudentGroupAssignment.objects.filter(
+                assignment=instance.assignment_id
+            ).values_list("pk", flat=True)
+        )
+
+
+@receiver(post_save, sender=Answer)
+def update_question_statistics(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created:
+        QuestionStatistics.add_answer(instance)
+    else:
+        QuestionStatistics.update_answer(instance, update_fields)
+
+
+@receiver(post_delete, sender=Answer)
+def remove_from_question_statistics(sender, instance, **kwargs):
+    QuestionStatistics.remove_answer(instance)
+
+
+@receiver(post_save, sender=Answer)
+def update_assignment_question_statistics(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created:
+        AssignmentQuestionStatistics.add_answer(instance)
+    else:
+        AssignmentQuestionStatistics.update_answer(instance, update_fields)
+
+
+@receiver(post_delete, sender=Answer)
+def remove_from_assignment_question_statistics(sender, instance, **kwargs):
+    AssignmentQuestionStatistics.remove_answer(instance)
+
+
+@receiver(post_save, sender=StudentGroupAssignment)
+def update_student_assignment_results_questions(sender, instance, **kwargs):
+    StudentAssignmentResults.update_questions(instance)
+
+
+@receiver(post_save, sender=AssignmentQuestions)
+@receiver(post_delete, sender=AssignmentQuestions)
+def update_student_assignment_results_on_assignment_questions(
+    sender, instance, **kwargs
+):
+    for group_assignment in StudentGroupAssignment.objects.filter(
+        assignment=instance.assignment_id
+    ):
+        StudentAssignmentResults.update_questions(group_assignment)
+
+
+@receiver(m2m_changed, sender=Assignment.questions.through)
+def update_student_assignment_results_on_questions_changed(
+    sender, instance, action, **kwargs
+):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, Assignment
+    ):
+        for group_assignment in instance.studentgroupassignment_set.all():
+            StudentAssignmentResults.update_questions(group_assignment)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=RationaleOnlyQuestion)
+def index_question(sender, instance, **kwargs):
+    QuestionSearchTerm.index([instance])
+
+
+@receiver(post_save, sender=AnswerChoice)
+@receiver(post_delete, sender=AnswerChoice)
+def index_question_on_answer_choice(sender, instance, **kwargs):
+    QuestionSearchTerm.index([instance.question_id])
+
+
+@receiver(m2m_changed, sender=Question.category.through)
+def index_question_on_category_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        if isinstance(instance, Question):
+            QuestionSearchTerm.index([instance])
+        else:
+            QuestionSearchTerm.index(instance.question_set.all())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Discipline)
+def index_questions_on_title_changed(sender, instance, created, **kwargs):
+    if not created:
+        QuestionSearchTerm.index(
+            instance.question_set.values_list("pk", flat=True)
+        )
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_reputations_on_answer(sender, instance, **kwargs):
+    invalidate_reputations_async(
+        usernames=[instance.user_token],
+        answer_pks=[
+            pk for pk in [instance.chosen_rationale_id] if pk is not None
+        ],
+        question_pks=[instance.question_id],
+    )
+
+
+@receiver(post_save, sender=AnswerAnnotation)
+@receiver(post_delete, sender=AnswerAnnotation)
+def invalidate_reputations_on_annotation(sender, instance, **kwargs):
+    invalidate_reputations_async(
+        answer_pks=[instance.answer_id], annotator_pks=[instance.annotator_id]
+    )
+
+
+@receiver(post_save, sender=ShownRationale)
+def invalidate_reputations_on_shown_rationale(sender, instance, **kwargs):
+    if instance.shown_answer_id is not None:
+        invalidate_reputations_async(answer_pks=[instance.shown_answer_id])
+
+
+@receiver(m2m_changed, sender=Teacher.favourite_questions.through)
+def invalidate_reputations_on_favourite(
+    sender, instance, action, pk_set, **kwargs
+):
+    if action in ("post_add", "post_remove"):
+        invalidate_reputations_async(
+            question_pks=list(pk_set)
+            if isinstance(instance, Teacher)
+            else [instance.pk]
+        )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=RationaleOnlyQuestion)
+def invalidate_reputations_on_question(sender, instance, created, **kwargs):
+    if created:
+        invalidate_reputations_async(question_pks=[instance.pk])
+
+
+def _invalidate_blink_current_urls(teachers):
+    BlinkQuestion.invalidate_current_url(
+        teachers.values_list("user__username", flat=True)
+    )
+
+
+def _invalidate_blink_tally(round_pk, question_pk):
+    try:
+        n_choices = len(BlinkQuestion.get_state(question_pk)["labels"])
+    except BlinkQuestion.DoesNotExist:
+        return
+    BlinkRound.invalidate_tally(round_pk, n_choices)
+
+
+@receiver(post_save, sender=BlinkAnswer)
+def add_to_blink_tally(sender, instance, created, **kwargs):
+    if created:
+        BlinkRound.add_to_tally(
+            instance.voting_round_id, instance.answer_choice
+        )
+
+
+@receiver(post_delete, sender=BlinkAnswer)
+def remove_from_blink_tally(sender, instance, **kwargs):
+    _invalidate_blink_tally(instance.voting_round_id, instance.question_id)
+
+
+@receiver(post_save, sender=BlinkQuestion)
+@receiver(post_delete, sender=BlinkQuestion)
+def invalidate_blink_question_state(sender, instance, **kwargs):
+    BlinkQuestion.invalidate_state(instance.pk)
+    _invalidate_blink_current_urls(
+        Teacher.objects.filter(pk=instance.teacher_id)
+    )
+
+
+@receiver(post_save, sender=BlinkRound)
+@receiver(post_delete, sender=BlinkRound)
+def invalidate_blink_round_state(sender, instance, **kwargs):
+    # the tally is read again from the db once the round changes (e.g. is
+    # closed) so the final results don't depend on the cached counts
+    _invalidate_blink_tally(instance.pk, instance.question_id)
+    BlinkQuestion.invalidate_state(instance.question_id)
+    _invalidate_blink_current_urls(
+        Teacher.objects.filter(blinkquestion=instance.question_id)
+    )
+
+
+@receiver(post_save, sender=BlinkAssignment)
+@receiver(post_delete, sender=BlinkAssignment)
+def invalidate_blink_assignment_state(sender, instance, **kwargs):
+    _invalidate_blink_current_urls(
+        Teacher.objects.filter(pk=instance.teacher_id)
+    )
@@ -18,7 +18,9 @@ def update_question_meta_search_difficulty():
     # Prevent circular import
     from peerinst.models import Question, MetaFeature, MetaSearch
 
-    qs = Question.objects.all()
+    qs = Question.objects.select_related("statistics").prefetch_related(
+        "answerchoice_set"
+    )
     difficulty_levels = qs[0].get_matrix().keys()
     for d in difficulty_levels:
         f, created = MetaFeature.objects.get_or_create(
@@ -28,7 +30,7 @@ def update_question_meta_search_difficulty():
             logger.info("New difficulty level created: {}".format(f))
 
     for q in qs:
-        level = max(q.get_matrix().iteritems(), key=operator.itemgetter(1))[0]
+        level = max(q.get_matrix().items(), key=operator.itemgetter(1))[0]
         f = MetaFeature.objects.get(key="difficulty", value=level, type="S")
         s = MetaSearch.objects.create(meta_feature=f, content_object=q)
         q.meta_search.add(s)
@@ -42,7 +44,7 @@ def update_question_meta_search_difficulty():
         )
 
 
-@try_async
+@try_async(policy="queue")
 @shared_task
 def send_mail_async(*args, **kwargs):
     try:
@@ -52,7 +54,7 @@ def send_mail_async(*args, **kwargs):
         logger.error(err)
 
 
-@try_async
+@try_async(policy="queue")
 @shared_task
 def mail_managers_async(*args, **kwargs):
     mail_managers(*args, **kwargs)
@@ -142,7 +144,122 @@ def populate_answer_start_time_from_ltievent_logs_task(
 ):
     from .util import populate_answer_start_time_from_ltievent_logs
 
-    populate_answer_start_time_from_ltievent_logs(day_of_logs, event_type)
+    return populate_answer_start_time_from_ltievent_logs(
+        day_of_logs, event_type
+    )
+
+
+@try_async(policy="queue")
+@shared_task
+def build_rationale_scoring_queues_async(discipline_pks=None):
+    """
+    Rebuilds the rationale scoring queues of the given disciplines, or of all
+    disciplines if None.
+
+    Parameters
+    ----------
+    discipline_pks : Optional[List[int]] (default : None)
+        Primary keys of the disciplines
+    """
+    from peerinst.models import Discipline, RationaleScoringQueue
+
+    if discipline_pks is None:
+        discipline_pks = Discipline.objects.values_list("pk", flat=True)
+    for discipline_pk in discipline_pks:
+        RationaleScoringQueue.build(discipline_pk)
+
+
+@try_async(policy="queue")
+@shared_task
+def refresh_rationale_scoring_queues_async(answer_pks):
+    """
+    Updates the answers in the rationale scoring queues after they were
+    chosen or scored, outside of the request which modified them.
+
+    Parameters
+    ----------
+    answer_pks : List[int]
+        Primary keys of the answers
+    """
+    from peerinst.models import RationaleScoringQueue
+
+    for answer_pk in answer_pks:
+        RationaleScoringQueue.refresh(answer_pk)
+
+
+@try_async(policy="queue")
+@shared_task
+def refresh_rationale_pools_async(answer_pks):
+    """
+    Re-evaluates if the answers should be part of the rationale pools of
+    their questions, outside of the request which modified them.
+
+    Parameters
+    ----------
+    answer_pks : List[int]
+        Primary keys of the answers
+    """
+    from peerinst.models import Answer, RationalePool
+
+    RationalePool.refresh(Answer.objects.filter(pk__in=answer_pks))
+
+
+@try_async(policy="queue")
+@shared_task
+def invalidate_reputations_async(
+    usernames=None, answer_pks=None, question_pks=None, annotator_pks=None
+):
+    """
+    Invalidates the cached reputations depending on the given objects,
+    outside of the request which modified them.
+
+    Parameters
+    ----------
+    usernames : Optional[List[str]] (default : None)
+        Usernames of the students
+    answer_pks : Optional[List[int]] (default : None)
+        Primary keys of answers whose students are invalidated
+    question_pks : Optional[List[int]] (default : None)
+        Primary keys of the questions, whose authors are also invalidated
+    annotator_pks : Optional[List[int]] (default : None)
+        Primary keys of the users of the teachers
+    """
+    from peerinst.models import Answer, Question, Student, Teacher
+    from reputation.models import Reputation
+
+    usernames = list(usernames or [])
+    if answer_pks:
+        usernames.extend(
+            Answer.objects.filter(pk__in=answer_pks).values_list(
+                "user_token", flat=True
+            )
+        )
+
+    reputations = []
+    if usernames:
+        reputations.extend(
+            Student.objects.filter(
+                student__username__in=usernames, reputation__isnull=False
+            ).values_list("reputation", flat=True)
+        )
+    if question_pks:
+        # the question and the teacher who wrote it
+        reputations.extend(
+            pk
+            for pks in Question.objects.filter(
+                pk__in=question_pks
+            ).values_list("reputation", "user__teacher__reputation")
+            for pk in pks
+            if pk is not None
+        )
+    if annotator_pks:
+        reputations.extend(
+            Teacher.objects.filter(
+                user__in=annotator_pks, reputation__isnull=False
+            ).values_list("reputation", flat=True)
+        )
+
+    Reputation.invalidate(reputations)
 
 
 @app.task
@@ -150,3 +267,10 @@ def clean_notifications():
     from .models import StudentNotification
 
     StudentNotification.clean()
+
+
+@app.task
+def clean_stage_states():
+    from .models import StageState
+
+    StageState.clean()
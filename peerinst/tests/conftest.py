@@ -1,6 +1,8 @@
 import pytest
 from django.conf import settings
 
+from quality.models import QualityPlan
+
 from .fixtures import *  # noqa
 
 
@@ -9,6 +11,11 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_quality_plans():
+    QualityPlan.clear()
+
+
 @pytest.fixture(scope="session")
 def celery_config():
     setattr(settings, "CELERY_BROKER_URL", "memory://")
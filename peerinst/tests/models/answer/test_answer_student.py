@@ -0,0 +1,61 @@
+from django.core.management import call_command
+
+from peerinst.models import Answer
+from peerinst.tests.fixtures import *  # noqa
+
+
+def test_student_filter(answers, students):
+    username = students[0].student.username
+    linked = Answer.objects.filter(user_token=username).first()
+    linked.student = students[0]
+    linked.save()
+
+    assert set(Answer.objects.filter(Answer.student_filter([username]))) == {
+        a for a in answers if a.user_token == username
+    }
+
+
+def test_student_filter__linked_only(answers, students):
+    username = students[0].student.username
+    Answer.objects.filter(user_token=username).update(student=students[0])
+
+    filter_ = Answer.student_filter([username])
+
+    assert "user_token" not in str(Answer.objects.filter(filter_).query)
+    assert set(Answer.objects.filter(filter_)) == {
+        a for a in answers if a.user_token == username
+    }
+
+
+def test_student_filter__prefix(answers, students):
+    username = students[0].student.username
+    Answer.objects.filter(user_token=username).update(student=students[0])
+
+    chosen = Answer.objects.filter(user_token=username).first()
+    chosen_by = [a for a in answers if a.user_token != username][:2]
+    for answer in chosen_by:
+        answer.chosen_rationale = chosen
+        answer.save()
+
+    assert set(
+        Answer.objects.filter(
+            Answer.student_filter([username], prefix="chosen_rationale__")
+        )
+    ) == set(chosen_by)
+
+
+def test_populate_answer_student(answers, students, question, assignment):
+    anonymous = Answer.objects.create(
+        question=question,
+        assignment=assignment,
+        first_answer_choice=1,
+        rationale="rationale",
+    )
+
+    call_command("populate_answer_student", "--batch-size", "2")
+
+    for answer in answers:
+        answer.refresh_from_db()
+        assert answer.student.student.username == answer.user_token
+    anonymous.refresh_from_db()
+    assert anonymous.student is None
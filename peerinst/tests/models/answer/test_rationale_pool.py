@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import random
+
+import mock
+import pytest
+
+from peerinst.models import Answer, AnswerAnnotation, RationalePool
+from peerinst.rationale_choice import (
+    RationaleSelectionError,
+    prefer_expert_and_highly_voted,
+    simple,
+)
+from peerinst.tests.fixtures import *  # noqa
+from quality.tests.fixtures import *  # noqa
+from tos.models import Consent
+
+
+def test_build(question, answers):
+    pool = RationalePool.get(question)
+
+    for choice in (1, 2, 3):
+        assert pool.get_rationales(choice) == sorted(
+            a.pk for a in answers if a.first_answer_choice == choice
+        )
+        assert pool.get_rationales(choice, expert=True) == []
+    assert RationalePool.objects.count() == 1
+
+
+def test_build_excludes_not_shown(question, answers, teacher):
+    answers[0].show_to_others = False
+    answers[0].save()
+    AnswerAnnotation.objects.create(
+        answer=answers[1], annotator=teacher.user, score=0
+    )
+
+    pool = RationalePool.get(question)
+    rationales = [
+        pk for choice in pool.rationales for pk in pool.get_rationales(choice)
+    ]
+
+    assert answers[0].pk not in rationales
+    assert answers[1].pk not in rationales
+    assert len(rationales) == len(answers) - 2
+
+
+def test_new_answer_added(question, answers, student):
+    RationalePool.get(question)
+
+    answer = Answer.objects.create(
+        question=question,
+        first_answer_choice=2,
+        rationale="new rationale",
+        user_token=student.student.username,
+    )
+
+    pool = RationalePool.objects.get(question=question)
+    assert answer.pk in pool.get_rationales(2)
+
+
+def test_annotation_updates_pool(question, answers, teacher):
+    RationalePool.get(question)
+
+    annotation = AnswerAnnotation.objects.create(
+        answer=answers[0], annotator=teacher.user, score=0
+    )
+    pool = RationalePool.objects.get(question=question)
+    assert answers[0].pk not in pool.get_rationales(
+        answers[0].first_answer_choice
+    )
+
+    annotation.score = 3
+    annotation.save()
+    pool = RationalePool.objects.get(question=question)
+    assert answers[0].pk in pool.get_rationales(
+        answers[0].first_answer_choice
+    )
+
+
+def test_consent_updates_pool(question, answers, students, tos_student):
+    RationalePool.get(question)
+    removed = [
+        a.pk for a in answers if a.user_token == students[0].student.username
+    ]
+
+    Consent.objects.create(
+        user=students[0].student, tos=tos_student, accepted=False
+    )
+
+    pool = RationalePool.objects.get(question=question)
+    rationales = [
+        pk for choice in pool.rationales for pk in pool.get_rationales(choice)
+    ]
+    assert removed
+    assert not set(removed) & set(rationales)
+
+
+def test_votes(question, answers, student):
+    RationalePool.get(question)
+
+    Answer.objects.create(
+        question=question,
+        first_answer_choice=1,
+        rationale="new rationale",
+        second_answer_choice=2,
+        chosen_rationale=answers[1],
+        user_token=student.student.username,
+    )
+
+    pool = RationalePool.objects.get(question=question)
+    assert pool.votes == {answers[1].pk: 1}
+
+
+def test_vote_doesnt_lock_pool(question, answers, student):
+    RationalePool.get(question)
+
+    with mock.patch.object(RationalePool.objects, "select_for_update") as lock:
+        Answer.objects.create(
+            question=question,
+            first_answer_choice=1,
+            rationale="new rationale",
+            second_answer_choice=2,
+            chosen_rationale=answers[1],
+            user_token=student.student.username,
+        )
+        lock.assert_not_called()
+
+    answer = Answer.objects.filter(chosen_rationale=answers[1]).get()
+    answer.delete()
+
+    assert RationalePool.objects.get(question=question).votes == {}
+
+
+def test_deleted_answer_removed(question, answers):
+    RationalePool.get(question)
+
+    pk = answers[0].pk
+    answers[0].delete()
+
+    pool = RationalePool.objects.get(question=question)
+    assert pk not in pool.get_rationales(1)
+
+
+def test_vote_save_does_not_refresh(question, answers):
+    RationalePool.get(question)
+    answer = Answer.objects.get(pk=answers[0].pk)
+
+    with mock.patch.object(RationalePool, "refresh") as refresh:
+        answer.upvotes += 1
+        answer.save()
+        refresh.assert_not_called()
+
+        answer.show_to_others = False
+        answer.save()
+        refresh.assert_called_once()
+
+
+def test_rules_reset_pools_only_for_global_validation(
+    question, answers, global_validation_quality_with_criteria, neg_words_rules
+):
+    RationalePool.get(question)
+    other_rules = neg_words_rules.__class__.objects.get(pk=neg_words_rules.pk)
+    other_rules.pk = None
+    other_rules.save()
+
+    assert not RationalePool.objects.get(question=question).stale
+
+    neg_words_rules.save()
+
+    assert RationalePool.objects.get(question=question).stale
+    assert not RationalePool.get(question).stale
+
+
+@pytest.mark.parametrize("algorithm", [simple, prefer_expert_and_highly_voted])
+def test_selection_uses_pool(
+    algorithm, question, answers, django_assert_max_num_queries
+):
+    RationalePool.get(question)
+
+    with django_assert_max_num_queries(4):
+        choices = algorithm(random.Random(0), 1, "rationale", question)
+
+    texts = {a.pk: a.rationale for a in answers}
+    assert choices[0][0] == 1
+    assert choices[0][2][-1][0] is None
+    for choice, label, rationales in choices:
+        for pk, text in rationales:
+            if pk is not None:
+                assert texts[pk] == text
+                assert Answer.objects.get(pk=pk).first_answer_choice == choice
+
+
+def test_selection_without_rationales(question, answer_choices):
+    with pytest.raises(RationaleSelectionError):
+        simple(random.Random(0), 1, "rationale", question)
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from peerinst.models import AnswerAnnotation, RationaleScoringQueue
+from peerinst.tests.fixtures import *  # noqa
+from quality.models import Quality
+
+
+@pytest.fixture
+def chosen_answers(question, answers, discipline, teacher):
+    Quality.objects.all().delete()
+    question.discipline = discipline
+    question.save()
+    teacher.disciplines.add(discipline)
+    # answers[i] is chosen 3 - i times
+    for answer, i in zip(answers[3:9], (0, 0, 0, 1, 1, 2)):
+        answer.chosen_rationale = answers[i]
+        answer.save()
+    return answers[:3]
+
+
+def test_build(discipline, chosen_answers):
+    queue = RationaleScoringQueue.build(discipline)
+
+    assert json.loads(queue.candidates) == [
+        [answer.pk, 3 - i, None] for i, answer in enumerate(chosen_answers)
+    ]
+
+
+def test_choose(teacher, discipline, chosen_answers):
+    RationaleScoringQueue.build(discipline)
+    AnswerAnnotation.objects.create(
+        answer=chosen_answers[0], annotator=teacher.user
+    )
+
+    assert RationaleScoringQueue.choose(teacher, n=2) == chosen_answers[1:]
+
+
+def test_choose__builds_missing(teacher, discipline, chosen_answers):
+    RationaleScoringQueue.choose(teacher)
+
+    assert RationaleScoringQueue.objects.filter(
+        discipline=discipline
+    ).exists()
+    assert RationaleScoringQueue.choose(teacher) == chosen_answers
+
+
+def test_chosen_answer_added(answers, discipline, chosen_answers):
+    RationaleScoringQueue.build(discipline)
+
+    for answer in answers[9:11]:
+        answer.chosen_rationale = answers[3]
+        answer.save()
+
+    queue = RationaleScoringQueue.objects.get(discipline=discipline)
+    assert json.loads(queue.candidates) == [
+        [chosen_answers[0].pk, 3, None],
+        [chosen_answers[1].pk, 2, None],
+        [answers[3].pk, 2, None],
+        [chosen_answers[2].pk, 1, None],
+    ]
+
+
+def test_scored_answer_removed(teachers, discipline, chosen_answers):
+    RationaleScoringQueue.build(discipline)
+
+    for teacher in teachers[: RationaleScoringQueue.MAX_SCORES]:
+        AnswerAnnotation.objects.create(
+            answer=chosen_answers[0], annotator=teacher.user, score=2
+        )
+
+    queue = RationaleScoringQueue.objects.get(discipline=discipline)
+    assert [c[0] for c in json.loads(queue.candidates)] == [
+        answer.pk for answer in chosen_answers[1:]
+    ]
@@ -0,0 +1,119 @@
+import mock
+
+from peerinst.models import Answer, AssignmentQuestionStatistics
+from peerinst.tests.fixtures import *  # noqa
+
+
+def _add_second_choices(answers):
+    for i, answer in enumerate(answers):
+        answer.second_answer_choice = i % 4 or None
+        answer.save()
+
+
+def _expected_sums(answers, answer_choices):
+    correct = {i for i, c in enumerate(answer_choices, 1) if c.correct}
+    switched = [
+        a for a in answers if a.second_answer_choice != a.first_answer_choice
+    ]
+    sums = {
+        "total_answers": len(answers),
+        "correct_first_answers": sum(
+            1 for a in answers if a.first_answer_choice in correct
+        ),
+        "correct_second_answers": sum(
+            1 for a in answers if a.second_answer_choice in correct
+        ),
+        "switches": len(switched),
+    }
+    for i in range(1, len(answer_choices) + 1):
+        count = sum(1 for a in switched if a.second_answer_choice == i)
+        if count:
+            sums[("switches", i)] = count
+    return sums
+
+
+def _get(assignment, question):
+    return AssignmentQuestionStatistics.get(assignment, [question])[
+        question.pk
+    ].get_aggregates()
+
+
+def test_get__builds(assignment, question, answer_choices, answers):
+    _add_second_choices(answers)
+
+    sums, students = _get(assignment, question)
+
+    assert dict(sums) == _expected_sums(answers, answer_choices)
+    assert students == {a.user_token for a in answers}
+    assert AssignmentQuestionStatistics.objects.count() == 1
+
+
+def test_new_answer_counted(
+    assignment, question, answer_choices, answers, student
+):
+    _get(assignment, question)
+
+    answer = Answer.objects.create(
+        question=question,
+        assignment=assignment,
+        first_answer_choice=2,
+        rationale="new rationale",
+        second_answer_choice=1,
+        user_token=student.student.username,
+    )
+
+    sums, students = _get(assignment, question)
+    assert dict(sums) == _expected_sums(answers + [answer], answer_choices)
+    assert student.student.username in students
+
+
+def test_deleted_answer_removed(assignment, question, answer_choices, answers):
+    _add_second_choices(answers)
+    _get(assignment, question)
+
+    for answer in Answer.objects.filter(user_token=answers[0].user_token):
+        answer.delete()
+
+    sums, students = _get(assignment, question)
+    remaining = [a for a in answers if a.user_token != answers[0].user_token]
+    assert dict(sums) == _expected_sums(remaining, answer_choices)
+    assert answers[0].user_token not in students
+
+
+def test_modified_answer_moved(assignment, question, answer_choices, answers):
+    _get(assignment, question)
+
+    _add_second_choices(answers)
+
+    sums, students = _get(assignment, question)
+    assert dict(sums) == _expected_sums(answers, answer_choices)
+    assert students == {a.user_token for a in answers}
+
+
+def test_vote_save_not_counted(assignment, question, answer_choices, answers):
+    _get(assignment, question)
+
+    with mock.patch.object(AssignmentQuestionStatistics, "_count") as count:
+        answers[0].upvotes += 1
+        answers[0].save()
+        count.assert_not_called()
+
+        answers[0].second_answer_choice = 2
+        answers[0].save(update_fields=["upvotes"])
+        count.assert_not_called()
+
+
+def test_answers_without_user_ignored(
+    assignment, question, answer_choices, answers
+):
+    _get(assignment, question)
+
+    Answer.objects.create(
+        question=question,
+        assignment=assignment,
+        first_answer_choice=1,
+        rationale="sample rationale",
+    )
+
+    sums, _ = _get(assignment, question)
+    assert sums["total_answers"] == len(answers)
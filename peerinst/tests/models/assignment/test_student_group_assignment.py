@@ -483,6 +483,54 @@ def test_student_progress__all_second_answers_done(
         assert question["n_correct"] == n_second_correct[question_.pk]
 
 
+def test_get_student_progress__cached(
+    questions,
+    students_with_assignment,
+    student_group_assignment,
+    locmem_cache,
+    django_assert_num_queries,
+):
+    add_answers(
+        [
+            {
+                "question": question,
+                "assignment": student_group_assignment.assignment,
+                "user_token": student.student.username,
+                "first_answer_choice": 1,
+                "rationale": "test",
+            }
+            for question in questions
+            for student in students_with_assignment[:2]
+        ]
+    )
+
+    progress = student_group_assignment.get_student_progress(cache_timeout=60)
+    assert progress == student_group_assignment.student_progress
+
+    with django_assert_num_queries(0):
+        assert (
+            student_group_assignment.get_student_progress(cache_timeout=60)
+            == progress
+        )
+
+    add_answers(
+        [
+            {
+                "question": questions[0],
+                "assignment": student_group_assignment.assignment,
+                "user_token": students_with_assignment[2].student.username,
+                "first_answer_choice": 1,
+                "rationale": "test",
+            }
+        ]
+    )
+    progress = student_group_assignment.get_student_progress(cache_timeout=60)
+    assert progress == student_group_assignment.student_progress
+    assert sum(question["n_first_correct"] for question in progress) == (
+        2 * len(questions) + 1
+    )
+
+
 def test_student_progress__all_answers_correct_no_questions_all_answers_correct_done(  # noqa
     questions_all_answers_correct,
     students_with_assignment_all_answers_correct,
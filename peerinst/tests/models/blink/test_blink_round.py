@@ -0,0 +1,111 @@
+import mock
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from peerinst.models import BlinkAnswer, BlinkQuestion, BlinkRound
+from peerinst.tests.fixtures import *  # noqa
+
+pytestmark = pytest.mark.usefixtures("locmem_cache")
+
+
+@pytest.fixture
+def blink_round(question, answer_choices, teacher):
+    blink_question = BlinkQuestion.objects.create(
+        question=question, teacher=teacher, key="1", active=True
+    )
+    return BlinkRound.objects.create(
+        question=blink_question, activate_time=timezone.now()
+    )
+
+
+def vote(blink_round, answer_choice):
+    return BlinkAnswer.objects.create(
+        question=blink_round.question,
+        answer_choice=answer_choice,
+        vote_time=timezone.now(),
+        voting_round=blink_round,
+    )
+
+
+def test_get_state(blink_round):
+    state = BlinkQuestion.get_state(blink_round.question.pk)
+
+    assert state["active"]
+    assert state["open_round"] == blink_round.pk
+    assert state["latest_round"] == blink_round.pk
+    assert state["labels"] == ["A", "B", "C"]
+
+
+def test_get_state__invalidated_on_close(blink_round):
+    BlinkQuestion.get_state(blink_round.question.pk)
+
+    blink_round.deactivate_time = timezone.now()
+    blink_round.save()
+
+    state = BlinkQuestion.get_state(blink_round.question.pk)
+    assert state["open_round"] is None
+
+
+def test_get_tally(blink_round, django_assert_num_queries):
+    vote(blink_round, 1)
+    vote(blink_round, 1)
+    vote(blink_round, 3)
+
+    assert BlinkRound.get_tally(blink_round.pk, 3) == [2, 0, 1]
+
+    vote(blink_round, 2)
+    with django_assert_num_queries(0):
+        assert BlinkRound.get_tally(blink_round.pk, 3) == [2, 1, 1]
+
+
+def test_get_tally__deleted_answer(blink_round):
+    answer = vote(blink_round, 1)
+    BlinkRound.get_tally(blink_round.pk, 3)
+
+    answer.delete()
+
+    assert BlinkRound.get_tally(blink_round.pk, 3) == [0, 0, 0]
+
+
+def test_add_to_tally__seeded_concurrently(blink_round):
+    vote(blink_round, 1)
+    key = BlinkRound._tally_key(blink_round.pk, 1)
+    # a concurrent read seeded a count without the vote
+    cache.set(key, 0)
+
+    with mock.patch(
+        "peerinst.models.blink.cache.incr", side_effect=ValueError
+    ):
+        BlinkRound.add_to_tally(blink_round.pk, 1)
+
+    assert cache.get(key) is None
+    assert BlinkRound.get_tally(blink_round.pk, 3) == [1, 0, 0]
+
+
+def test_blink_updates(client, blink_round, settings):
+    settings.BLINK_POLL_TIMEOUT = 0
+    url = reverse("blink-updates", kwargs={"pk": blink_round.question.pk})
+
+    resp = client.get(url)
+    assert resp.json() == {"count": 0, "status": True, "version": "0-1"}
+
+    resp = client.get(url, {"version": "0-1"})
+    assert resp.status_code == 304
+    assert resp["ETag"] == '"0-1"'
+
+    vote(blink_round, 2)
+
+    resp = client.get(url, {"version": "0-1"})
+    assert resp.json() == {"count": 1, "status": True, "version": "1-1"}
+
+
+def test_blink_latest_results(client, blink_round):
+    vote(blink_round, 2)
+
+    resp = client.get(
+        reverse("blink-results", kwargs={"pk": blink_round.question.pk})
+    )
+
+    assert resp.json() == {"A": 0, "B": 1, "C": 0}
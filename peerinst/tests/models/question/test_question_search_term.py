@@ -0,0 +1,79 @@
+from peerinst.models import (
+    AnswerChoice,
+    Question,
+    QuestionSearchTerm,
+    tokenize,
+)
+from peerinst.tests.fixtures import *  # noqa
+
+
+def test_tokenize():
+    assert tokenize("<p>The <b>Force</b> &amp; the mass</p>") == [
+        "force",
+        "mass",
+    ]
+    assert tokenize("the", remove_stopwords=False) == ["the"]
+
+
+def test_index__on_save(teacher):
+    question = Question.objects.create(
+        title="Newton", text="<p>Force and acceleration</p>", user=teacher.user
+    )
+
+    terms = dict(
+        QuestionSearchTerm.objects.filter(question=question).values_list(
+            "term", "weight"
+        )
+    )
+    assert terms["newton"] == QuestionSearchTerm.WEIGHTS["title"]
+    assert terms["force"] == QuestionSearchTerm.WEIGHTS["text"]
+    assert "and" not in terms
+
+
+def test_index__on_answer_choice(question):
+    AnswerChoice.objects.create(
+        question=question, text="Pendulum", correct=True
+    )
+
+    assert QuestionSearchTerm.objects.filter(
+        question=question, term="pendulum"
+    ).exists()
+
+
+def test_search__ranking(teacher):
+    in_text = Question.objects.create(
+        title="First", text="Energy is conserved", user=teacher.user
+    )
+    in_title = Question.objects.create(
+        title="Energy", text="What is conserved?", user=teacher.user
+    )
+    Question.objects.create(title="Other", text="Momentum", user=teacher.user)
+
+    assert list(QuestionSearchTerm.search("energy")) == [in_title, in_text]
+    assert set(QuestionSearchTerm.search("conserv")) == {in_title, in_text}
+
+
+def test_search__queryset(teacher):
+    first = Question.objects.create(title="Energy", text="", user=teacher.user)
+    second = Question.objects.create(
+        title="Energy", text="", user=teacher.user
+    )
+
+    assert list(
+        QuestionSearchTerm.search(
+            "energy", Question.objects.exclude(pk=first.pk)
+        )
+    ) == [second]
+
+
+def test_search__indexes_missing_questions(teacher, locmem_cache):
+    question = Question.objects.create(
+        title="Energy", text="", user=teacher.user
+    )
+    QuestionSearchTerm.objects.all().delete()
+
+    assert list(QuestionSearchTerm.search("energy")) == [question]
+    assert QuestionSearchTerm.objects.filter(question=question).exists()
+
+    QuestionSearchTerm.objects.all().delete()
+    assert not QuestionSearchTerm.search("energy").exists()
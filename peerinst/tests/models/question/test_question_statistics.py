@@ -0,0 +1,124 @@
+import mock
+
+from peerinst.models import Answer, Question, QuestionStatistics
+from peerinst.tests.fixtures import *  # noqa
+
+
+def _add_second_choices(answers):
+    for i, answer in enumerate(answers):
+        answer.second_answer_choice = i % 3 + 1
+        answer.save()
+
+
+def _expected_matrix(answers):
+    answers = [
+        a
+        for a in answers
+        if not a.expert and a.user_token and a.second_answer_choice
+    ]
+    return {
+        level: float(
+            sum(
+                1
+                for a in answers
+                if (a.first_answer_choice == 1) == first
+                and (a.second_answer_choice == 1) == second
+            )
+        )
+        / len(answers)
+        for level, first, second in (
+            ("easy", True, True),
+            ("hard", False, False),
+            ("tricky", True, False),
+            ("peer", False, True),
+        )
+    }
+
+
+def test_get__builds(question, answer_choices, answers):
+    _add_second_choices(answers)
+
+    statistics = QuestionStatistics.get([question])[question.pk]
+
+    assert statistics.answer_count == len(answers)
+    assert statistics.get_matrix() == _expected_matrix(answers)
+    frequency = statistics.get_frequency()
+    for i, label in enumerate(sorted(frequency["first_choice"]), 1):
+        assert label.startswith("{}. choice{}".format(i, i))
+        assert frequency["first_choice"][label] == sum(
+            1 for a in answers if a.first_answer_choice == i
+        )
+        assert frequency["second_choice"][label] == sum(
+            1 for a in answers if a.second_answer_choice == i
+        )
+    assert QuestionStatistics.objects.count() == 1
+
+
+def test_new_answer_counted(question, answer_choices, answers, student):
+    QuestionStatistics.get([question])
+
+    Answer.objects.create(
+        question=question,
+        first_answer_choice=2,
+        rationale="new rationale",
+        second_answer_choice=1,
+        user_token=student.student.username,
+    )
+
+    statistics = QuestionStatistics.objects.get(question=question)
+    rebuilt = QuestionStatistics.build([question])[question.pk]
+    assert statistics.answer_count == len(answers) + 1
+    assert statistics.get_matrix() == rebuilt.get_matrix()
+    assert statistics.get_frequency() == rebuilt.get_frequency()
+
+
+def test_deleted_answer_removed(question, answer_choices, answers):
+    _add_second_choices(answers)
+    QuestionStatistics.get([question])
+
+    answers[0].delete()
+
+    statistics = QuestionStatistics.objects.get(question=question)
+    assert statistics.answer_count == len(answers) - 1
+    assert statistics.get_matrix() == _expected_matrix(answers[1:])
+
+
+def test_modified_answer_moved(question, answer_choices, answers):
+    QuestionStatistics.get([question])
+
+    _add_second_choices(answers)
+
+    statistics = QuestionStatistics.objects.get(question=question)
+    rebuilt = QuestionStatistics.build([question])[question.pk]
+    assert statistics.answer_count == len(answers)
+    assert statistics.get_matrix() == rebuilt.get_matrix()
+    assert statistics.get_frequency() == rebuilt.get_frequency()
+
+
+def test_vote_save_not_counted(question, answer_choices, answers):
+    QuestionStatistics.get([question])
+
+    with mock.patch.object(QuestionStatistics, "_count") as count:
+        answers[0].upvotes += 1
+        answers[0].save()
+        count.assert_not_called()
+
+        answers[0].rationale = "modified rationale"
+        answers[0].save(update_fields=["rationale"])
+        count.assert_not_called()
+
+
+def test_question_uses_selected_statistics(
+    question, answer_choices, answers, django_assert_num_queries
+):
+    QuestionStatistics.get([question])
+    question = (
+        Question.objects.select_related("statistics")
+        .prefetch_related("answerchoice_set")
+        .get(pk=question.pk)
+    )
+
+    with django_assert_num_queries(0):
+        question.get_matrix()
+        question.get_frequency()
+        question.get_frequency(all_rationales=True)
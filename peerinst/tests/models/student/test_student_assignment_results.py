@@ -0,0 +1,191 @@
+import mock
+from django.core.management import call_command
+
+from peerinst.models import (
+    Answer,
+    AnswerChoice,
+    GradingScheme,
+    StudentAssignmentResults,
+)
+from peerinst.tests.generators import add_answers
+
+from .fixtures import *  # noqa F403
+
+
+def answer_questions(student_assignment, n, second=True):
+    assignment = student_assignment.group_assignment.assignment
+    return add_answers(
+        [
+            {
+                "question": question,
+                "assignment": assignment,
+                "user_token": student_assignment.student.student.username,
+                "first_answer_choice": 1 + i % 2,
+                "rationale": "test",
+                "second_answer_choice": 1 if second else None,
+            }
+            for i, question in enumerate(
+                student_assignment.group_assignment.questions[:n]
+            )
+        ]
+    )
+
+
+def test_get__builds_results(student_assignment):
+    answer_questions(student_assignment, 4)
+
+    results = StudentAssignmentResults.get([student_assignment])[
+        student_assignment.pk
+    ]
+
+    assert results.detailed_results == student_assignment.detailed_results
+    assert results.aggregated_results == student_assignment.results
+    assert results.completed == student_assignment.completed
+    assert StudentAssignmentResults.objects.count() == 1
+
+
+def test_update_answer(student_assignment):
+    StudentAssignmentResults.get([student_assignment])
+
+    answers = answer_questions(student_assignment, 3, second=False)
+    answers[0].second_answer_choice = 1
+    answers[0].save()
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+
+    answers[1].delete()
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+
+
+def test_completed__latest_answer(student_assignment):
+    answers = answer_questions(student_assignment, 100, second=False)
+    for answer in answers:
+        answer.pk = None
+        answer.second_answer_choice = 1
+        answer.save()
+
+    results = StudentAssignmentResults.get([student_assignment])[
+        student_assignment.pk
+    ]
+    assert results.completed
+    assert results.completed == student_assignment.completed
+    assert results.detailed_results == student_assignment.detailed_results
+
+
+def test_update_answer__student_key(student_assignment):
+    StudentAssignmentResults.get([student_assignment])
+
+    answers = answer_questions(student_assignment, 2)
+    answers[0].user_token = ""
+    answers[0].student = student_assignment.student
+    answers[0].save()
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+    assert results.detailed_results[0]["completed"]
+
+
+def test_update_answer__vote_save(student_assignment):
+    answers = answer_questions(student_assignment, 2)
+    StudentAssignmentResults.get([student_assignment])
+
+    with mock.patch.object(
+        StudentAssignmentResults, "update_answer"
+    ) as update_answer:
+        answers[0].upvotes += 1
+        answers[0].save()
+        update_answer.assert_not_called()
+
+        answers[0].second_answer_choice = 2
+        answers[0].save()
+        update_answer.assert_called_once_with(answers[0])
+
+
+def test_refresh_on_correct_answer_choice(student_assignment):
+    answer_questions(student_assignment, 4)
+    StudentAssignmentResults.get([student_assignment])
+
+    question = student_assignment.group_assignment.questions[0]
+    for answer_choice in AnswerChoice.objects.filter(question=question):
+        answer_choice.correct = not answer_choice.correct
+        answer_choice.save()
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+
+    AnswerChoice.objects.create(question=question, text="new", correct=True)
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+
+
+def test_refresh_on_grading_scheme(student_assignment):
+    answer_questions(student_assignment, 4)
+    StudentAssignmentResults.get([student_assignment])
+
+    for question in student_assignment.group_assignment.questions[:4]:
+        question.grading_scheme = GradingScheme.ADVANCED
+        question.save()
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+    assert results.detailed_results[1]["grade"] == 0.5
+
+
+def test_update_questions(student_assignment):
+    answer_questions(student_assignment, 2)
+    StudentAssignmentResults.get([student_assignment])
+
+    group_assignment = student_assignment.group_assignment
+    n = len(group_assignment.questions)
+    group_assignment.order = ",".join(map(str, reversed(range(n))))
+    group_assignment.save()
+
+    results = StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    )
+    assert results.detailed_results == student_assignment.detailed_results
+    assert not results.detailed_results[0]["completed"]
+    assert results.detailed_results[-1]["completed"]
+
+
+def test_rebuild_command(student_assignment):
+    StudentAssignmentResults.get([student_assignment])
+    Answer.objects.bulk_create(
+        [
+            Answer(
+                question=question,
+                assignment=student_assignment.group_assignment.assignment,
+                user_token=student_assignment.student.student.username,
+                first_answer_choice=1,
+                second_answer_choice=1,
+                rationale="test",
+            )
+            for question in student_assignment.group_assignment.questions
+        ]
+    )
+
+    assert not StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    ).completed
+
+    call_command("rebuild_student_assignment_results")
+
+    assert StudentAssignmentResults.objects.get(
+        student_assignment=student_assignment
+    ).completed
@@ -0,0 +1,86 @@
+import json
+
+import mock
+import pytest
+
+from peerinst import events
+from peerinst.models import LtiEvent
+
+
+def new_event(i, event_type="problem_show"):
+    return {
+        "event_type": event_type,
+        "username": "student{}".format(i),
+        "event": {"assignment_id": "assignment", "question_id": i},
+    }
+
+
+@pytest.fixture
+def buffer(settings):
+    settings.EVENT_BUFFER_INTERVAL = 60
+    settings.EVENT_BUFFER_SIZE = 100
+    buffer = events.EventBuffer()
+    with mock.patch.object(buffer, "_start"):
+        yield buffer
+
+
+def test_emit__direct(settings):
+    settings.EVENT_SINKS = ("log", "lti_event")
+    settings.EVENT_BUFFER_INTERVAL = 0
+
+    with mock.patch("peerinst.events.events_logger") as logger:
+        events.emit(new_event(1))
+
+        assert json.loads(logger.info.call_args[0][0]) == new_event(1)
+    assert LtiEvent.objects.get().username == "student1"
+
+
+def test_emit__buffered(settings, buffer):
+    settings.EVENT_SINKS = ("lti_event",)
+
+    for i in range(3):
+        buffer.emit(new_event(i))
+
+    assert not LtiEvent.objects.exists()
+
+    buffer.flush()
+
+    assert sorted(LtiEvent.objects.values_list("question_id", flat=True)) == [
+        0,
+        1,
+        2,
+    ]
+    assert LtiEvent.objects.filter(assignment_id="assignment").count() == 3
+
+
+def test_emit__wakes_when_full(settings, buffer):
+    settings.EVENT_BUFFER_SIZE = 2
+
+    buffer.emit(new_event(1))
+    assert not buffer._wake.is_set()
+
+    buffer.emit(new_event(2))
+    assert buffer._wake.is_set()
+
+
+def test_write_events__sink_error(settings):
+    settings.EVENT_SINKS = ("peerinst.tests.test_events.failing_sink", "log")
+
+    with mock.patch("peerinst.events.events_logger") as logger:
+        events.write_events([new_event(1), new_event(2)])
+
+        assert logger.info.call_count == 2
+
+
+def test_reset(buffer):
+    buffer.emit(new_event(1))
+
+    buffer.reset()
+
+    with mock.patch("peerinst.events.write_events") as write_events:
+        buffer.flush()
+        write_events.assert_not_called()
+
+
+def failing_sink(events):
+    raise IOError
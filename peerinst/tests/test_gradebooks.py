@@ -1,6 +1,7 @@
 import pytest
 
 from peerinst.gradebooks import compute_gradebook, convert_gradebook_to_csv
+from peerinst.models import StudentAssignment
 from peerinst.tests.fixtures import *  # noqa
 from peerinst.tests.fixtures.question import add_answers
 
@@ -242,6 +243,43 @@ def test_compute_gradebook__assignment__all_correct(
             assert question == 1
 
 
+def test_compute_gradebook__group__same_as_student_assignments(
+    group,
+    students,
+    student_group_assignments,
+    student_assignments,
+    django_assert_max_num_queries,
+):
+    for i, assignment in enumerate(student_group_assignments):
+        for j, assignment_ in enumerate(
+            assignment.studentassignment_set.all()
+        ):
+            if (i + j) % 3:
+                add_answers(
+                    student=assignment_.student,
+                    questions=assignment.questions,
+                    assignment=assignment.assignment,
+                    correct_first=bool(j % 2),
+                    correct_second=bool(i % 2),
+                )
+
+    with django_assert_max_num_queries(8):
+        gradebook = compute_gradebook(group.pk)
+
+    for student in gradebook["results"]:
+        for identifier, assignment in zip(
+            gradebook["assignments"], student["assignments"]
+        ):
+            results = StudentAssignment.objects.get(
+                student__student__email=student["email"],
+                group_assignment__assignment__identifier=identifier,
+            ).results
+            assert assignment == {
+                "n_completed": results["n_completed"],
+                "grade": results["grade"],
+            }
+
+
 def test_convert_gradebook_to_csv__group():
     n_assignments = 5
     n_students = 50
@@ -7,9 +7,10 @@ from django.test import TestCase
 
 from dalite.views import admin_index_wrapper
 from peerinst.auth import get_student_username_and_password
-from peerinst.lti import ApplicationHookManager
-from peerinst.models import Student
+from peerinst.lti import ApplicationHookManager, sync_lti_membership
+from peerinst.models import Student, StudentGroup
 from peerinst.students import get_student_username_and_password
+from peerinst.tests.fixtures import *  # noqa
 
 
 @ddt.ddt
@@ -315,3 +316,35 @@ class TestViews(TestCase):
             "not seem to accept third-party cookies or your session has "
             "expired",
         )
+
+
+def test_sync_lti_membership(
+    student, teacher, locmem_cache, django_assert_num_queries
+):
+    sync_lti_membership(
+        student.student, "course", "Course", teacher_hash=teacher.hash
+    )
+
+    group = StudentGroup.objects.get(name="course")
+    assert group.title == "Course"
+    assert group in student.groups.all()
+    assert teacher in group.teacher.all()
+    assert group in teacher.current_groups.all()
+
+    with django_assert_num_queries(0):
+        sync_lti_membership(
+            student.student, "course", "Course", teacher_hash=teacher.hash
+        )
+
+
+def test_sync_lti_membership__existing_group(
+    student, teacher, group, locmem_cache
+):
+    group.teacher.add(teacher)
+
+    sync_lti_membership(student.student, group.name, teacher_hash=teacher.hash)
+
+    # the teacher was already in the group so nothing was changed
+    assert group not in teacher.current_groups.all()
+    assert StudentGroup.objects.filter(name=group.name).count() == 1
+    assert group in student.groups.all()
@@ -0,0 +1,73 @@
+import mock
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from pinax.forums.models import ThreadSubscription
+
+from peerinst.middleware import NotificationMiddleware
+from peerinst.models import TeacherNotification
+from peerinst.tests.fixtures import *  # noqa
+
+pytestmark = pytest.mark.usefixtures("locmem_cache")
+
+
+def new_request(user):
+    request = mock.Mock()
+    request.user = user
+    request.session = {}
+    return request
+
+
+def add_notification(teacher, object_id):
+    return TeacherNotification.objects.create(
+        teacher=teacher,
+        notification_type=ContentType.objects.get_for_model(
+            ThreadSubscription
+        ),
+        object_id=object_id,
+    )
+
+
+def test_version__changes_with_notifications(teacher):
+    version = TeacherNotification.get_version(teacher.user)
+    assert TeacherNotification.get_version(teacher.user) == version
+
+    notification = add_notification(teacher, 1)
+    new_version = TeacherNotification.get_version(teacher.user)
+    assert new_version != version
+
+    notification.delete()
+    assert TeacherNotification.get_version(teacher.user) != new_version
+
+
+def test_middleware__reads_only_on_new_version(
+    teacher, django_assert_num_queries
+):
+    middleware = NotificationMiddleware(lambda request: None)
+    request = new_request(teacher.user)
+    add_notification(teacher, 1)
+
+    middleware(request)
+    assert request.session["forum_notifications"] == [1]
+
+    with django_assert_num_queries(0):
+        middleware(request)
+
+    add_notification(teacher, 2)
+    middleware(request)
+    assert sorted(request.session["forum_notifications"]) == [1, 2]
+
+
+def test_middleware__reads_without_version(teacher):
+    middleware = NotificationMiddleware(lambda request: None)
+    request = new_request(teacher.user)
+    add_notification(teacher, 1)
+
+    with mock.patch.object(
+        TeacherNotification, "get_version", return_value=None
+    ):
+        middleware(request)
+        assert request.session["forum_notifications"] == [1]
+
+        add_notification(teacher, 2)
+        middleware(request)
+        assert sorted(request.session["forum_notifications"]) == [1, 2]
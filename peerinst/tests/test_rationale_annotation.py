@@ -5,7 +5,10 @@ import mock
 import pytest
 
 from peerinst.models import AnswerAnnotation
-from peerinst.rationale_annotation import choose_rationales
+from peerinst.rationale_annotation import (
+    choose_rationales,
+    choose_rationales_to_score,
+)
 from peerinst.tests.fixtures import *  # noqa
 from quality.models import Quality
 from quality.tests.fixtures import *  # noqa
@@ -116,3 +119,18 @@ def test_choose_rationales__different_discipline(
 
         for a, a_ in zip(chosen, answers[::2][::-1]):
             assert a == a_
+
+
+def test_choose_rationales_to_score__own_students_fallback(
+    teacher, answers, discipline
+):
+    teacher.disciplines.add(discipline)
+
+    with mock.patch(
+        "peerinst.rationale_annotation.RationaleScoringQueue.choose",
+        return_value=answers[:1],
+    ), mock.patch(
+        "peerinst.rationale_annotation.choose_rationales_no_quality",
+        return_value=answers[:3],
+    ):
+        assert choose_rationales_to_score(teacher, n=3) == answers[:3]
@@ -0,0 +1,52 @@
+from peerinst.tests.fixtures import *  # noqa
+from peerinst.tests.fixtures.question.utils import add_answers
+from peerinst.util import get_student_activity_data
+
+
+def test_get_student_activity_data(
+    teacher, group, students, student_group_assignments
+):
+    teacher.current_groups.add(group)
+    for student in students:
+        student.groups.add(group)
+    group_assignment = student_group_assignments[0]
+    questions = list(group_assignment.assignment.questions.all())
+    add_answers(students[0], questions, group_assignment.assignment)
+
+    data, json_data = get_student_activity_data(teacher)
+
+    activity = data[group][group_assignment]
+    assert len(activity["answers"]) == len(questions)
+    assert len(activity["new"]) == len(questions)
+    assert activity["percent_complete"] == int(100.0 / len(students))
+    for group_assignment_ in student_group_assignments[1:]:
+        assert data[group][group_assignment_]["answers"] == []
+
+    progress = json_data[group.name][group_assignment.assignment.identifier]
+    assert progress["total"] == len(students) * len(questions)
+    assert len(progress["answers"]) == len(questions)
+    assert set(json_data[group.name]) == {
+        group_assignment.assignment.identifier
+    }
+
+
+def test_get_student_activity_data__bounded_queries(
+    teacher,
+    group,
+    students,
+    student_group_assignments,
+    django_assert_max_num_queries,
+):
+    teacher.current_groups.add(group)
+    for student in students:
+        student.groups.add(group)
+    for group_assignment in student_group_assignments:
+        for student in students:
+            add_answers(
+                student,
+                group_assignment.assignment.questions.all(),
+                group_assignment.assignment,
+            )
+
+    with django_assert_max_num_queries(10):
+        get_student_activity_data(teacher)
@@ -0,0 +1,97 @@
+import csv
+import datetime
+
+import pytest
+from django.urls import reverse
+
+from peerinst.models import LtiEvent
+from peerinst.tests.fixtures import *  # noqa
+from peerinst.util import (
+    LTI_EVENT_COLUMNS,
+    LTI_EVENT_LOG_COLUMNS,
+    filter_ltievents,
+    iter_ltievents,
+    iter_ltievents_csv,
+    serialize_events_to_dataframe,
+)
+
+
+def new_event(username, question_id=1):
+    return LtiEvent.objects.create(
+        event_type="problem_check",
+        username=None,
+        event_log={
+            "username": username,
+            "course_id": "course",
+            "event": {"question_id": question_id, "first_answer_choice": 1},
+        },
+    )
+
+
+@pytest.fixture
+def events():
+    return [
+        new_event("alice", 1),
+        new_event("bob", 2),
+        new_event("alice", 3),
+        new_event("alice_bob", 4),
+    ]
+
+
+@pytest.fixture
+def start():
+    return datetime.datetime.now() - datetime.timedelta(days=1)
+
+
+def test_iter_ltievents(start, events):
+    assert list(iter_ltievents(start, chunk_size=2)) == events
+
+
+def test_iter_ltievents__username(start, events):
+    LtiEvent.objects.create(event_type="problem_check", event_log="alice")
+
+    assert list(iter_ltievents(start, username="alice", chunk_size=1)) == [
+        events[0],
+        events[2],
+    ]
+
+
+def test_filter_ltievents__username(start, events):
+    rejected, filtered = filter_ltievents(start, username="bob")
+
+    assert list(filtered) == [events[1]]
+    assert list(rejected) == []
+
+
+def test_iter_ltievents_csv(start, events):
+    rows = list(csv.reader(iter_ltievents_csv(iter_ltievents(start))))
+
+    assert rows[0] == LTI_EVENT_COLUMNS + LTI_EVENT_LOG_COLUMNS
+    assert len(rows) == len(events) + 1
+    row = dict(zip(rows[0], rows[1]))
+    assert row["username"] == "alice"
+    assert row["question_id"] == "1"
+    assert row["first_answer_choice"] == "1"
+
+
+def test_serialize_events_to_dataframe(start, events):
+    df = serialize_events_to_dataframe(iter_ltievents(start))
+
+    assert list(df.columns) == LTI_EVENT_COLUMNS + LTI_EVENT_LOG_COLUMNS
+    assert list(df["question_id"]) == [1, 2, 3, 4]
+
+
+def test_lti_events_export(client, staff, start, events):
+    client.force_login(staff)
+    url = reverse("lti-events-export")
+
+    resp = client.get(
+        url, {"start": start.date().isoformat(), "username": "bob"}
+    )
+    content = b"".join(resp.streaming_content).decode()
+    rows = list(csv.reader(content.splitlines()))
+    assert rows[1][0] == "bob"
+    assert len(rows) == 2
+
+    resp = client.get(url, {"start": "yesterday"})
+    assert resp.status_code == 400
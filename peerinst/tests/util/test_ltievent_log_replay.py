@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from peerinst.models import Answer, LtiEvent, ShownRationale
+from peerinst.tests.fixtures import *  # noqa
+from peerinst.util import (
+    load_shown_rationales_from_ltievent_logs,
+    populate_answer_start_time_from_ltievent_logs,
+)
+
+
+@pytest.fixture
+def student_answers(students, question, assignment):
+    return [
+        Answer.objects.create(
+            question=question,
+            assignment=assignment,
+            first_answer_choice=1,
+            rationale="rationale",
+            user_token=student.student.username,
+        )
+        for student in students
+    ]
+
+
+@pytest.fixture
+def day_of_logs():
+    return timezone.now() - datetime.timedelta(hours=1)
+
+
+def new_event(answer, event_type, timestamp=None, **event):
+    event.update(
+        question_id=answer.question.pk,
+        assignment_id=answer.assignment.pk,
+    )
+    e = LtiEvent.objects.create(
+        event_type=event_type,
+        event_log={
+            "event_type": event_type,
+            "username": answer.user_token,
+            "event": event,
+        },
+    )
+    if timestamp is not None:
+        LtiEvent.objects.filter(pk=e.pk).update(timestamp=timestamp)
+    return e
+
+
+def test_load_shown_rationales(
+    student_answers, day_of_logs, django_assert_max_num_queries
+):
+    shown = student_answers[1:3]
+    for answer in student_answers[:2]:
+        new_event(
+            answer,
+            "save_problem_success",
+            rationales=[{"id": a.pk} for a in shown] + [{"id": 0}],
+        )
+    new_event(student_answers[2], "save_problem_success")
+    ShownRationale.objects.create(
+        shown_for_answer=student_answers[0], shown_answer=shown[0]
+    )
+
+    with django_assert_max_num_queries(10):
+        assert load_shown_rationales_from_ltievent_logs(day_of_logs) == 3
+
+    for answer in student_answers[:2]:
+        assert sorted(
+            ShownRationale.objects.filter(
+                shown_for_answer=answer
+            ).values_list("shown_answer", flat=True)
+        ) == [a.pk for a in shown]
+
+    assert load_shown_rationales_from_ltievent_logs(day_of_logs) == 0
+
+
+def test_populate_answer_start_time(student_answers, day_of_logs):
+    now = timezone.now()
+    early, late = now - datetime.timedelta(minutes=5), now
+    for answer in student_answers[:2]:
+        new_event(answer, "problem_show", timestamp=early)
+        new_event(answer, "problem_show", timestamp=late)
+        new_event(answer, "problem_check", timestamp=early)
+        new_event(answer, "problem_check", timestamp=late, rationales=[])
+
+    assert (
+        populate_answer_start_time_from_ltievent_logs(
+            day_of_logs, "problem_show"
+        )
+        == 2
+    )
+    assert (
+        populate_answer_start_time_from_ltievent_logs(
+            day_of_logs, "problem_check"
+        )
+        == 2
+    )
+
+    for answer in student_answers[:2]:
+        answer.refresh_from_db()
+        assert answer.datetime_start == late
+        assert answer.datetime_first == early
+    for answer in student_answers[2:]:
+        answer.refresh_from_db()
+        assert answer.datetime_start is None
+
+    assert (
+        populate_answer_start_time_from_ltievent_logs(
+            day_of_logs, "problem_show"
+        )
+        == 0
+    )
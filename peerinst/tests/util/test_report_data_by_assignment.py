@@ -1,6 +1,8 @@
 import pytest
 
+from peerinst.models import AnswerAnnotation
 from peerinst.tests.fixtures import *  # noqa
+from peerinst.tests.generators import add_assignments, new_assignments
 from peerinst.util import report_data_by_assignment
 
 from .fixtures import *  # noqa F403
@@ -58,3 +60,115 @@ def test_report_data_by_assignment_no_answers(assignments, groups, teacher):
             ):
                 assert choice["label"] == label
                 assert choice["data"] == []
+
+
+@pytest.mark.django_db
+def test_report_data_by_assignment_with_answers(
+    assignment,
+    question,
+    group,
+    students,
+    answers,
+    teacher,
+    django_assert_max_num_queries,
+):
+    assignment.questions.add(question)
+    for student in students:
+        student.groups.add(group)
+    for answer in answers:
+        answer.second_answer_choice = 1
+        answer.save()
+    annotation = AnswerAnnotation.objects.create(
+        answer=answers[0], annotator=teacher.user, score=2
+    )
+
+    with django_assert_max_num_queries(8):
+        report = report_data_by_assignment(
+            [assignment.identifier], [group.pk], teacher
+        )
+
+    question_ = next(
+        q for q in report[0]["questions"] if q["title"] == question.title
+    )
+    n = len(answers)
+    n_first = len([a for a in answers if a.first_answer_choice == 1])
+
+    assert question_["num_responses"] == n
+    assert question_["show"]
+    assert question_["answer_distributions"][0]["data"] == [
+        {
+            "answer_choice": letter,
+            "answer_choice_correct": choice.correct,
+            "count": len(
+                [a for a in answers if a.first_answer_choice == i + 1]
+            ),
+        }
+        for i, (letter, choice) in enumerate(
+            zip("ABC", question.answerchoice_set.all())
+        )
+    ]
+    assert question_["answer_distributions"][1]["data"] == [
+        {"answer_choice": "A", "answer_choice_correct": True, "count": n}
+    ]
+    assert question_["transitions"][0]["data"] == [
+        {"transition_type": "rr", "count": n_first},
+        {"transition_type": "wr", "count": n - n_first},
+    ]
+    assert report[0]["transitions"] == [
+        {"transition_type": "rr", "count": n_first},
+        {"transition_type": "wr", "count": n - n_first},
+    ]
+    assert [
+        [second["N"] for second in first["second_answer_choice"]]
+        for first in question_["confusion_matrix"]
+    ] == [
+        [len([a for a in answers if a.first_answer_choice == i]), 0, 0]
+        for i in range(1, 4)
+    ]
+
+    responses = {r["id"]: r for r in question_["student_responses"]}
+    assert len(responses) == n
+    assert responses[answers[0].pk]["feedback"] == annotation
+    assert responses[answers[1].pk]["feedback"] == ""
+    assert responses[answers[0].pk]["second_answer_choice"] == "A"
+    assert (
+        responses[answers[0].pk]["chosen_rationale"]
+        == "Stick to my own rationale"
+    )
+
+
+@pytest.mark.django_db
+def test_report_data_by_assignment_confusion_matrix_by_assignment(
+    assignment, question, group, students, answers, teacher
+):
+    assignment.questions.add(question)
+    other = add_assignments(new_assignments(1, [question]))[0]
+    for student in students:
+        student.groups.add(group)
+    for answer in answers:
+        answer.second_answer_choice = 1
+        answer.save()
+    answers[0].assignment = other
+    answers[0].save()
+
+    report = report_data_by_assignment(
+        [assignment.identifier, other.identifier], [group.pk], teacher
+    )
+
+    for report_, answers_ in zip(
+        report,
+        (
+            [a for a in answers if a.assignment_id == assignment.pk],
+            [answers[0]],
+        ),
+    ):
+        question_ = next(
+            q for q in report_["questions"] if q["title"] == question.title
+        )
+        assert [
+            [second["N"] for second in first["second_answer_choice"]]
+            for first in question_["confusion_matrix"]
+        ] == [
+            [len([a for a in answers_ if a.first_answer_choice == i]), 0, 0]
+            for i in range(1, 4)
+        ]
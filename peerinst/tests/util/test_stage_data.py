@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import mock
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.utils import timezone
+
+from peerinst.models import StageState
+from peerinst.util import StageData
+
+pytestmark = pytest.mark.usefixtures("locmem_cache")
+
+
+@pytest.fixture
+def session():
+    session = SessionStore()
+    session.create()
+    session.modified = False
+    return session
+
+
+def test_stage_data__cached(session):
+    stage_data = StageData(session, "1:1")
+    assert stage_data.get("completed_stage") is None
+
+    stage_data.update(completed_stage="start", rationale_choices=[])
+    stage_data.store()
+
+    assert not session.modified
+    assert cache.get(stage_data.cache_key)["completed_stage"] == "start"
+    assert StageData(session, "1:1").get("completed_stage") == "start"
+    assert StageData(session, "1:2").get("completed_stage") is None
+
+
+def test_stage_data__unchanged_not_written(session):
+    stage_data = StageData(session, "1:1")
+    stage_data.update(rationale_votes={})
+    stage_data.store()
+
+    stage_data = StageData(session, "1:1")
+    stage_data.update(rationale_votes={})
+    with mock.patch.object(StageState, "set") as set_:
+        stage_data.store()
+        set_.assert_not_called()
+
+        stage_data.get("rationale_votes")["1"] = "up"
+        stage_data.store()
+        set_.assert_called_once()
+
+
+def test_stage_data__durable(session):
+    stage_data = StageData(session, "1:1")
+    stage_data.update(completed_stage="start")
+    stage_data.store()
+
+    cache.clear()
+
+    assert StageData(session, "1:1").get("completed_stage") == "start"
+    assert cache.get(stage_data.cache_key) == {"completed_stage": "start"}
+
+
+def test_stage_data__expires(session):
+    stage_data = StageData(session, "1:1")
+    stage_data.update(completed_stage="start")
+    stage_data.store()
+
+    cache.clear()
+    StageState.objects.update(expires=timezone.now() - timedelta(seconds=1))
+
+    assert StageData(session, "1:1").get("completed_stage") is None
+
+    StageState.clean()
+    assert not StageState.objects.exists()
+
+
+def test_stage_data__clear(session):
+    stage_data = StageData(session, "1:1")
+    stage_data.update(completed_stage="start")
+    stage_data.store()
+
+    StageData(session, "1:1").clear()
+
+    assert StageData(session, "1:1").get("completed_stage") is None
+    assert not StageState.objects.exists()
+    assert not session.modified
@@ -21,7 +21,7 @@ from peerinst.models import (
     UserUrl,
 )
 from peerinst.tests import factories
-from peerinst.util import SessionStageData
+from peerinst.util import StageData
 from quality.models import UsesCriterion
 
 
@@ -220,7 +220,7 @@ class QuestionViewTest(QuestionViewTestCase):
         )
         self.assertEqual(response.context["rationale"], rationale)
         self.assertEqual(response.context["sequential_review"], False)
-        stage_data = SessionStageData(self.client.session, self.custom_key)
+        stage_data = StageData(self.client.session, self.custom_key)
         rationale_choices = stage_data.get("rationale_choices")
 
         second_answer_choices = [
@@ -229,8 +229,9 @@ class QuestionViewTest(QuestionViewTestCase):
         ]
         self.assertIn(first_answer_choice, second_answer_choices)
 
+        shown_ids = [pk for _, _, pks in rationale_choices for pk in pks]
         for a in self.question.answer_set.filter(user_token="no_share"):
-            self.assertNotIn(a.rationale, str(rationale_choices))
+            self.assertNotIn(a.pk, shown_ids)
 
         # Select a different answer during review.
         second_answer_choice = next(
@@ -241,7 +242,7 @@ class QuestionViewTest(QuestionViewTestCase):
         second_choice_label = self.question.get_choice_label(
             second_answer_choice
         )
-        chosen_rationale = int(rationale_choices[1][2][0][0])
+        chosen_rationale = rationale_choices[1][2][0]
         response = self.question_post(
             second_answer_choice=second_answer_choice,
             rationale_choice_1=chosen_rationale,
@@ -345,7 +346,7 @@ class QuestionViewTest(QuestionViewTestCase):
         )
         self.assertEqual(response.context["rationale"], rationale)
         self.assertEqual(response.context["sequential_review"], False)
-        stage_data = SessionStageData(self.client.session, self.custom_key)
+        stage_data = StageData(self.client.session, self.custom_key)
         rationale_choices = stage_data.get("rationale_choices")
         second_answer_choices = [
             choice
@@ -353,8 +354,9 @@ class QuestionViewTest(QuestionViewTestCase):
         ]
         self.assertIn(first_answer_choice, second_answer_choices)
 
+        shown_ids = [pk for _, _, pks in rationale_choices for pk in pks]
         for a in self.question.answer_set.filter(user_token="no_share"):
-            self.assertNotIn(a.rationale, str(rationale_choices))
+            self.assertNotIn(a.pk, shown_ids)
 
         # Select a different answer during review.
         second_answer_choice = next(
@@ -365,7 +367,7 @@ class QuestionViewTest(QuestionViewTestCase):
         second_choice_label = self.question.get_choice_label(
             second_answer_choice
         )
-        chosen_rationale = int(rationale_choices[1][2][0][0])
+        chosen_rationale = rationale_choices[1][2][0]
         response = self.question_post(
             second_answer_choice=second_answer_choice,
             rationale_choice_1=chosen_rationale,
@@ -533,7 +535,7 @@ class QuestionViewTest(QuestionViewTestCase):
         )
         self.assertEqual(response.context["rationale"], rationale)
         self.assertEqual(response.context["sequential_review"], True)
-        stage_data = SessionStageData(self.client.session, self.custom_key)
+        stage_data = StageData(self.client.session, self.custom_key)
         rationale_choices = stage_data.get("rationale_choices")
         second_answer_choices = [
             choice
@@ -550,7 +552,7 @@ class QuestionViewTest(QuestionViewTestCase):
         second_choice_label = self.question.get_choice_label(
             second_answer_choice
         )
-        chosen_rationale = int(rationale_choices[1][2][0][0])
+        chosen_rationale = rationale_choices[1][2][0]
         response = self.question_post(
             second_answer_choice=second_answer_choice,
             rationale_choice_1=chosen_rationale,
@@ -677,17 +679,17 @@ class EventLogTest(QuestionViewTestCase):
             self.assertEqual(event["event"]["max_grade"], Grade.CORRECT)
 
     @ddt.data(Grade.CORRECT, Grade.INCORRECT, Grade.PARTIAL)
-    @mock.patch("peerinst.views.views.LOGGER")
+    @mock.patch("peerinst.events.events_logger")
     def test_events_scoring_enabled(self, grade, logger):
         self.mock_grade.return_value = grade
         self._test_events(logger, grade=grade)
 
-    @mock.patch("peerinst.views.views.LOGGER")
+    @mock.patch("peerinst.events.events_logger")
     def test_events_scoring_disabled(self, logger):
         self.log_in_with_scoring_disabled()
         self._test_events(logger, scoring_disabled=True)
 
-    @mock.patch("peerinst.views.views.LOGGER")
+    @mock.patch("peerinst.events.events_logger")
     def test_events_arbitrary_course_id(self, logger):
         # Try using a non-edX compatible number as the course_id (just like
         # Moodle does).
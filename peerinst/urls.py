@@ -298,6 +298,11 @@ def old_patterns():
         path(
             "blink/<int:pk>/status/", views.blink_status, name="blink-status",
         ),
+        path(
+            "blink/<int:pk>/updates/",
+            views.blink_updates,
+            name="blink-updates",
+        ),
         path(
             "blink/<username>/",
             views.blink_get_current,
@@ -783,6 +788,11 @@ def dev_admin_patterns() -> List[URLPattern]:
                                     admin_views.StudentGroupAssignmentManagement.as_view(),  # noqa
                                     name="group-assignment-management",
                                 ),
+                                path(
+                                    "lti_events/",
+                                    admin_views.LtiEventExport.as_view(),
+                                    name="lti-events-export",
+                                ),
                             ]
                         ),
                     ),
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 
 
+import csv
 import datetime
 import itertools
+import json
 import logging
 import string
 from collections import Counter, defaultdict
 
 import pytz
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import (
     Avg,
     Case,
@@ -16,8 +20,9 @@ from django.db.models import (
     DurationField,
     ExpressionWrapper,
     F,
+    Max,
+    Prefetch,
     Q,
-    QuerySet,
     Value,
     When,
 )
@@ -68,32 +73,62 @@ def make_percent_function(total):
     return percent
 
 
-class SessionStageData(object):
+class StageData(object):
     """
-    Manages data to be kept in the session between different question stages
+    Manages data to be kept between different question stages.
+
+    The data is kept in the cache for the session instead of in the session
+    itself so that going through the stages of a question doesn't rewrite the
+    session row on every request. A durable copy is kept in `StageState` and
+    read when the data isn't cached anymore. It is only written when it
+    changed during the request and expires after `STAGE_DATA_TIMEOUT` seconds
+    without changes.
+
+    Parameters
+    ----------
+    session : SessionBase
+        Session of the user
+    custom_key : str
+        Key identifying the assignment and question
     """
 
-    SESSION_KEY = "dalite_stage_data"
+    CACHE_KEY = "peerinst:stage_data:{}:{}"
 
     def __init__(self, session, custom_key):
+        from .models import StageState
+
+        if session.session_key is None:
+            session.save()
+        self.session_key = session.session_key
         self.custom_key = custom_key
-        self.session = session
-        self.data_dict = session.setdefault(self.SESSION_KEY, {})
-        self.data = self.data_dict.get(custom_key)
+        self.cache_key = self.CACHE_KEY.format(self.session_key, custom_key)
+        self.data = cache.get(self.cache_key)
+        if self.data is None:
+            self.data = StageState.get(self.session_key, self.custom_key)
+            if self.data is not None:
+                cache.set(
+                    self.cache_key, self.data, settings.STAGE_DATA_TIMEOUT
+                )
+        self._stored = self._dump(self.data)
 
     def store(self):
-        if self.data is None:
+        # There is a race condition here: two concurrent requests for the same
+        # question can result in changes being lost. This only happens if the
+        # same user sends POST requests for a question at exactly the same
+        # time, which doesn't seem likely (or useful to support).
+        from .models import StageState
+
+        dumped = self._dump(self.data)
+        if dumped == self._stored:
             return
-        # There is a race condition here:  Django loads the session before
-        # calling the view, and stores it after returning.  Two concurrent
-        # request can result in changes being lost.
-        # This only happens if the same user sends POST requests for two
-        # different questions at exactly the same time, which doesn't seem
-        # likely (or useful to support).
-        self.data_dict[self.custom_key] = self.data
-        # Explicitly mark the session as modified since it can't detect
-        # nested modifications.
-        self.session.modified = True
+        self._stored = dumped
+
+        if self.data is None:
+            cache.delete(self.cache_key)
+            StageState.set(self.session_key, self.custom_key, None)
+        else:
+            cache.set(self.cache_key, self.data, settings.STAGE_DATA_TIMEOUT)
+            StageState.set(self.session_key, self.custom_key, dumped)
 
     def update(self, **kwargs):
         if self.data is None:
@@ -108,8 +143,11 @@ class SessionStageData(object):
 
     def clear(self):
         self.data = None
-        self.data_dict.pop(self.custom_key, None)
-        self.session.modified = True
+        self.store()
+
+    @staticmethod
+    def _dump(data):
+        return json.dumps(data, default=str)
 
 
 def load_log_archive(json_log_archive):
@@ -339,63 +377,6 @@ def student_list_from_student_groups(group_list):
     return student_ids
 
 
-def question_search_function(
-    search_string, pre_filtered_list=None, is_old_query=False
-):
-    """
-    Given a search_string and an optional queryset to search within, return
-    a queryset of question objects that have that search_string in either
-    the question id, text, title, category, discipline, answerchoice,
-    or username.
-    """
-    """
-    is_old_query is True when query is sent from assignment or blink view
-    """
-    from peerinst.models import Question
-
-    if pre_filtered_list:
-        assert isinstance(pre_filtered_list, QuerySet)
-
-    search_list = (
-        pre_filtered_list if pre_filtered_list else Question.objects.all()
-    )
-    if is_old_query:
-        query_result = (
-            search_list.filter(
-                Q(id__icontains=search_string)
-                | Q(text__icontains=search_string)
-                | Q(title__icontains=search_string)
-                | Q(category__title__icontains=search_string)
-                | Q(discipline__title__icontains=search_string)
-                | Q(answerchoice__text__icontains=search_string)
-                | Q(user__username__icontains=search_string)
-            )
-            .annotate(answer_count=Count("answer", distinct=True))
-            .order_by("-answer_count")
-        )
-    elif search_string.isdigit():
-        query_result = (
-            search_list.filter(
-                Q(text__icontains=search_string)
-                | Q(title__icontains=search_string)
-                | Q(pk=int(search_string))
-            )
-            .annotate(answer_count=Count("answer", distinct=True))
-            .order_by("-answer_count")
-        )
-    else:
-        query_result = (
-            search_list.filter(
-                Q(text__icontains=search_string)
-                | Q(title__icontains=search_string)
-            )
-            .annotate(answer_count=Count("answer", distinct=True))
-            .order_by("-answer_count")
-        )
-
-    return query_result
-
-
 def get_student_objects_from_group_list(student_groups):
     from peerinst.models import Student
 
@@ -425,7 +406,7 @@ def subset_answers_by_studentgroup_and_assignment(
     )
     answer_qs = Answer.objects.filter(
         assignment_id__in=assignment_list
-    ).filter(user_token__in=student_id_list)
+    ).filter(Answer.student_filter(student_id_list))
     return answer_qs
 
 
@@ -483,6 +464,140 @@ def get_correct_answer_choices(question):
     return correct_answer_choices
 
 
+def get_report_answers(assignment_list, student_groups, teacher=None):
+    """
+    Returns the answers of the students of the groups to the assignments with
+    everything needed by the reports fetched in bulk.
+
+    Parameters
+    ----------
+    assignment_list : List[Union[str, Assignment]]
+        Wanted assignments
+    student_groups : List[int]
+        Primary keys for wanted student groups
+    teacher : Optional[Teacher] (default : None)
+        If given, the annotations of the teacher are prefetched in the
+        `teacher_annotations` attribute of each answer
+
+    Returns
+    -------
+    List[Answer]
+        Answers ordered by primary key, annotated with the text of the chosen
+        rationale as `chosen_rationale_text`
+    """
+    from peerinst.models import AnswerAnnotation
+
+    answers = (
+        subset_answers_by_studentgroup_and_assignment(
+            assignment_list, student_groups
+        )
+        .annotate(chosen_rationale_text=F("chosen_rationale__rationale"))
+        .order_by("pk")
+    )
+    if teacher is not None:
+        answers = answers.prefetch_related(
+            Prefetch(
+                "answerannotation_set",
+                queryset=AnswerAnnotation.objects.filter(
+                    annotator=teacher.user
+                ).order_by("pk"),
+                to_attr="teacher_annotations",
+            )
+        )
+    return list(answers)
+
+
+def count_answers_by_question(answers, correct_answer_choices):
+    """
+    Computes in memory the distributions and transitions of the answers of
+    each question, and their confusion matrix by assignment and question.
+
+    Parameters
+    ----------
+    answers : List[Answer]
+        Answers to count
+    correct_answer_choices : Dict[int, List[int]]
+        Correct answer choices (starting at 1) for each question pk
+
+    Returns
+    -------
+    Dict[str, Dict[Tuple, int]]
+        Counts under the format
+            {
+                responses: {(question_pk,): int}
+                first_answer_choice: {(question_pk, choice): int}
+                second_answer_choice: {(question_pk, choice): int}
+                transition: {(question_pk, transition_type): int}
+                confusion_matrix: {
+                    (assignment_pk, question_pk, first, second): int
+                }
+            }
+    """
+    import pandas as pd
+
+    columns = {
+        "responses": ["question_id"],
+        "first_answer_choice": ["question_id", "first_answer_choice"],
+        "second_answer_choice": ["question_id", "second_answer_choice"],
+        "transition": ["question_id", "transition"],
+        "confusion_matrix": [
+            "assignment_id",
+            "question_id",
+            "first_answer_choice",
+            "second_answer_choice",
+        ],
+    }
+
+    if not answers:
+        return {key: {} for key in columns}
+
+    df = pd.DataFrame.from_records(
+        [
+            (
+                a.assignment_id,
+                a.question_id,
+                a.first_answer_choice,
+                a.second_answer_choice,
+            )
+            for a in answers
+        ],
+        columns=[
+            "assignment_id",
+            "question_id",
+            "first_answer_choice",
+            "second_answer_choice",
+        ],
+    )
+
+    correct = pd.MultiIndex.from_tuples(
+        [
+            (question, choice)
+            for question, choices in correct_answer_choices.items()
+            for choice in choices
+        ]
+        or [(None, None)]
+    )
+    first_correct = pd.MultiIndex.from_arrays(
+        [df["question_id"], df["first_answer_choice"]]
+    ).isin(correct)
+    second_correct = pd.MultiIndex.from_arrays(
+        [df["question_id"], df["second_answer_choice"]]
+    ).isin(correct)
+    df["transition"] = (
+        pd.Series(first_correct).map({True: "r", False: "w"})
+        + pd.Series(second_correct).map({True: "r", False: "w"})
+    ).values
+
+    def count(columns_):
+        counts = df.dropna(subset=columns_).groupby(columns_).size()
+        return {
+            key if isinstance(key, tuple) else (key,): int(n)
+            for key, n in counts.items()
+        }
+
+    return {key: count(columns_) for key, columns_ in columns.items()}
+
+
 def report_data_by_assignment(assignment_list, student_groups, teacher):
     """
     Returns data for report by assignment
@@ -545,29 +660,61 @@ def report_data_by_assignment(assignment_list, student_groups, teacher):
         }
     ]
     """
-    from peerinst.models import Answer, Assignment
+    from peerinst.models import Assignment, AssignmentQuestions
 
-    student_obj_qs = get_student_objects_from_group_list(student_groups)
-    answer_qs = subset_answers_by_studentgroup_and_assignment(
-        assignment_list, student_groups
+    assignment_list = [str(a) for a in assignment_list]
+    letters = list(string.ascii_uppercase)
+
+    assignments = Assignment.objects.in_bulk(
+        assignment_list, field_name="identifier"
+    )
+    assignment_questions = defaultdict(list)
+    for assignment_question in (
+        AssignmentQuestions.objects.filter(assignment__in=assignments.values())
+        .select_related("question")
+        .prefetch_related("question__answerchoice_set")
+        .order_by("rank", "pk")
+    ):
+        assignment_questions[assignment_question.assignment_id].append(
+            assignment_question.question
+        )
+
+    usernames = dict(
+        get_student_objects_from_group_list(student_groups).values_list(
+            "student__username", "student__email"
+        )
     )
 
+    answers = get_report_answers(assignment_list, student_groups, teacher)
+    answers_by_question = defaultdict(list)
+    for answer in answers:
+        answers_by_question[answer.question_id].append(answer)
+
+    correct_answer_choices = {
+        q.pk: [
+            i
+            for i, choice in enumerate(q.answerchoice_set.all(), 1)
+            if choice.correct
+        ]
+        for questions in assignment_questions.values()
+        for q in questions
+    }
+    counts = count_answers_by_question(answers, correct_answer_choices)
+
     assignment_data = []
     for a_str in assignment_list:
-        a = Assignment.objects.get(identifier=a_str)
+        if a_str not in assignments:
+            continue
+        a = assignments[a_str]
         d_a = {}
         d_a["assignment"] = a.title
         d_a["questions"] = []
-
-        # metric_list = ["num_responses", "rr", "rw", "wr", "ww"]
-        # metric_labels = ["N", "RR", "RW", "WR", "WW"]
+        d_a["transitions"] = []
 
         student_gradebook_transitions = {}
-        question_list = []
-        d3_data = []
-        for q in a.questions.order_by("assignmentquestions__rank"):
-
-            answer_qs_question = answer_qs.filter(question_id=q.id)
+        for q in assignment_questions[a.pk]:
+            answer_choices = q.answerchoice_set.all()
+            n_choices = len(answer_choices)
 
             d_q = {}
             d_q["text"] = q.text
@@ -583,7 +730,7 @@ def report_data_by_assignment(assignment_list, student_groups, teacher):
                 print(e)
                 pass
 
-            d_q["num_responses"] = answer_qs.filter(question_id=q.id).count()
+            d_q["num_responses"] = counts["responses"].get((q.pk,), 0)
 
             if d_q["num_responses"] > 0:
                 d_q["show"] = True
@@ -591,195 +738,130 @@ def report_data_by_assignment(assignment_list, student_groups, teacher):
             d_q["type"] = q.type
             d_q["sequential_review"] = q.sequential_review
 
-            question_list.append(q)
-
             # PI questions
-            if q.answerchoice_set.all().count() > 0:
-                d_q["answer_choices"] = q.answerchoice_set.all()
-
-                # answer_choices_texts = q.answerchoice_set.values_list(
-                #    "text", flat=True
-                # )
+            if n_choices > 0:
+                d_q["answer_choices"] = answer_choices
 
-                # answer_style = q.answer_style
-
-                correct_answer_choices = get_correct_answer_choices(q)
-
-                transitions = report_data_transitions(
-                    question=q,
-                    correct_answer_choices=correct_answer_choices,
-                    assignment_list=assignment_list,
-                    student_groups=student_groups,
-                )
-
-                # aggregates for this question in this assignment
                 field_names = [
                     "first_answer_choice",
                     "second_answer_choice",
-                ]  # ,'transition']
+                ]
                 field_labels = [
                     "First Answer Choice",
                     "Second Answer Choice",
-                ]  # ,'Transition']
+                ]
                 d_q["answer_distributions"] = []
                 for field_name, field_label in zip(field_names, field_labels):
-                    counts = (
-                        answer_qs_question.values_list(field_name)
-                        .order_by(field_name)
-                        .annotate(count=Count(field_name))
-                    )
-
                     d_q_a_d = {}
                     d_q_a_d["label"] = field_label
                     d_q_a_d["data"] = []
-                    for c in counts:
-                        d_q_a_c = {}
-                        d_q_a_c["answer_choice"] = list(
-                            string.ascii_uppercase
-                        )[c[0] - 1]
-                        d_q_a_c[
-                            "answer_choice_correct"
-                        ] = q.answerchoice_set.values_list(
-                            "correct", flat=True
-                        )[
-                            c[0] - 1
-                        ]
-                        d_q_a_c["count"] = c[1]
-                        d_q_a_d["data"].append(d_q_a_c)
+                    for i, choice in enumerate(answer_choices, 1):
+                        count = counts[field_name].get((q.pk, i), 0)
+                        if count:
+                            d_q_a_d["data"].append(
+                                {
+                                    "answer_choice": letters[i - 1],
+                                    "answer_choice_correct": choice.correct,
+                                    "count": count,
+                                }
+                            )
                     d_q["answer_distributions"].append(d_q_a_d)
 
-                field_names = ["transition"]
-                field_labels = ["Transition"]
-                d_q["transitions"] = []
-                for field_name, field_label in zip(field_names, field_labels):
-                    counts = (
-                        transitions.values_list(field_name)
-                        .order_by(field_name)
-                        .annotate(count=Count(field_name))
-                    )
-
-                    d_q_a_d = {}
-                    d_q_a_d["label"] = field_label
-                    d_q_a_d["data"] = []
-                    for c in counts:
-                        d_q_a_c = {}
-                        d_q_a_c["transition_type"] = c[0]
-                        d_q_a_c["count"] = c[1]
-                        d_q_a_d["data"].append(d_q_a_c)
+                d_q_a_d = {}
+                d_q_a_d["label"] = "Transition"
+                d_q_a_d["data"] = []
+                for transition in ("rr", "rw", "wr", "ww"):
+                    count = counts["transition"].get((q.pk, transition), 0)
+                    if count:
+                        d_q_a_d["data"].append(
+                            {"transition_type": transition, "count": count}
+                        )
 
                         # counter for assignment level aggregate
-                        if c[0] in student_gradebook_transitions:
-                            student_gradebook_transitions[c[0]] += c[1]
+                        if transition in student_gradebook_transitions:
+                            student_gradebook_transitions[transition] += count
                         else:
-                            student_gradebook_transitions[c[0]] = c[1]
+                            student_gradebook_transitions[transition] = count
 
-                d_q["transitions"].append(d_q_a_d)
+                d_q["transitions"] = [d_q_a_d]
 
                 # For plot()
-                d_q["matrix"] = {}
-                for entry in d_q_a_d["data"]:
-                    if entry["transition_type"] == "rr":
-                        d_q["matrix"].update(
-                            easy=entry["count"] / d_q["num_responses"]
-                        )
-                    if entry["transition_type"] == "ww":
-                        d_q["matrix"].update(
-                            hard=entry["count"] / d_q["num_responses"]
-                        )
-                    if entry["transition_type"] == "rw":
-                        d_q["matrix"].update(
-                            tricky=entry["count"] / d_q["num_responses"]
-                        )
-                    if entry["transition_type"] == "wr":
-                        d_q["matrix"].update(
-                            peer=entry["count"] / d_q["num_responses"]
-                        )
+                matrix_labels = {
+                    "rr": "easy",
+                    "ww": "hard",
+                    "rw": "tricky",
+                    "wr": "peer",
+                }
+                d_q["matrix"] = {
+                    matrix_labels[entry["transition_type"]]: entry["count"]
+                    / d_q["num_responses"]
+                    for entry in d_q_a_d["data"]
+                }
 
-                first_choice = {}
-                second_choice = {}
-                for entry in d_q["answer_distributions"]:
-                    if entry["label"] == "First Answer Choice":
-                        for choice in entry["data"]:
-                            first_choice[choice["answer_choice"]] = (
-                                choice["count"] / d_q["num_responses"]
-                            )
-                    if entry["label"] == "Second Answer Choice":
-                        for choice in entry["data"]:
-                            second_choice[choice["answer_choice"]] = (
-                                choice["count"] / d_q["num_responses"]
-                            )
-                d_q["choices"] = {}
-                d_q["choices"].update(first_choice=first_choice)
-                d_q["choices"].update(second_choice=second_choice)
+                d_q["choices"] = {
+                    "{}_choice".format(key): {
+                        choice["answer_choice"]: choice["count"]
+                        / d_q["num_responses"]
+                        for choice in entry["data"]
+                    }
+                    for key, entry in zip(
+                        ("first", "second"), d_q["answer_distributions"]
+                    )
+                }
                 # End plot()
 
-                d3_data_dict = {}
-                d3_data_dict["question"] = q.title
-                d3_data_dict["distribution"] = d_q_a_d
-                d3_data.append(d3_data_dict)
-
-            # confusion matrix
-            d_q["confusion_matrix"] = []
-            for first_choice_index in range(1, q.answerchoice_set.count() + 1):
-                d_q_cf = {}
-                first_answer_qs = (
-                    q.answer_set.filter(first_answer_choice=first_choice_index)
-                    .exclude(user_token="")
-                    .filter(assignment_id=a.identifier)
-                )
-                d_q_cf["first_answer_choice"] = first_choice_index
-                d_q_cf["second_answer_choice"] = []
-                for second_choice_index in range(
-                    1, q.answerchoice_set.count() + 1
-                ):
-                    d_q_cf_a2 = {}
-                    d_q_cf_a2["value"] = second_choice_index
-                    count = first_answer_qs.filter(
-                        second_answer_choice=second_choice_index
-                    ).count()
-                    if count:
-                        d_q_cf_a2["N"] = count
-                    else:
-                        d_q_cf_a2["N"] = 0
-                    d_q_cf["second_answer_choice"].append(d_q_cf_a2)
-                d_q["confusion_matrix"].append(d_q_cf)
+            # confusion matrix, only with the answers given in this assignment
+            d_q["confusion_matrix"] = [
+                {
+                    "first_answer_choice": first_choice_index,
+                    "second_answer_choice": [
+                        {
+                            "value": second_choice_index,
+                            "N": counts["confusion_matrix"].get(
+                                (
+                                    a.pk,
+                                    q.pk,
+                                    first_choice_index,
+                                    second_choice_index,
+                                ),
+                                0,
+                            ),
+                        }
+                        for second_choice_index in range(1, n_choices + 1)
+                    ],
+                }
+                for first_choice_index in range(1, n_choices + 1)
+            ]
 
             d_q["student_responses"] = []
-            for student_response in answer_qs_question:
+            for student_response in answers_by_question[q.pk]:
                 d_q_a = {}
                 d_q_a["id"] = student_response.pk
                 d_q_a["feedback"] = (
-                    student_response.answerannotation_set.filter(
-                        annotator=teacher.user, answer=student_response,
-                    ).last()
-                    if student_response.answerannotation_set.filter(
-                        annotator=teacher.user, answer=student_response
-                    ).exists()
+                    student_response.teacher_annotations[-1]
+                    if student_response.teacher_annotations
                     else ""
                 )
-                # d_q_a["student"] = student_response.user_token
-                d_q_a["student"] = student_obj_qs.get(
-                    student__username=student_response.user_token
-                ).student.email.split("@")[0]
+                d_q_a["student"] = usernames[
+                    student_response.user_token
+                ].split("@")[0]
 
-                d_q_a["first_answer_choice"] = list(string.ascii_uppercase)[
+                d_q_a["first_answer_choice"] = letters[
                     student_response.first_answer_choice - 1
                 ]
                 d_q_a["rationale"] = student_response.rationale
-                ##
                 if student_response.second_answer_choice:
-                    d_q_a["second_answer_choice"] = list(
-                        string.ascii_uppercase
-                    )[student_response.second_answer_choice - 1]
+                    d_q_a["second_answer_choice"] = letters[
+                        student_response.second_answer_choice - 1
+                    ]
                 else:
                     d_q_a[
                         "second_answer_choice"
                     ] = student_response.second_answer_choice
-                ##
                 if student_response.chosen_rationale_id:
-                    d_q_a["chosen_rationale"] = Answer.objects.get(
-                        pk=student_response.chosen_rationale_id
-                    ).rationale
+                    d_q_a[
+                        "chosen_rationale"
+                    ] = student_response.chosen_rationale_text
                 else:
                     d_q_a["chosen_rationale"] = "Stick to my own rationale"
                 d_q_a["submitted"] = student_response.datetime_second
@@ -791,12 +873,11 @@ def report_data_by_assignment(assignment_list, student_groups, teacher):
                 d_q["student_responses"].append(d_q_a)
 
             d_a["questions"].append(d_q)
-            d_a["transitions"] = []
-            for name, count in list(student_gradebook_transitions.items()):
-                d_t = {}
-                d_t["transition_type"] = name
-                d_t["count"] = count
-                d_a["transitions"].append(d_t)
+
+        d_a["transitions"] = [
+            {"transition_type": name, "count": count}
+            for name, count in student_gradebook_transitions.items()
+        ]
 
         assignment_data.append(d_a)
 
@@ -963,32 +1044,135 @@ def report_data_by_question(assignment_list, student_groups):
     return gradebook_question
 
 
-def filter_ltievents(
-    start_date, stop_date=datetime.datetime.now(), username=None
+LTI_EVENT_COLUMNS = [
+    "username",
+    "course_id",
+    "referer",
+    "agent",
+    "accept_language",
+]
+
+LTI_EVENT_LOG_COLUMNS = [
+    "event_type",
+    "assignment_id",
+    "question_text",
+    "question_id",
+    "timestamp",
+    "rationales",
+    "success",
+    "assignment_title",
+    "rationale_algorithm",
+    "chosen_rationale_id",
+    "second_answer_choice",
+    "first_answer_choice",
+    "rationale",
+]
+
+
+def iter_ltievent_chunks(
+    start_date, stop_date=None, username=None, chunk_size=2000
 ):
     """
-    given a start date and stop date (as datetime objects), and optional
-    username return all LtiEvents that match the criteria
+    Yields lists of at most `chunk_size` LtiEvents between `start_date` and
+    `stop_date`, in primary key order. Chunks are read with keyset pagination
+    so that only one chunk is ever held in memory.
+
+    When a `username` is given, events which can't belong to that user are
+    excluded in the database; callers must still confirm the match against
+    the event log (see `iter_ltievents`).
+
+    Parameters
+    ----------
+    start_date : datetime.datetime
+    stop_date : Optional[datetime.datetime] (default : None)
+        Defaults to now
+    username : Optional[str] (default : None)
+    chunk_size : int (default : 2000)
+
+    Yields
+    ------
+    List[LtiEvent]
     """
     from peerinst.models import LtiEvent
 
+    if stop_date is None:
+        stop_date = datetime.datetime.now()
+
     events = LtiEvent.objects.filter(
         timestamp__gte=start_date, timestamp__lte=stop_date
     )
+    # the event log is stored as text in which non ascii usernames may be
+    # escaped, so those can only be matched in python
+    if username and username.isascii():
+        events = events.filter(
+            Q(username=username) | Q(event_log__contains=username)
+        )
+    events = events.order_by("pk")
+
+    last_pk = None
+    while True:
+        chunk = events if last_pk is None else events.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def _ltievent_username_matches(e, username):
+    """
+    Raises TypeError if the event log isn't a json object.
+    """
+    return e.username == username or e.event_log["username"] == username
+
+
+def iter_ltievents(start_date, stop_date=None, username=None, chunk_size=2000):
+    """
+    Yields LtiEvents between `start_date` and `stop_date` belonging to the
+    optional `username`, reading them `chunk_size` at a time. Events whose
+    log can't be read are skipped.
+    """
+    for chunk in iter_ltievent_chunks(
+        start_date, stop_date, username, chunk_size
+    ):
+        for e in chunk:
+            if username:
+                try:
+                    if not _ltievent_username_matches(e, username):
+                        continue
+                except TypeError:
+                    continue
+            yield e
+
+
+def filter_ltievents(start_date, stop_date=None, username=None):
+    """
+    given a start date and stop date (as datetime objects), and optional
+    username return all LtiEvents that match the criteria
+    """
+    from peerinst.models import LtiEvent
+
+    if stop_date is None:
+        stop_date = datetime.datetime.now()
+
+    if not username:
+        events = LtiEvent.objects.filter(
+            timestamp__gte=start_date, timestamp__lte=stop_date
+        )
+        return [], events
 
-    if username:
-        rejected_pks, event_pks = [], []
-        for e in events:
+    rejected_pks, event_pks = [], []
+    for chunk in iter_ltievent_chunks(start_date, stop_date, username):
+        for e in chunk:
             try:
-                if e.event_log["username"] == username:
+                if _ltievent_username_matches(e, username):
                     event_pks.append(e.pk)
             except TypeError as error:
                 print(error)
                 rejected_pks.append(e.pk)
-        events = events.filter(pk__in=event_pks)
-        rejected = events.filter(pk__in=rejected_pks)
-    else:
-        rejected = []
+
+    rejected = LtiEvent.objects.filter(pk__in=rejected_pks)
+    events = LtiEvent.objects.filter(pk__in=event_pks)
 
     return rejected, events
 
@@ -1021,34 +1205,49 @@ def serialize_events_to_dataframe(events):
     """
     import pandas as pd
 
-    columns = ["username", "course_id", "referer", "agent", "accept_language"]
-
-    event_columns = [
-        "event_type",
-        "assignment_id",
-        "question_text",
-        "question_id",
-        "timestamp",
-        "rationales",
-        "success",
-        "assignment_title",
-        "rationale_algorithm",
-        "chosen_rationale_id",
-        "second_answer_choice",
-        "first_answer_choice",
-        "rationale",
-    ]
+    return pd.DataFrame(
+        [
+            build_event_dict(e, LTI_EVENT_COLUMNS, LTI_EVENT_LOG_COLUMNS)
+            for e in events
+        ],
+        columns=LTI_EVENT_COLUMNS + LTI_EVENT_LOG_COLUMNS,
+    )
+
+
+class _Echo:
+    """
+    File-like object whose `write` returns the written value, for use with
+    `csv.writer` when streaming.
+    """
 
-    df = pd.DataFrame(columns=columns + event_columns)
+    def write(self, value):
+        return value
 
-    for i, e in enumerate(events):
-        df.loc[i] = pd.Series(build_event_dict(e, columns, event_columns))
 
-    return df
+def iter_ltievents_csv(events):
+    """
+    Yields the lines of the csv serialization of `events`, starting with the
+    header, with the same columns as `serialize_events_to_dataframe`.
+
+    Parameters
+    ----------
+    events : Iterable[LtiEvent]
+
+    Yields
+    ------
+    str
+    """
+    columns = LTI_EVENT_COLUMNS + LTI_EVENT_LOG_COLUMNS
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for e in events:
+        event_dict = build_event_dict(
+            e, LTI_EVENT_COLUMNS, LTI_EVENT_LOG_COLUMNS
+        )
+        yield writer.writerow([event_dict.get(c) for c in columns])
 
 
 def get_lti_data_as_csv(weeks_ago_start, weeks_ago_stop=0, username=None):
-    import datetime
     import os
     from django.conf import settings
 
@@ -1058,22 +1257,20 @@ def get_lti_data_as_csv(weeks_ago_start, weeks_ago_stop=0, username=None):
     start = datetime.datetime.now() - datetime.timedelta(weeks=weeks_ago_start)
     end = datetime.datetime.now() - datetime.timedelta(weeks=weeks_ago_stop)
 
-    rejected, events = filter_ltievents(
-        start_date=start, stop_date=end, username=username
-    )
-    print("events filtered")
-    print((datetime.datetime.now()))
-
-    df = serialize_events_to_dataframe(events)
+    fname = os.path.join(settings.BASE_DIR, "data.csv")
+    with open(fname, "w", encoding="utf-8") as f:
+        for line in iter_ltievents_csv(
+            iter_ltievents(start_date=start, stop_date=end, username=username)
+        ):
+            f.write(line)
 
-    print("serialied df")
+    print("events written")
     print((datetime.datetime.now()))
 
-    fname = os.path.join(settings.BASE_DIR, "data.csv")
-    with open(fname, "w") as f:
-        df.to_csv(path_or_buf=f, encoding="utf-8")
+    return fname
+
 
-    return df
+LTIEVENT_REPLAY_BATCH_SIZE = 1000
 
 
 # https://stackoverflow.com/questions/1060279/iterating-through-a-range-of-dates-in-python
@@ -1082,57 +1279,164 @@ def make_daterange(start_date, end_date):
         yield start_date + datetime.timedelta(n)
 
 
+def _ltievent_answer_key(event_json):
+    """
+    Returns the (user_token, question_id, assignment_id) of the answer a json
+    log from `peerinst.views.emit_event` refers to, or None if the log is
+    incomplete.
+    """
+    try:
+        return (
+            str(event_json["username"]),
+            int(event_json["event"]["question_id"]),
+            str(event_json["event"]["assignment_id"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _iter_day_of_ltievents(day_of_logs):
+    for chunk in iter_ltievent_chunks(
+        day_of_logs,
+        day_of_logs + datetime.timedelta(hours=24),
+        chunk_size=LTIEVENT_REPLAY_BATCH_SIZE,
+    ):
+        for e in chunk:
+            yield e
+
+
+def get_answers_for_ltievent_keys(keys, fields=()):
+    """
+    Resolves (user_token, question_id, assignment_id) keys, as returned by
+    `_ltievent_answer_key`, to answers with a query per batch of keys. Keys
+    matching no answer or more than one are logged and left out.
+
+    Parameters
+    ----------
+    keys : Iterable[Tuple[str, int, str]]
+    fields : Iterable[str] (default : ())
+        Answer fields to read along with the primary key
+
+    Returns
+    -------
+    Dict[Tuple[str, int, str], Dict[str, Any]]
+        Values of "pk" and `fields` of the answer corresponding to each key
+    """
+    from peerinst.models import Answer
+    from peerinst.utils import batch
+
+    keys = set(keys)
+    answers = {}
+    ambiguous = set()
+
+    # sorting groups the keys of a student in the same batch, which keeps
+    # the superset matched by the `__in` filters small
+    for keys_ in batch(sorted(keys), LTIEVENT_REPLAY_BATCH_SIZE):
+        keys_ = set(keys_)
+        qs = Answer.objects.filter(
+            user_token__in={key[0] for key in keys_},
+            question_id__in={key[1] for key in keys_},
+            assignment_id__in={key[2] for key in keys_},
+        ).values("pk", "user_token", "question_id", "assignment_id", *fields)
+        for answer in qs:
+            key = (
+                answer["user_token"],
+                answer["question_id"],
+                answer["assignment_id"],
+            )
+            if key not in keys_:
+                continue
+            if key in answers:
+                ambiguous.add(key)
+            answers[key] = answer
+
+    for key in ambiguous:
+        logger.info("Multiple : {}".format(key))
+        del answers[key]
+    for key in keys - answers.keys() - ambiguous:
+        logger.info("Not found : {}".format(key))
+
+    return answers
+
+
 def load_shown_rationales_from_ltievent_logs(day_of_logs):
-    from peerinst.models import Answer, LtiEvent, ShownRationale
+    """
+    Creates the missing ShownRationale objects for the save_problem_success
+    events of the day starting at `day_of_logs`. Answers are resolved and
+    shown rationales created in bulk.
 
-    event_logs = LtiEvent.objects.filter(
-        timestamp__gte=day_of_logs,
-        timestamp__lte=day_of_logs + datetime.timedelta(hours=24),
-    )
+    Parameters
+    ----------
+    day_of_logs : datetime.datetime
 
-    for e in event_logs.iterator():
+    Returns
+    -------
+    int
+        Number of ShownRationale objects created
+    """
+    from peerinst.models import Answer, ShownRationale
+    from peerinst.utils import batch
+
+    shown = defaultdict(set)
+    for e in _iter_day_of_ltievents(day_of_logs):
         e_json = e.event_log
-        if e_json["event_type"] == "save_problem_success":
+        try:
+            if e_json["event_type"] != "save_problem_success":
+                continue
+        except (KeyError, TypeError):
+            continue
+        key = _ltievent_answer_key(e_json)
+        if key is None:
+            continue
+        try:
+            shown[key].update(
+                int(r["id"]) for r in e_json["event"]["rationales"]
+            )
+        except (KeyError, TypeError, ValueError):
+            logger.info("No rationales : {}".format(key))
 
-            try:
-                try:
-                    shown_for_answer = Answer.objects.get(
-                        user_token=e_json["username"],
-                        question_id=e_json["event"]["question_id"],
-                        assignment_id=e_json["event"]["assignment_id"],
-                    )
-                except Answer.MultipleObjectsReturned:
-                    print(
-                        (
-                            "Multiple : ",
-                            e_json["username"],
-                            e_json["event"]["question_id"],
-                            e_json["event"]["assignment_id"],
-                        )
-                    )
-                try:
-                    for r in e_json["event"]["rationales"]:
-                        (
-                            obj,
-                            created,
-                        ) = ShownRationale.objects.get_or_create(  # noqa
-                            shown_answer=Answer.objects.get(pk=r["id"]),
-                            shown_for_answer=shown_for_answer,
-                        )
-                except KeyError:
-                    print("No Rationales")
-                    print(e_json)
-
-            except Answer.DoesNotExist:
-                print(
-                    (
-                        "Not found : ",
-                        e_json["username"],
-                        e_json["event"]["question_id"],
-                        e_json["event"]["assignment_id"],
-                    )
-                )
-    return
+    answers = get_answers_for_ltievent_keys(shown.keys())
+
+    shown_answer_pks = set()
+    for pks in batch(
+        set(itertools.chain.from_iterable(shown[key] for key in answers)),
+        LTIEVENT_REPLAY_BATCH_SIZE,
+    ):
+        shown_answer_pks.update(
+            Answer.objects.filter(pk__in=list(pks)).values_list(
+                "pk", flat=True
+            )
+        )
+
+    pairs = {
+        (answer["pk"], pk)
+        for key, answer in answers.items()
+        for pk in shown[key]
+        if pk in shown_answer_pks
+    }
+    for pks in batch(
+        {answer["pk"] for answer in answers.values()},
+        LTIEVENT_REPLAY_BATCH_SIZE,
+    ):
+        pairs.difference_update(
+            ShownRationale.objects.filter(
+                shown_for_answer__in=list(pks)
+            ).values_list("shown_for_answer", "shown_answer")
+        )
+
+    ShownRationale.objects.bulk_create(
+        [
+            ShownRationale(
+                shown_for_answer_id=shown_for_answer,
+                shown_answer_id=shown_answer,
+            )
+            for shown_for_answer, shown_answer in sorted(pairs)
+        ],
+        batch_size=LTIEVENT_REPLAY_BATCH_SIZE,
+    )
+
+    logger.info("{} shown rationales created".format(len(pairs)))
+    return len(pairs)
 
 
 def get_average_time_spent_on_all_question_start(
@@ -1183,6 +1487,59 @@ def get_average_time_spent_on_all_question_start(
     return result
 
 
+def get_average_time_spent_by_question(
+    question_ids, question_stage="whole", student_list=None
+):
+    """
+    Same as `get_average_time_spent_on_all_question_start` for many questions
+    at once, in a single grouped query.
+
+    Parameters
+    ----------
+    question_ids : List[int]
+        Primary keys of the questions
+    question_stage : str (default : "whole")
+        One of "whole", "first_answer_choice" or "second_answer_choice"
+    student_list : Optional[Union[List[str], QuerySet]] (default : None)
+        If given, only the answers of these user tokens are used
+
+    Returns
+    -------
+    Dict[int, Optional[int]]
+        Average time in seconds for each question (None if not enough data)
+    """
+    from peerinst.models import Answer
+
+    if question_stage == "whole":
+        expression = F("datetime_second") - F("datetime_start")
+    elif question_stage == "first_answer_choice":
+        expression = F("datetime_first") - F("datetime_start")
+    elif question_stage == "second_answer_choice":
+        expression = F("datetime_second") - F("datetime_first")
+    else:
+        return {question_id: None for question_id in question_ids}
+
+    qs = Answer.objects.filter(question_id__in=question_ids)
+    if student_list:
+        qs = qs.filter(user_token__in=student_list)
+
+    averages = {
+        average["question_id"]: average["time_spent"]
+        for average in qs.values("question_id")
+        .annotate(
+            time_spent=Avg(ExpressionWrapper(expression, DurationField()))
+        )
+        .order_by()
+    }
+
+    return {
+        question_id: averages[question_id].seconds
+        if averages.get(question_id) is not None
+        else None
+        for question_id in question_ids
+    }
+
+
 def get_answer_corresponding_to_ltievent_log(event_json):
     """
     Argument: Given a json log that came from `peerinst.views.emit_event`,
@@ -1211,318 +1568,321 @@ def get_answer_corresponding_to_ltievent_log(event_json):
 def populate_answer_start_time_from_ltievent_logs(day_of_logs, event_type):
     """
     Given a date, filter event logs to populate Answer.datetime_start field for
-    answer instances already in database
+    answer instances already in database. The timestamp to keep is computed
+    for each answer over the whole day before answers are resolved and
+    updated in bulk.
+
+    Parameters
+    ----------
+    day_of_logs : datetime.datetime
+    event_type : str
+        "problem_show" to populate `datetime_start` or "problem_check" to
+        populate `datetime_first`
+
+    Returns
+    -------
+    int
+        Number of answers updated
     """
-    from peerinst.models import LtiEvent
+    from peerinst.models import Answer
 
     if event_type == "problem_show":
         field = "datetime_start"
     elif event_type == "problem_check":
         field = "datetime_first"
+    else:
+        raise ValueError("Unsupported event type {}".format(event_type))
 
-    event_logs = LtiEvent.objects.filter(
-        timestamp__gte=day_of_logs,
-        timestamp__lte=day_of_logs + datetime.timedelta(hours=24),
-    )
-    i = 0
-    for e in event_logs.iterator():
+    timestamps = {}
+    for e in _iter_day_of_ltievents(day_of_logs):
         e_json = e.event_log
-
-        # problem_check events have two associated logs each
-        # the earlier one will correspond to when the first_answer was saved
-        # and hence is the one we want assocated with datetime_first.
-        # The correct log does not have the "rationales" key in the log
-        # If "rationales" in in event log, ignore this log event
-        if event_type == "problem_check" and "rationales" in e_json["event"]:
-            logger.info("skipping log event")
+        try:
+            # we are ignoring save_problem_success events, as they have
+            # already been handled
+            if e_json["event_type"] != event_type or e.timestamp is None:
+                continue
+
+            # problem_check events have two associated logs each
+            # the earlier one will correspond to when the first_answer was
+            # saved and hence is the one we want assocated with
+            # datetime_first. The correct log does not have the "rationales"
+            # key in the log. If "rationales" in in event log, ignore this
+            # log event
+            if (
+                event_type == "problem_check"
+                and "rationales" in e_json["event"]
+            ):
+                continue
+        except (KeyError, TypeError):
             continue
 
-        # we are ignoring save_problem_success events, as they have already
-        # been handled
-        if e_json["event_type"] == event_type:
-
-            answer_obj = get_answer_corresponding_to_ltievent_log(
-                event_json=e_json
-            )
-            if answer_obj:
-                # keep the latest time at which student accessed
-                # problem start page
-                if getattr(answer_obj, field):
-                    if (
-                        getattr(answer_obj, field) < e.timestamp
-                        and event_type == "problem_show"
-                    ):
-                        setattr(answer_obj, field, e.timestamp)
-                        answer_obj.save()
-                        i += 1
-                    else:
-                        pass
-                else:
-                    setattr(answer_obj, field, e.timestamp)
-                    answer_obj.save()
-                    i += 1
+        key = _ltievent_answer_key(e_json)
+        if key is None:
+            continue
 
-            else:
-                logger.info(
-                    "Not found : ",
-                    e_json["username"],
-                    e_json["event"]["question_id"],
-                    e_json["event"]["assignment_id"],
-                )
+        # keep the latest time at which student accessed problem start page
+        # and the earliest first answer
+        timestamp = timestamps.get(key)
+        if (
+            timestamp is None
+            or event_type == "problem_show"
+            and e.timestamp > timestamp
+            or event_type == "problem_check"
+            and e.timestamp < timestamp
+        ):
+            timestamps[key] = e.timestamp
+
+    answers = get_answers_for_ltievent_keys(timestamps.keys(), [field])
+
+    updated = [
+        Answer(pk=answer["pk"], **{field: timestamps[key]})
+        for key, answer in answers.items()
+        if answer[field] is None
+        or event_type == "problem_show"
+        and answer[field] < timestamps[key]
+    ]
+    Answer.objects.bulk_update(
+        updated, [field], batch_size=LTIEVENT_REPLAY_BATCH_SIZE
+    )
 
-    logger.info("{} answer {} times updated".format(i, field))
-    return
+    logger.info("{} answer {} times updated".format(len(updated), field))
+    return len(updated)
 
 
 def get_student_activity_data(teacher):
-    # TODO: Refactor to avoid circular import
-    from datetime import datetime, timedelta
-    from .models import Answer, Student, StudentGroupAssignment
+    """
+    Returns the activity of the students of the current groups of the teacher
+    on their recent assignments, be they distributed (standalone) or lti.
+    The needed answers are read with a single query, with only the columns
+    used, and bucketed by group and assignment in one pass.
 
-    current_groups = teacher.current_groups.all()
+    Parameters
+    ----------
+    teacher : Teacher
+        Teacher for whom to get the activity
 
-    all_current_students = Student.objects.filter(groups__in=current_groups)
+    Returns
+    -------
+    Dict[StudentGroup, Dict[Union[StudentGroupAssignment, Assignment], Dict]]
+        Activity by group and assignment under the format
+            {
+                answers : List[Answer]
+                    Answers of the students of the group
+                new : List[Answer]
+                    Answers since the last dashboard access
+                percent_complete : int
+                    Percentage of the expected answers submitted
+            }
+    Dict[str, Dict[str, Dict[str, Any]]]
+        Data of the progress charts by group name and assignment identifier
+    """
+    # TODO: Refactor to avoid circular import
+    from .models import Answer, Assignment, Student, StudentGroupAssignment
 
-    last_week = datetime.utcnow().replace(tzinfo=pytz.utc) - timedelta(days=7)
-    next_week = datetime.utcnow().replace(tzinfo=pytz.utc) + timedelta(days=7)
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.utc)
+    last_week = now - datetime.timedelta(days=7)
+    next_week = now + datetime.timedelta(days=7)
+    three_months_ago = now - datetime.timedelta(days=90)
 
     if not teacher.last_dashboard_access:
         teacher.last_dashboard_access = last_week
 
+    current_groups = list(teacher.current_groups.all())
+
+    group_students = defaultdict(set)
+    student_groups = defaultdict(list)
+    for group, username in Student.groups.through.objects.filter(
+        studentgroup__in=current_groups
+    ).values_list("studentgroup", "student__student__username"):
+        group_students[group].add(username)
+        student_groups[username].append(group)
+    all_current_students = Student.objects.filter(
+        groups__in=current_groups
+    ).values("student__username")
+
     # Standalone
     standalone_assignments_all = StudentGroupAssignment.objects.filter(
-        group__in=current_groups
-    ).filter(distribution_date__isnull=False)
+        group__in=current_groups, distribution_date__isnull=False
+    )
 
-    standalone_assignments = standalone_assignments_all.filter(
-        distribution_date__gte=last_week, due_date__lte=next_week
+    standalone_assignments = list(
+        standalone_assignments_all.filter(
+            distribution_date__gte=last_week, due_date__lte=next_week
+        ).select_related("assignment")
     )
 
     # if in between semesters, find most recent standalone assignment
-    if standalone_assignments.count() == 0:
-        try:
-            last_assignment = standalone_assignments_all.latest("due_date")
-            standalone_assignments = StudentGroupAssignment.objects.filter(
-                pk=last_assignment.pk
-            )
-        except StudentGroupAssignment.DoesNotExist:
-            standalone_assignments = StudentGroupAssignment.objects.none()
-
-    # print(standalone_assignments)
-
-    standalone_answers = Answer.objects.filter(
-        assignment__in=standalone_assignments.values("assignment")
-    ).filter(user_token__in=all_current_students.values("student__username"))
+    if not standalone_assignments:
+        last_assignment = (
+            standalone_assignments_all.select_related("assignment")
+            .order_by("-due_date")
+            .first()
+        )
+        if last_assignment is not None:
+            standalone_assignments = [last_assignment]
 
     # LTI
-    lti_assignments = teacher.assignments.exclude(
-        identifier__in=standalone_assignments_all.values(
-            "assignment__identifier"
-        )
+    lti_assignments = list(
+        teacher.assignments.exclude(
+            identifier__in=standalone_assignments_all.values(
+                "assignment__identifier"
+            )
+        ).annotate(n_questions=Count("questions"))
     )
 
-    # print(lti_assignments)
-
-    lti_answers = Answer.objects.filter(assignment__in=lti_assignments).filter(
-        user_token__in=all_current_students.values("student__username")
+    lti_answers = Answer.objects.filter(
+        Answer.student_filter(all_current_students),
+        assignment__in=[a.pk for a in lti_assignments],
     )
 
     # logic to infer most recent lti assignments
-    recent_assignments_list = (
+    recent_assignments = set(
         lti_answers.filter(datetime_second__gte=last_week)
-        .order_by("-datetime_second")
         .values_list("assignment_id", flat=True)
-    )
-    recent_assignments = lti_assignments.filter(
-        identifier__in=recent_assignments_list
+        .order_by()
+        .distinct()
     )
     # if in between semesters, simply get assignment of most recent answer
-    if len(recent_assignments) == 0 and lti_answers.count() > 0:
-        print((lti_answers.count()))
-        most_recent_lti_assignment = lti_answers.latest(
-            "datetime_second"
-        ).assignment
-        print("most recent lti answer")
-        recent_assignments = lti_assignments.filter(
-            identifier=most_recent_lti_assignment.identifier
+    if not recent_assignments:
+        most_recent_lti_assignment = (
+            lti_answers.order_by("-datetime_second")
+            .values_list("assignment_id", flat=True)
+            .first()
         )
+        if most_recent_lti_assignment is not None:
+            recent_assignments = {most_recent_lti_assignment}
 
     # drop any assignment whose last answer is older than 3 months
-    three_months_ago = datetime.utcnow().replace(tzinfo=pytz.utc) + timedelta(
-        days=90
+    if recent_assignments:
+        recent_assignments -= {
+            assignment
+            for assignment, last_answer in Answer.objects.filter(
+                assignment__in=recent_assignments
+            )
+            .values_list("assignment")
+            .annotate(last_answer=Max("datetime_second"))
+            .order_by()
+            if last_answer is None or last_answer < three_months_ago
+        }
+
+    n_questions = {a.pk: a.n_questions for a in lti_assignments}
+    n_questions.update(
+        Assignment.objects.filter(
+            identifier__in={ga.assignment_id for ga in standalone_assignments}
+        )
+        .values_list("identifier")
+        .annotate(n=Count("questions"))
+        .order_by()
     )
-    stale_lti_assignments = [
-        a.identifier
-        for a in recent_assignments
-        if a.answer_set.latest("datetime_second").datetime_second
-        < three_months_ago
-    ]
-    # print("recent_assignments")
-    # print(recent_assignments)
-    # print("stale")
-    # print(stale_lti_assignments)
-    if len(stale_lti_assignments) > 0:
-        recent_assignments = recent_assignments.exclude(
-            identifier__in=stale_lti_assignments
+
+    # Answers of the students to all the assignments, bucketed by group and
+    # assignment
+    answers = defaultdict(list)
+    for answer in (
+        Answer.objects.filter(
+            Q(
+                assignment__in={
+                    ga.assignment_id for ga in standalone_assignments
+                }
+            )
+            | Q(assignment__in=recent_assignments),
+            Answer.student_filter(all_current_students),
+        )
+        .only(
+            "assignment",
+            "user_token",
+            "datetime_start",
+            "datetime_first",
+            "datetime_second",
+        )
+        .order_by("pk")
+    ):
+        for group in student_groups[answer.user_token]:
+            answers[(group, answer.assignment_id)].append(answer)
+
+    def is_new(answer):
+        return any(
+            date and date > teacher.last_dashboard_access
+            for date in (
+                answer.datetime_start,
+                answer.datetime_first,
+                answer.datetime_second,
+            )
         )
 
-    lti_answers = lti_answers.filter(assignment_id__in=recent_assignments)
+    def get_activity(group, assignment):
+        answers_ = answers[(group.pk, assignment.pk)]
+        return {
+            "answers": answers_,
+            "new": [a for a in answers_ if is_new(a)],
+            "percent_complete": int(
+                100.0
+                * len(answers_)
+                / (len(group_students[group.pk]) * n_questions[assignment.pk])
+            ),
+        }
 
     all_answers_by_group = {}
     for g in current_groups:
         all_answers_by_group[g] = {}
-        student_list = g.student_set.all().values_list(
-            "student__username", flat=True
-        )
-        if len(student_list) > 0:
+        if group_students[g.pk]:
             # Keyed on studentgroupassignment
             for ga in standalone_assignments:
-                if (
-                    ga.assignment.questions.count() > 0
-                    and ga in g.studentgroupassignment_set.all()
-                ):
-                    answers = [
-                        a
-                        for a in standalone_answers
-                        if a.user_token in student_list
-                        and a.assignment == ga.assignment
-                    ]
-                    # print("standalone keys")
-                    # print(g, ga)
-                    # print(len(answers))
-                    all_answers_by_group[g][ga] = {}
-                    all_answers_by_group[g][ga]["answers"] = answers
-                    all_answers_by_group[g][ga]["new"] = [
-                        a
-                        for a in standalone_answers
-                        if a.user_token in student_list
-                        and a.assignment == ga.assignment
-                        and (
-                            (
-                                a.datetime_start
-                                and a.datetime_start
-                                > teacher.last_dashboard_access
-                            )
-                            or (
-                                a.datetime_first
-                                and a.datetime_first
-                                > teacher.last_dashboard_access
-                            )
-                            or (
-                                a.datetime_second
-                                and a.datetime_second
-                                > teacher.last_dashboard_access
-                            )
-                        )
-                    ]
-                    all_answers_by_group[g][ga]["percent_complete"] = int(
-                        100.0
-                        * len(all_answers_by_group[g][ga]["answers"])
-                        / (len(student_list) * ga.assignment.questions.count())
+                if n_questions[ga.assignment_id] > 0 and ga.group_id == g.pk:
+                    all_answers_by_group[g][ga] = get_activity(
+                        g, ga.assignment
                     )
 
             # Keyed on assignment
             for l in lti_assignments:  # noqa
-                answers = [
-                    a
-                    for a in lti_answers
-                    if a.user_token in student_list and a.assignment == l
-                ]
-                if l.questions.count() > 0 and len(answers) > 0:
-                    # print("lti keys")
-                    # print(l, g)
-                    # print(len(answers))
-                    all_answers_by_group[g][l] = {}
-                    all_answers_by_group[g][l]["answers"] = answers
-                    all_answers_by_group[g][l]["new"] = [
-                        a
-                        for a in lti_answers
-                        if a.user_token in student_list
-                        and a.assignment == l
-                        and (
-                            (
-                                a.datetime_start
-                                and a.datetime_start
-                                > teacher.last_dashboard_access
-                            )
-                            or (
-                                a.datetime_first
-                                and a.datetime_first
-                                > teacher.last_dashboard_access
-                            )
-                            or (
-                                a.datetime_second
-                                and a.datetime_second
-                                > teacher.last_dashboard_access
-                            )
-                        )
-                    ]
-                    all_answers_by_group[g][l]["percent_complete"] = int(
-                        100.0
-                        * len(all_answers_by_group[g][l]["answers"])
-                        / (len(student_list) * l.questions.count())
-                    )
+                if (
+                    l.pk in recent_assignments
+                    and n_questions[l.pk] > 0
+                    and answers[(g.pk, l.pk)]
+                ):
+                    all_answers_by_group[g][l] = get_activity(g, l)
 
     # JSON
     json_data = {}
-    for group_key, group_assignments in list(all_answers_by_group.items()):
+    for group_key, group_assignments in all_answers_by_group.items():
         json_data[group_key.name] = {}
-        for key, value_list in list(group_assignments.items()):
+        for key, value_list in group_assignments.items():
             if len(value_list["answers"]) > 0:
-                try:
+                first_answer = value_list["answers"][0]
+                last_answer = value_list["answers"][-1]
+                if isinstance(key, StudentGroupAssignment):
                     assignment = key.assignment
-                    id = key.assignment.identifier
-
-                    date = (
-                        value_list["answers"][0].datetime_first
-                        if value_list["answers"][0].datetime_first
-                        else value_list["answers"][0].datetime_second
+                    start_date = min(
+                        key.distribution_date,
+                        first_answer.datetime_first
+                        or first_answer.datetime_second,
                     )
-
-                    if key.distribution_date < date:
-                        start_date = key.distribution_date
-                    else:
-                        start_date = date
-
-                    date = (
-                        value_list["answers"][-1].datetime_first
-                        if value_list["answers"][-1].datetime_first
-                        else value_list["answers"][-1].datetime_second
+                    end_date = max(
+                        key.due_date,
+                        last_answer.datetime_first
+                        or last_answer.datetime_second,
                     )
-
-                    if key.due_date > date:
-                        end_date = key.due_date
-                    else:
-                        end_date = date
-                except Exception:
+                else:
                     assignment = key
-                    id = key.identifier
-                    start_date = value_list["answers"][0].datetime_first
-                    end_date = value_list["answers"][-1].datetime_first
-
-                json_data[group_key.name][id] = {}
-                json_data[group_key.name][id]["distribution_date"] = str(
-                    start_date
-                )
-                json_data[group_key.name][id]["due_date"] = str(end_date)
-                json_data[group_key.name][id]["last_login"] = str(
-                    teacher.last_dashboard_access
-                )
-                json_data[group_key.name][id]["now"] = str(
-                    datetime.utcnow().replace(tzinfo=pytz.utc)
-                )
-                json_data[group_key.name][id]["total"] = (
-                    group_key.student_set.count()
-                    * assignment.questions.count()
-                )
-                json_data[group_key.name][id]["answers"] = []
-                for answer in value_list["answers"]:
-                    json_data[group_key.name][id]["answers"].append(
+                    start_date = first_answer.datetime_first
+                    end_date = last_answer.datetime_first
+                id = assignment.identifier
+
+                json_data[group_key.name][id] = {
+                    "distribution_date": str(start_date),
+                    "due_date": str(end_date),
+                    "last_login": str(teacher.last_dashboard_access),
+                    "now": str(now),
+                    "total": len(group_students[group_key.pk])
+                    * n_questions[assignment.pk],
+                    "answers": [
                         str(
                             answer.datetime_first
                             if answer.datetime_first
                             else answer.datetime_second
                         )
-                    )
+                        for answer in value_list["answers"]
+                    ],
+                }
 
     return all_answers_by_group, json_data
@@ -136,7 +136,7 @@ def collection_paginate(request):
             "assignment_data": assignment_data,
         }
 
-        for assignment in assignments:
+        for assignment in page_assignments:
             (
                 context["assignment_data"][assignment.pk],
                 q_students,
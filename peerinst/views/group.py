@@ -2,6 +2,7 @@ import json
 import re
 import logging
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
 from django.http import HttpResponse, JsonResponse
@@ -303,7 +304,11 @@ def send_student_assignment(req, assignment_hash, teacher, group, assignment):
 def get_assignment_student_progress(
     req, assignment_hash, teacher, group, assignment
 ):
-    data = {"progress": assignment.student_progress}
+    data = {
+        "progress": assignment.get_student_progress(
+            cache_timeout=settings.STUDENT_PROGRESS_CACHE_TIMEOUT
+        )
+    }
 
     return JsonResponse(data)
 
@@ -54,6 +54,10 @@ def get_question_annotation_counts(discipline_title, annotator, assignment_id):
             identifier=assignment_id
         ).questions.order_by("assignmentquestions__rank")
 
+    questions_qs = questions_qs.select_related("statistics").prefetch_related(
+        "answerchoice_set"
+    )
+
     # FIXME:
     translation_table = str.maketrans("ABCDEFG", "1234567")
 
@@ -18,6 +18,7 @@ from tos.models import Consent
 from ..models import (
     Student,
     StudentAssignment,
+    StudentAssignmentResults,
     StudentGroup,
     StudentGroupAssignment,
     StudentGroupMembership,
@@ -254,6 +255,13 @@ def index_page(req):
 
     groups = StudentGroupMembership.objects.filter(student=student)
 
+    student_assignments = (
+        StudentAssignment.objects.filter(student=student)
+        .select_related("group_assignment__assignment")
+        .order_by("-group_assignment__due_date")
+    )
+    results = StudentAssignmentResults.get(student_assignments)
+
     assignments = {
         group: [
             {
@@ -270,12 +278,11 @@ def index_page(req):
                         },
                     ),
                 ),
-                "results": assignment.results,
-                "done": assignment.completed,
+                "results": results[assignment.pk].aggregated_results,
+                "done": results[assignment.pk].completed,
             }
-            for assignment in StudentAssignment.objects.filter(
-                student=student, group_assignment__group=group.group
-            ).order_by("-group_assignment__due_date")
+            for assignment in student_assignments
+            if assignment.group_assignment.group_id == group.group_id
         ]
         for group in groups
     }
@@ -462,6 +469,15 @@ def join_group(req, student):
     else:
         protocol = "https"
 
+    student_assignments = (
+        StudentAssignment.objects.filter(
+            student=student, group_assignment__group=group
+        )
+        .select_related("group_assignment__assignment")
+        .order_by("-group_assignment__due_date")
+    )
+    results = StudentAssignmentResults.get(student_assignments)
+
     data = {
         "name": group.name,
         "title": group.title,
@@ -482,12 +498,10 @@ def join_group(req, student):
                         },
                     ),
                 ),
-                "results": assignment.results,
-                "done": assignment.completed,
+                "results": results[assignment.pk].aggregated_results,
+                "done": results[assignment.pk].completed,
             }
-            for assignment in StudentAssignment.objects.filter(
-                student=student, group_assignment__group=group
-            ).order_by("-group_assignment__due_date")
+            for assignment in student_assignments
         ],
         "student_id": membership.student_school_id,
         "student_id_needed": group.student_id_needed,
@@ -38,7 +38,7 @@ from ..models import (
 )
 from ..rationale_annotation import (
     choose_questions,
-    choose_rationales_no_quality,
+    choose_rationales_to_score,
 )
 from ..tasks import compute_gradebook_async
 from ..util import get_student_activity_data
@@ -78,7 +78,7 @@ def dashboard(req, teacher):
     student_activity_data, student_activity_json = get_student_activity_data(
         teacher=teacher
     )
-    rationales = choose_rationales_no_quality(teacher, n=1)
+    rationales = choose_rationales_to_score(teacher, n=1)
     context = {
         "data": json.dumps(data),
         "question_list": choose_questions(teacher).order_by("?")[:1],
@@ -272,7 +272,7 @@ def rationales_to_score(req, teacher):
     -------
     HttpResponse
     """
-    rationales = choose_rationales_no_quality(teacher, n=1)
+    rationales = choose_rationales_to_score(teacher, n=1)
 
     return TemplateResponse(
         req,
@@ -2,6 +2,7 @@ import json
 import logging
 import random
 import re
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -14,16 +15,23 @@ from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import Group, User
 from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 
 # reports
-from django.db.models import Count, Q
+from django.db.models import Count, Exists, OuterRef, Q
 from django.db.models.expressions import Func
 from django.forms import Textarea, inlineformset_factory
 
 # blink
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template import loader
 from django.template.response import TemplateResponse
@@ -33,6 +41,7 @@ from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import get_language
+from django.utils.translation import ugettext
 from django.views.decorators.http import require_POST, require_safe
 from django.views.generic import DetailView
 from django.views.generic.base import TemplateView, View
@@ -49,8 +58,9 @@ from dalite.views.errors import response_400, response_404
 # tos
 from tos.models import Consent, Tos
 
-from .. import admin, forms, models, rationale_choice
+from .. import admin, events, forms, models, rationale_choice
 from ..admin_views import get_question_rationale_aggregates
+from ..lti import sync_lti_membership
 from ..mixins import (
     LoginRequiredMixin,
     NoStudentsMixin,
@@ -63,7 +73,6 @@ from ..models import AnswerChoice  # LtiEvent,
 from ..models import (
     Answer,
     Assignment,
-    BlinkAnswer,
     BlinkAssignment,
     BlinkAssignmentQuestion,
     BlinkQuestion,
@@ -73,6 +82,7 @@ from ..models import (
     Discipline,
     NewUserRequest,
     Question,
+    QuestionSearchTerm,
     RationaleOnlyQuestion,
     ShownRationale,
     Student,
@@ -86,11 +96,10 @@ from ..models import (
 )
 from ..tasks import mail_managers_async
 from ..util import (
-    SessionStageData,
+    StageData,
     get_object_or_none,
     get_student_activity_data,
     int_or_none,
-    question_search_function,
     report_data_by_assignment,
     report_data_by_question,
     report_data_by_student,
@@ -100,7 +109,6 @@ from ..stopwords import fr, en
 
 from course_flow.views import setup_link_to_group, setup_unlink_from_group
 
-LOGGER = logging.getLogger(__name__)
 LOGGER_teacher_activity = logging.getLogger("teacher_activity")
 
 
@@ -885,6 +893,21 @@ class QuestionMixin(object):
 
         return context
 
+    def get_student(self):
+        """
+        Returns the student answering the question, if any.
+
+        Returns
+        -------
+        Optional[Student]
+            Student of the user
+        """
+        if not hasattr(self, "_student"):
+            self._student = Student.objects.filter(
+                student=self.request.user
+            ).first()
+        return self._student
+
     def send_grade(self):
         if not self.lti_data:
             # We are running outside of an LTI context, so we don't need to
@@ -1016,45 +1039,20 @@ class QuestionFormView(QuestionMixin, FormView):
         if edx_org is not None:
             event["context"]["org_id"] = edx_org
 
-        # Write JSON to log file
-        LOGGER.info(json.dumps(event))
-        # lti_event = LtiEvent(
-        #     event_type=name,
-        #     event_log=json.dumps(event),
-        #     username=self.user_token,
-        #     assignment_id=self.assignment.identifier,
-        #     question_id=self.question.pk,
-        # )
-        # lti_event.save()
+        # Written in the background by the destinations of EVENT_SINKS
+        events.emit(event)
 
         if self.lti_data:
-            course_title = self.lti_data.edx_lti_parameters.get(
-                "context_title"
-            )
-
-            try:
-                group = StudentGroup.objects.get(name=course_id)
-            except StudentGroup.DoesNotExist:
-                if course_title:
-                    group = StudentGroup(name=course_id, title=course_title)
-                else:
-                    group = StudentGroup(name=course_id)
-                group.save()
-
-            # If teacher_id specified, add teacher to group
-            teacher_hash = self.lti_data.edx_lti_parameters.get(
-                "custom_teacher_id"
+            sync_lti_membership(
+                self.request.user,
+                course_id,
+                course_title=self.lti_data.edx_lti_parameters.get(
+                    "context_title"
+                ),
+                teacher_hash=self.lti_data.edx_lti_parameters.get(
+                    "custom_teacher_id"
+                ),
             )
-            if teacher_hash is not None:
-                teacher = Teacher.get(teacher_hash)
-                if teacher not in group.teacher.all():
-                    group.teacher.add(teacher)
-                    teacher.current_groups.add(group)
-                    teacher.save()
-
-            # If this user is a student, add group to student
-            if hasattr(self.request.user, "student"):
-                self.request.user.student.groups.add(group)
 
     def submission_error(self):
         messages.error(
@@ -1119,11 +1117,9 @@ class QuestionReviewBaseView(QuestionFormView):
             self.choose_rationales = rationale_choice.algorithms[
                 self.question.rationale_selection_algorithm
             ]
-        self.rationale_choices = self.stage_data.get("rationale_choices")
-        if self.rationale_choices is not None:
-            # The rationales we stored in the session have already been
-            # HTML-escaped – mark them as safe to avoid double-escaping
-            self.mark_rationales_safe(escape_html=False)
+        rationale_choices = self.stage_data.get("rationale_choices")
+        if rationale_choices is not None:
+            self.load_rationale_choices(rationale_choices)
             return
         # Make the choice of rationales deterministic, so rationales won't
         # change when reloading the page after clearing the session.
@@ -1140,7 +1136,54 @@ class QuestionReviewBaseView(QuestionFormView):
             self.add_fake_attributions(rng)
         else:
             self.mark_rationales_safe(escape_html=True)
-        self.stage_data.update(rationale_choices=self.rationale_choices)
+        # Only the ids are stored, the texts are fetched again when needed
+        self.stage_data.update(
+            rationale_choices=[
+                (choice, label, [pk for pk, text in rationales])
+                for choice, label, rationales in self.rationale_choices
+            ]
+        )
+
+    def load_rationale_choices(self, rationale_choices):
+        """
+        Rebuilds the rationale choices, with their texts, from the ids kept in
+        the stage data. Rationales deleted since they were chosen are skipped.
+        """
+        texts = dict(
+            models.Answer.objects.filter(
+                pk__in=[
+                    pk
+                    for choice, label, pks in rationale_choices
+                    for pk in pks
+                    if pk is not None
+                ]
+            ).values_list("pk", "rationale")
+        )
+        fake_attributions = self.stage_data.get("fake_attributions") or {}
+
+        def format_rationale(pk):
+            if pk is None:
+                return escape(ugettext(rationale_choice.OWN_RATIONALE))
+            if str(pk) in fake_attributions:
+                return format_html(
+                    "<q>{}</q> ({}, {})",
+                    texts[pk],
+                    *fake_attributions[str(pk)]
+                )
+            return escape(texts[pk])
+
+        self.rationale_choices = [
+            (
+                choice,
+                label,
+                [
+                    (pk, format_rationale(pk))
+                    for pk in pks
+                    if pk is None or pk in texts
+                ],
+            )
+            for choice, label, pks in rationale_choices
+        ]
 
     def mark_rationales_safe(self, escape_html):
         if escape_html:
@@ -1169,7 +1212,7 @@ class QuestionReviewBaseView(QuestionFormView):
                     attributed_rationales.append((id, text))
                     continue
                 attribution = rng.choice(usernames), rng.choice(countries)
-                fake_attributions[id] = attribution
+                fake_attributions[str(id)] = attribution
                 formatted_rationale = format_html(
                     "<q>{}</q> ({}, {})", text, *attribution
                 )
@@ -1210,35 +1253,41 @@ class QuestionSequentialReviewView(QuestionReviewBaseView):
     form_class = forms.SequentialReviewForm
 
     def select_next_rationale(self):
-        rationale_sequence = self.stage_data.get("rationale_sequence")
-        if rationale_sequence:
-            # We already have selected the rationales – just take the next one.
-            self.current_rationale = rationale_sequence[
-                self.stage_data.get("rationale_index")
-            ]
-            self.current_rationale[2] = mark_safe(self.current_rationale[2])
-            return
         self.choose_rationales = rationale_choice.simple_sequential
         self.determine_rationale_choices()
-        # Select alternating rationales from the lists of rationales for the
-        # different answer choices.  Skip the "I stick with my own rationale"
-        # option marked by id == None.
-        rationale_sequence = list(
-            roundrobin(
-                [
-                    (id, label, rationale)
-                    for id, rationale in rationales
-                    if id is not None
-                ]
-                for choice, label, rationales in self.rationale_choices
+        rationale_sequence = self.stage_data.get("rationale_sequence")
+        if not rationale_sequence:
+            # Select alternating rationales from the lists of rationales for
+            # the different answer choices.  Skip the "I stick with my own
+            # rationale" option marked by id == None.
+            rationale_sequence = list(
+                roundrobin(
+                    [id for id, rationale in rationales if id is not None]
+                    for choice, label, rationales in self.rationale_choices
+                )
             )
+            self.stage_data.update(
+                rationale_sequence=rationale_sequence,
+                rationale_votes={},
+                rationale_index=0,
+            )
+        current = rationale_sequence[self.stage_data.get("rationale_index")]
+        self.current_rationale = next(
+            (
+                [id, label, rationale]
+                for choice, label, rationales in self.rationale_choices
+                for id, rationale in rationales
+                if id == current
+            ),
+            None,
         )
-        self.current_rationale = rationale_sequence[0]
-        self.stage_data.update(
-            rationale_sequence=rationale_sequence,
-            rationale_votes={},
-            rationale_index=0,
-        )
+        if self.current_rationale is None:
+            self.start_over(
+                _(
+                    "The rationale to review does not exist anymore. Please "
+                    "start over with the question."
+                )
+            )
 
     def get_context_data(self, **kwargs):
         context = super(QuestionSequentialReviewView, self).get_context_data(
@@ -1253,7 +1302,7 @@ class QuestionSequentialReviewView(QuestionReviewBaseView):
         rationale_votes = self.stage_data.get("rationale_votes")
         rationale_index = self.stage_data.get("rationale_index")
         current_rationale = rationale_sequence[rationale_index]
-        rationale_votes[current_rationale[0]] = form.cleaned_data["vote"]
+        rationale_votes[str(current_rationale)] = form.cleaned_data["vote"]
         rationale_index += 1
         self.stage_data.update(
             rationale_index=rationale_index, rationale_votes=rationale_votes
@@ -1357,6 +1406,7 @@ class QuestionReviewView(QuestionReviewBaseView):
             second_answer_choice=self.second_answer_choice,
             chosen_rationale=chosen_rationale,
             user_token=self.user_token,
+            student=self.get_student(),
             datetime_start=self.datetime_start,
             datetime_first=self.datetime_first,
             datetime_second=datetime.now(pytz.utc),
@@ -1629,7 +1679,7 @@ def question(request, assignment_id, question_id):
         question = get_object_or_404(RationaleOnlyQuestion, pk=question_id)
 
     custom_key = str(assignment.pk) + ":" + str(question.pk)
-    stage_data = SessionStageData(request.session, custom_key)
+    stage_data = StageData(request.session, custom_key)
     user_token = request.user.username
     view_data = dict(
         request=request,
@@ -2642,7 +2692,7 @@ def collection_search(request):
             context={
                 "paginator": query_subset,
                 "search_results": query,
-                "count": len(query_all),
+                "count": paginator.count,
                 "previous_search_string": search_terms,
                 "type": type,
             },
@@ -2756,41 +2806,19 @@ def question_search(request):
 
         # if meta_search:
         #    search_list = filter(meta_search, search_list)
-        is_english = get_language() == "en"
-        # All matching questions
-
-        search_string_split_list = search_string.split()
-        for string in search_string.split():
-            if is_english and string in en:
-                search_string_split_list.remove(string)
-            elif not is_english and string in fr:
-                search_string_split_list.remove(string)
         search_terms = [search_string]
-        if len(search_string_split_list) > 1:
-            search_terms.extend(search_string_split_list)
 
-        query = []
-        query_all = []
-        # by searching first for full string, and then for constituent parts,
-        # and preserving order, the results should rank the items higher to the
-        # top that have the entire search_string included
-        query_meta = {}
-        for term in search_terms:
-            query_term = question_search_function(
-                term, search_list, (type == "assignment" or type == "blink")
+        query_all = (
+            QuestionSearchTerm.search(
+                search_string, search_list.exclude(id__in=q_qs)
             )
-            query_term = query_term.exclude(id__in=q_qs).distinct()
-
-            query_term = [
-                q
-                for q in query_term
-                if q not in query_all
-                and (q.answerchoice_set.count() > 0 or q.type == "RO")
-            ]
-
-            query_meta[term] = query_term
-
-            query_all.extend(query_term)
+            .annotate(
+                has_choices=Exists(
+                    AnswerChoice.objects.filter(question=OuterRef("pk"))
+                )
+            )
+            .filter(Q(has_choices=True) | Q(type="RO"))
+        )
 
         paginator = Paginator(query_all, 50)
         try:
@@ -2800,16 +2828,14 @@ def question_search(request):
         except EmptyPage:
             query_subset = paginator.page(paginator.num_pages)
 
-        query = []
-
-        for term in list(query_meta.keys()):
-            query_dict = {}
-            query_dict["term"] = term
-            query_dict["questions"] = [
-                q for q in query_meta[term] if q in query_subset.object_list
-            ]
-            query_dict["count"] = len(query_dict["questions"])
-            query.append(query_dict)
+        questions = list(query_subset.object_list)
+        query = [
+            {
+                "term": search_string,
+                "questions": questions,
+                "count": len(questions),
+            }
+        ]
 
         return TemplateResponse(
             request,
@@ -2818,7 +2844,7 @@ def question_search(request):
                 "paginator": query_subset,
                 "search_results": query,
                 "form_field_name": form_field_name,
-                "count": len(query_all),
+                "count": paginator.count,
                 "previous_search_string": search_terms,
                 "assignment": assignment,
                 "type": type,
@@ -2833,55 +2859,101 @@ def question_search(request):
 def blink_get_current_url(request, username):
     """View to check current question url for teacher."""
 
-    try:
-        # Get teacher
-        teacher = Teacher.objects.get(user__username=username)
-    except Exception:
-        return HttpResponse("Teacher does not exist")
+    key = BlinkQuestion.current_url_cache_key(username)
+    action = cache.get(key)
+    if action is None:
+        try:
+            # Get teacher
+            teacher = Teacher.objects.get(user__username=username)
+        except Exception:
+            return HttpResponse("Teacher does not exist")
+        action = _get_blink_current_url(teacher)
+        cache.set(key, action, settings.BLINK_CACHE_TIMEOUT)
+
+    return JsonResponse({"action": action})
+
 
+def _get_blink_current_url(teacher):
     try:
         # Return url of current active blinkquestion, if any
         blinkquestion = teacher.blinkquestion_set.get(active=True)
-        url = reverse("blink-question", kwargs={"pk": blinkquestion.pk})
-        return JsonResponse({"action": url})
+        return reverse("blink-question", kwargs={"pk": blinkquestion.pk})
     except Exception:
         if not teacher.blinkassignment_set.filter(active=True).exists():
-            return JsonResponse({"action": "stop"})
+            return "stop"
         try:
             latest_round = BlinkRound.objects.filter(
                 question__in=teacher.blinkquestion_set.all()
             ).latest("activate_time")
-            url = reverse(
-                "blink-summary", kwargs={"pk": latest_round.question.pk}
+            return reverse(
+                "blink-summary", kwargs={"pk": latest_round.question_id}
             )
-            return JsonResponse({"action": url})
         except Exception:
-            return JsonResponse({"action": "stop"})
+            return "stop"
+
+
+def _get_blink_update(pk):
+    state = BlinkQuestion.get_state(pk)
+    blinkround = state["open_round"] or state["latest_round"]
+    count = (
+        sum(BlinkRound.get_tally(blinkround, len(state["labels"])))
+        if blinkround
+        else 0
+    )
+    return {
+        "count": count,
+        "status": state["active"],
+        "version": "{}-{}".format(count, int(state["active"])),
+    }
 
 
 def blink_count(request, pk):
 
-    blinkquestion = BlinkQuestion.objects.get(pk=pk)
     try:
-        blinkround = BlinkRound.objects.get(
-            question=blinkquestion, deactivate_time__isnull=True
-        )
-    except Exception:
-        try:
-            blinkround = BlinkRound.objects.filter(
-                question=blinkquestion
-            ).latest("deactivate_time")
-        except Exception:
-            return JsonResponse()
+        state = BlinkQuestion.get_state(pk)
+    except BlinkQuestion.DoesNotExist:
+        raise Http404
+    blinkround = state["open_round"] or state["latest_round"]
+    if blinkround is None:
+        return JsonResponse({})
 
     context = {}
-    context["count"] = BlinkAnswer.objects.filter(
-        voting_round=blinkround
-    ).count()
+    context["count"] = sum(
+        BlinkRound.get_tally(blinkround, len(state["labels"]))
+    )
 
     return JsonResponse(context)
 
 
+def blink_updates(request, pk):
+    """
+    Bounded long polling view returning the vote count and status of the
+    blink question, replacing separate calls to `blink_count` and
+    `blink_status`. If the `version` of the query string is given, the view
+    waits for the version to change for at most `BLINK_POLL_TIMEOUT` seconds,
+    only reading the cache, and returns an empty 304 response if it didn't.
+    """
+    version = request.GET.get("version")
+
+    deadline = time.time() + settings.BLINK_POLL_TIMEOUT
+    while True:
+        try:
+            update = _get_blink_update(pk)
+        except BlinkQuestion.DoesNotExist:
+            raise Http404
+        if update["version"] != version:
+            resp = JsonResponse(update)
+            break
+        if time.time() >= deadline:
+            resp = HttpResponseNotModified()
+            break
+        time.sleep(settings.BLINK_POLL_INTERVAL)
+
+    resp["ETag"] = '"{}"'.format(update["version"])
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
 def blink_close(request, pk):
 
     context = {}
@@ -2909,32 +2981,32 @@ def blink_close(request, pk):
 
 def blink_latest_results(request, pk):
 
-    results = {}
-
-    blinkquestion = BlinkQuestion.objects.get(pk=pk)
-    blinkround = BlinkRound.objects.filter(question=blinkquestion).latest(
-        "deactivate_time"
-    )
-
-    c = 1
-    for label, text in blinkquestion.question.get_choices():
-        results[label] = (
-            BlinkAnswer.objects.filter(question=blinkquestion)
-            .filter(voting_round=blinkround)
-            .filter(answer_choice=c)
-            .count()
+    try:
+        state = BlinkQuestion.get_state(pk)
+    except BlinkQuestion.DoesNotExist:
+        raise Http404
+    if state["latest_round"] is None:
+        return JsonResponse({})
+
+    results = dict(
+        zip(
+            state["labels"],
+            BlinkRound.get_tally(state["latest_round"], len(state["labels"])),
         )
-        c = c + 1
+    )
 
     return JsonResponse(results)
 
 
 def blink_status(request, pk):
 
-    blinkquestion = BlinkQuestion.objects.get(pk=pk)
+    try:
+        state = BlinkQuestion.get_state(pk)
+    except BlinkQuestion.DoesNotExist:
+        raise Http404
 
     response = {}
-    response["status"] = blinkquestion.active
+    response["status"] = state["active"]
 
     return JsonResponse(response)
 
@@ -1,14 +1,21 @@
 # -*- coding: utf-8 -*-
 
 
+import json
 import logging
+import os
+import time
 from datetime import datetime
-from itertools import chain, islice
+from multiprocessing import Pool
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min
 from django.db.models.functions import Lower
 
 from peerinst.models import Answer
+from peerinst.utils import batch
 from quality.models import LikelihoodCache, LikelihoodLanguage
 
 logger = logging.getLogger("quality")
@@ -17,7 +24,9 @@ logger = logging.getLogger("quality")
 class Command(BaseCommand):
     help = (
         "Compute and cache the likelihood for all answer rationales in all "
-        "languages."
+        "languages. Answers are split in primary key ranges which can be "
+        "computed by many processes, and completed ranges are saved so that "
+        "an interrupted run can be resumed."
     )
 
     def add_arguments(self, parser):
@@ -37,45 +46,196 @@ class Command(BaseCommand):
             default=64,
             help="Size of batches to use",
         )
+        parser.add_argument(
+            "-p",
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of processes to use",
+        )
+        parser.add_argument(
+            "-r",
+            "--range-size",
+            type=int,
+            default=10000,
+            help="Size of the primary key ranges given to each process",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default=os.path.join(
+                settings.BASE_DIR, "cache_likelihoods_checkpoint.json"
+            ),
+            help="File where completed ranges are saved",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the ranges completed by previous runs",
+        )
 
     def handle(self, *args, **options):
         discipline = options.get("discipline")
-        batch_size = options["batch_size"]
+        max_gram = options["max_gram"]
+        range_size = options["range_size"]
+        checkpoint = options["checkpoint"]
 
-        if discipline is None:
-            answers = Answer.objects.all()
-        else:
-            answers = Answer.objects.annotate(
-                discipline_lower=Lower("question__discipline__title")
-            ).filter(discipline_lower=discipline.lower())
+        bounds = get_answers(discipline).aggregate(
+            start=Min("pk"), stop=Max("pk")
+        )
+        if bounds["start"] is None:
+            print("There are no answers to compute.")
+            return
+        starts = range(bounds["start"], bounds["stop"] + 1, range_size)
 
-        n = answers.count() * LikelihoodLanguage.objects.count()
+        completed = {} if options["restart"] else read_checkpoint(checkpoint)
 
-        progress = 0
-        current = 0
+        languages = {
+            language.pk: language.language
+            for language in LikelihoodLanguage.objects.all()
+        }
+        tasks = []
+        for language in languages:
+            key = checkpoint_key(language, max_gram, discipline, range_size)
+            done = set(completed.get(key, []))
+            tasks.extend(
+                (
+                    language,
+                    max_gram,
+                    discipline,
+                    start,
+                    start + range_size,
+                    options["batch_size"],
+                )
+                for start in starts
+                if start not in done
+            )
+
+        n_ranges = len(starts) * len(languages)
+        print(
+            "{} - Computing {} of {} ranges with {} process(es)...".format(
+                datetime.now(), len(tasks), n_ranges, options["processes"]
+            )
+        )
 
-        for language in LikelihoodLanguage.objects.all().iterator():
-            for _answers in batch(answers.iterator(), batch_size):
-                likelihoods = LikelihoodCache.batch(
-                    _answers, language, options["max_gram"]
+        totals = {language: [0, 0.0] for language in languages}
+        start_time = time.time()
+
+        if options["processes"] > 1:
+            # each process needs its own connection
+            connections.close_all()
+            pool = Pool(
+                options["processes"], initializer=connections.close_all
+            )
+            results = pool.imap_unordered(cache_range, tasks)
+        else:
+            pool = None
+            results = map(cache_range, tasks)
+
+        try:
+            for i, (language, start, n, seconds) in enumerate(results, 1):
+                key = checkpoint_key(
+                    language, max_gram, discipline, range_size
                 )
-                progress = progress + float(len(likelihoods)) / n * 100
-                if discipline is None:
-                    print(
-                        "{} - ({:>6.2f}%) -".format(datetime.now(), progress)
-                        + " Computing likelihood for all answers in "
-                        + "{}...".format(language.language)
+                # the last range may still receive new answers
+                if start + range_size <= bounds["stop"]:
+                    completed.setdefault(key, []).append(start)
+                    write_checkpoint(checkpoint, completed)
+
+                totals[language][0] += n
+                totals[language][1] += seconds
+                print(
+                    "{} - ({:>6.2f}%) - ".format(
+                        datetime.now(), 100.0 * i / len(tasks)
                     )
-                else:
-                    print(
-                        "{} - ({:>6.2f}%) -".format(datetime.now(), progress)
-                        + " Computing likelihood for answers in "
-                        + "discipline {} in {}...".format(discipline, language)
+                    + "{} answers from {} in {} at {:.1f} answers/s".format(
+                        n,
+                        start,
+                        languages[language],
+                        n / seconds if seconds else 0,
                     )
+                )
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        for language, (n, seconds) in totals.items():
+            print(
+                "{}: {} answers at {:.1f} answers/s per process".format(
+                    languages[language], n, n / seconds if seconds else 0
+                )
+            )
+        elapsed = time.time() - start_time
+        print(
+            "Took {:.2f} seconds ({:.1f} answers/s)".format(
+                elapsed,
+                sum(n for n, _ in totals.values()) / elapsed if elapsed else 0,
+            )
+        )
+
+
+def get_answers(discipline=None):
+    if discipline is None:
+        return Answer.objects.all()
+    else:
+        return Answer.objects.annotate(
+            discipline_lower=Lower("question__discipline__title")
+        ).filter(discipline_lower=discipline.lower())
+
+
+def cache_range(task):
+    """
+    Computes and caches the likelihood of the answers with primary key in
+    [start, stop) for a language, skipping those already cached.
+
+    Parameters
+    ----------
+    task : Tuple[str, int, Optional[str], int, int, int]
+        Language, max gram, discipline, start, stop and batch size
+
+    Returns
+    -------
+    str
+        Language
+    int
+        Start of the range
+    int
+        Number of answers in the range
+    float
+        Seconds taken
+    """
+    language, max_gram, discipline, start, stop, batch_size = task
+    start_time = time.time()
+
+    language_ = LikelihoodLanguage.objects.get(pk=language)
+    answers = (
+        get_answers(discipline)
+        .filter(pk__gte=start, pk__lt=stop)
+        .only("pk", "rationale")
+        .order_by("pk")
+    )
+
+    n = 0
+    for answers_ in batch(answers.iterator(), batch_size):
+        n += len(LikelihoodCache.batch(answers_, language_, max_gram))
+
+    return language, start, n, time.time() - start_time
+
+
+def checkpoint_key(language, max_gram, discipline, range_size):
+    return "{}:{}:{}:{}".format(language, max_gram, discipline, range_size)
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
 
 
-def batch(iterable, size):
-    source_iter = iter(iterable)
-    while True:
-        batch_iter = islice(source_iter, size)
-        yield chain([next(batch_iter)], batch_iter)
+def write_checkpoint(path, completed):
+    tmp = "{}.tmp".format(path)
+    with open(tmp, "w") as f:
+        json.dump(completed, f)
+    os.replace(tmp, path)
@@ -13,6 +13,7 @@ __all__ = [
     "NegWordsCriterionRules",
     "Quality",
     "QualityCache",
+    "QualityPlan",
     "QualityType",
     "QualityUseType",
     "RejectedAnswer",
@@ -44,6 +45,6 @@ from .criterion import (
     SelectedAnswerCriterionRules,
     get_criterion,
 )
-from .quality import Quality, QualityCache, UsesCriterion
+from .quality import Quality, QualityCache, QualityPlan, UsesCriterion
 from .quality_type import QualityType, QualityUseType
 from .rejected_answer import RejectedAnswer
@@ -60,10 +60,14 @@ class Criterion(models.Model):
             ),
         )
 
-    def evaluate(self, answer, rules_pk):
+    def evaluate(self, answer, rules):
+        """
+        Evaluates the answer with the given rules, which may be the rules
+        instance or its primary key.
+        """
         raise NotImplementedError("This method has to be implemented.")
 
-    def batch_evaluate(self, answers, rules_pk):
+    def batch_evaluate(self, answers, rules):
         raise NotImplementedError("This method has to be implemented.")
 
     def save(self, *args, **kwargs):
@@ -100,6 +104,47 @@ class CriterionRules(models.Model):
     def get_or_create(*args, **kwargs):
         raise NotImplementedError("This method has to be implemented.")
 
+    @classmethod
+    def resolve(cls, rules):
+        """
+        Returns the rules if they are already an instance or reads them from
+        their primary key.
+
+        Parameters
+        ----------
+        rules : Union[CriterionRules, int]
+            Rules or their primary key
+
+        Returns
+        -------
+        CriterionRules
+            Instance
+        """
+        if isinstance(rules, cls):
+            return rules
+        return cls.objects.get(pk=rules)
+
+    def get_values(self):
+        """
+        Returns the value of each rule, read once per instance.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Value of each rule by name
+        """
+        if not hasattr(self, "_values"):
+            self._values = {rule: val["value"] for rule, val in self}
+        return self._values
+
+    def preload(self):
+        """
+        Reads everything the criterion needs from the database so that
+        evaluating with this instance doesn't. Rules depending on other
+        models should extend it.
+        """
+        self.get_values()
+
     def __iter__(self):
         return iter(
             {
@@ -15,7 +15,7 @@ from dalite.models.custom_fields import CommaSepField, ProbabilityField
 from quality.models.criterion.criterion import Criterion, CriterionRules
 from quality.models.quality_type import QualityType, QualityUseType
 
-from .model import create_model
+from .model import get_batch_model, get_model
 
 
 class LikelihoodLanguage(models.Model):
@@ -30,6 +30,24 @@ class LikelihoodLanguage(models.Model):
     def available(cls):
         return [instance.pk for instance in cls.objects.all()]
 
+    @classmethod
+    def warm_up(cls):
+        """
+        Loads the models of every language for each max gram used by the
+        existing rules so that the first evaluations don't have to.
+        """
+        max_grams = set(
+            LikelihoodCriterionRules.objects.values_list("max_gram", flat=True)
+        )
+        for language in cls.objects.all():
+            for max_gram in max_grams:
+                get_model(
+                    language.language,
+                    language.n_gram_urls,
+                    language.left_to_right,
+                    max_gram,
+                )
+
 
 class LikelihoodCriterion(Criterion):
     name = models.CharField(
@@ -64,11 +82,11 @@ class LikelihoodCriterion(Criterion):
 
         return criterion
 
-    def evaluate(self, answer, rules_pk):
-        rules = LikelihoodCriterionRules.objects.get(pk=rules_pk)
+    def evaluate(self, answer, rules):
+        rules = LikelihoodCriterionRules.resolve(rules)
 
-        languages = LikelihoodLanguage.objects.all()
-        other_languages = languages.exclude(language__in=rules.languages.all())
+        accepted_languages, other_languages = rules.get_languages()
+        languages = accepted_languages + other_languages
 
         language_likelihoods = {
             language.language: LikelihoodCache.get(
@@ -79,7 +97,7 @@ class LikelihoodCriterion(Criterion):
 
         likelihoods = [
             1 - min(1, exp(-sub(*language_likelihoods[language.language])))
-            for language in rules.languages.all()
+            for language in accepted_languages
         ] + [
             1
             - min(
@@ -90,22 +108,20 @@ class LikelihoodCriterion(Criterion):
                 ),
             )
             for other_language in other_languages
-            for language in rules.languages.all()
+            for language in accepted_languages
         ]
 
         likelihood = reduce(mul, likelihoods, 1) ** (1.0 / len(likelihoods))
 
         evaluation = {"version": self.version, "quality": likelihood}
-        evaluation.update(
-            {criterion: val["value"] for criterion, val in rules}
-        )
+        evaluation.update(rules.get_values())
         return evaluation
 
-    def batch_evaluate(self, answers, rules_pk):
-        rules = LikelihoodCriterionRules.objects.get(pk=rules_pk)
+    def batch_evaluate(self, answers, rules):
+        rules = LikelihoodCriterionRules.resolve(rules)
 
-        languages = LikelihoodLanguage.objects.all()
-        other_languages = languages.exclude(language__in=rules.languages.all())
+        accepted_languages, other_languages = rules.get_languages()
+        languages = accepted_languages + other_languages
 
         answers = list(answers)
 
@@ -122,7 +138,7 @@ class LikelihoodCriterion(Criterion):
                 - min(
                     1, exp(-sub(*language_likelihoods[language.language][i]))
                 )
-                for language in rules.languages.all()
+                for language in accepted_languages
             ]
             + [
                 1
@@ -134,7 +150,7 @@ class LikelihoodCriterion(Criterion):
                     ),
                 )
                 for other_language in other_languages
-                for language in rules.languages.all()
+                for language in accepted_languages
             ]
             for i in range(len(answers))
         ]
@@ -146,9 +162,7 @@ class LikelihoodCriterion(Criterion):
         ]
 
         for evaluation in evaluations:
-            evaluation.update(
-                {criterion: val["value"] for criterion, val in rules}
-            )
+            evaluation.update(rules.get_values())
 
         return evaluations
 
@@ -166,6 +180,39 @@ class LikelihoodCriterionRules(CriterionRules):
     def __str__(self):
         return "Rules {} for criterion likelihood".format(self.pk)
 
+    def get_languages(self):
+        """
+        Returns the accepted languages and the other available ones, read
+        once per instance.
+
+        Returns
+        -------
+        List[LikelihoodLanguage]
+            Accepted languages
+        List[LikelihoodLanguage]
+            Other languages
+        """
+        if not hasattr(self, "_languages"):
+            accepted = set(self.languages.values_list("pk", flat=True))
+            languages = list(LikelihoodLanguage.objects.all())
+            self._languages = (
+                [
+                    language
+                    for language in languages
+                    if language.pk in accepted
+                ],
+                [
+                    language
+                    for language in languages
+                    if language.pk not in accepted
+                ],
+            )
+        return self._languages
+
+    def preload(self):
+        super(LikelihoodCriterionRules, self).preload()
+        self.get_languages()
+
     @staticmethod
     def get_or_create(
         threshold=0.95, languages=["english", "french"], max_gram=3
@@ -236,15 +283,9 @@ class LikelihoodCache(models.Model):
     likelihood = ProbabilityField()
     likelihood_random = ProbabilityField()
 
-    @classmethod
-    def get(cls, answer, language, max_gram):
-        if isinstance(answer, str):
-            answer_pk = None
-            rationale = answer
-        else:
-            answer_pk = answer.pk
-            rationale = answer.rationale
-        hash_ = hashlib.md5(
+    @staticmethod
+    def _hash(rationale, language, max_gram):
+        return hashlib.md5(
             json.dumps(
                 {
                     "text": rationale,
@@ -253,18 +294,28 @@ class LikelihoodCache(models.Model):
                 }
             ).encode()
         ).hexdigest()
+
+    @classmethod
+    def get(cls, answer, language, max_gram):
+        if isinstance(answer, str):
+            answer_pk = None
+            rationale = answer
+        else:
+            answer_pk = answer.pk
+            rationale = answer.rationale
+        hash_ = cls._hash(rationale, language, max_gram)
         try:
             cache = cls.objects.get(hash=hash_)
             likelihood = cache.likelihood
             likelihood_random = cache.likelihood_random
         except cls.DoesNotExist:
-            predict = create_model(
+            predict = get_batch_model(
                 language.language,
                 language.n_gram_urls,
                 language.left_to_right,
                 max_gram,
             )
-            likelihood, likelihood_random = predict(rationale)
+            likelihood, likelihood_random = predict([rationale])[0]
             # Because multiple servers are used, sometimes the likelihood is
             # written to the db by the first server while the second one is
             # computing it. In these cases, the likelihood written to the db
@@ -285,6 +336,25 @@ class LikelihoodCache(models.Model):
 
     @classmethod
     def batch(cls, answers, language, max_gram):
+        """
+        Returns the likelihoods of all answers using one query to read the
+        cached ones and one to write the missing ones.
+
+        Parameters
+        ----------
+        answers : Iterable[Union[Answer, str]]
+            Answers or rationales to evaluate
+        language : LikelihoodLanguage
+            Language of the model
+        max_gram : int
+            Maximum n-gram length used
+
+        Returns
+        -------
+        List[Tuple[float, float]]
+            Log likelihood of each answer for the language and for a uniform
+            distribution
+        """
         answers = list(answers)
         pks = [
             None if isinstance(answer, str) else answer.pk
@@ -295,48 +365,50 @@ class LikelihoodCache(models.Model):
             for answer in answers
         ]
         hashes = [
-            hashlib.md5(
-                json.dumps(
-                    {
-                        "text": rationale,
-                        "language": language.language,
-                        "max_gram": max_gram,
-                    }
-                ).encode()
-            ).hexdigest()
+            cls._hash(rationale, language, max_gram)
             for rationale in rationales
         ]
 
-        likelihoods = []
-        for hash_ in hashes:
-            try:
-                cache = cls.objects.get(hash=hash_)
-                likelihoods.append((cache.likelihood, cache.likelihood_random))
-            except cls.DoesNotExist:
-                likelihoods.append(None)
+        likelihoods = {
+            hash_: (likelihood, likelihood_random)
+            for hash_, likelihood, likelihood_random in cls.objects.filter(
+                hash__in=set(hashes)
+            ).values_list("hash", "likelihood", "likelihood_random")
+        }
+
+        missing = {}
+        for pk, rationale, hash_ in zip(pks, rationales, hashes):
+            if hash_ not in likelihoods and hash_ not in missing:
+                missing[hash_] = (pk, rationale)
 
-        if not all(likelihoods):
-            predict = create_model(
+        if missing:
+            predict = get_batch_model(
                 language.language,
                 language.n_gram_urls,
                 language.left_to_right,
                 max_gram,
             )
-            for (i, likelihood), pk, rationale, hash_ in zip(
-                enumerate(likelihoods), pks, rationales, hashes
-            ):
-                if likelihood is None:
-                    _likelihood, likelihood_random = predict(rationale)
-                    try:
-                        cls.objects.create(
-                            answer=pk,
-                            language=language,
-                            hash=hash_,
-                            likelihood=_likelihood,
-                            likelihood_random=likelihood_random,
-                        )
-                    except IntegrityError:
-                        pass
-                    likelihoods[i] = (_likelihood, likelihood_random)
-
-        return likelihoods
+            predicted = predict(
+                [rationale for _, rationale in missing.values()]
+            )
+            likelihoods.update(zip(missing.keys(), predicted))
+            # Other servers may have written some of these in the meantime, in
+            # which case their values are kept in the db
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        answer=pk,
+                        language=language,
+                        hash=hash_,
+                        likelihood=likelihood,
+                        likelihood_random=likelihood_random,
+                    )
+                    for (hash_, (pk, _)), (
+                        likelihood,
+                        likelihood_random,
+                    ) in zip(missing.items(), predicted)
+                ],
+                ignore_conflicts=True,
+            )
+
+        return [likelihoods[hash_] for hash_ in hashes]
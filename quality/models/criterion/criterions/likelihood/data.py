@@ -4,12 +4,119 @@
 import io
 import os
 import pickle
+import tempfile
 import zipfile
+from contextlib import contextmanager
 from itertools import product
 
+import numpy as np
 import requests
 
 
+def read_compact_data(language, urls, left_to_right):
+    """
+    Reads the n-gram tables of the language in a compact format where each
+    table is a flat array of probabilities indexed by the position of the
+    characters in the alphabet (first character most significant). The arrays
+    are memory-mapped so that processes loading the same language share the
+    same pages.
+
+    Parameters
+    ----------
+    language : str
+        Language of the n-grams
+    urls : List[str]
+        Urls of the n-gram files, ordered by n
+    left_to_right : bool
+        If the language is read left to right
+
+    Returns
+    -------
+    Dict[str, Any]
+        Data under the format
+            {
+                alphabet: str
+                    Characters of the language
+                n_grams: Dict[int, np.ndarray]
+                    Probability of each n-gram, indexed by n
+                left_to_right: bool
+                    If the language is read left to right
+            }
+    """
+    path = os.path.join(os.path.dirname(__file__), ".data", language)
+    alphabet_path = os.path.join(path, "alphabet.txt")
+    gram_paths = [
+        os.path.join(path, "{}-grams.npy".format(gram + 1))
+        for gram in range(len(urls))
+    ]
+
+    if not os.path.exists(alphabet_path) or not all(
+        os.path.exists(gram_path) for gram_path in gram_paths
+    ):
+        data = read_data(language, urls, left_to_right)
+        alphabet = "".join(data["n_grams"][1].keys())
+        index = {c: i for i, c in enumerate(alphabet)}
+        for gram, gram_path in enumerate(gram_paths, 1):
+            # missing n-grams get the same probability as in `read_data`
+            n_grams = np.full(len(alphabet) ** gram, 1e-16, dtype=np.float64)
+            for n_gram, val in data["n_grams"][gram].items():
+                n_grams[encode(n_gram, index)] = val
+            with _atomic_write(gram_path, "wb") as f:
+                np.save(f, n_grams)
+        with _atomic_write(alphabet_path, "w", encoding="utf-8") as f:
+            f.write(alphabet)
+
+    with open(alphabet_path, "r", encoding="utf-8") as f:
+        alphabet = f.read()
+
+    return {
+        "alphabet": alphabet,
+        "n_grams": {
+            gram: np.load(gram_path, mmap_mode="r")
+            for gram, gram_path in enumerate(gram_paths, 1)
+        },
+        "left_to_right": left_to_right,
+    }
+
+
+@contextmanager
+def _atomic_write(path, mode, **kwargs):
+    # written under a unique temporary name, then renamed, so that other
+    # processes never read a partial file nor write to the same one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with io.open(fd, mode, **kwargs) as f:
+            yield f
+        # mkstemp only gives access to the owner
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def encode(n_gram, index):
+    """
+    Returns the position of the n-gram in its compact table.
+
+    Parameters
+    ----------
+    n_gram : Iterable[str]
+        Characters of the n-gram
+    index : Dict[str, int]
+        Position of each character in the alphabet
+
+    Returns
+    -------
+    int
+        Position of the n-gram
+    """
+    i = 0
+    for c in n_gram:
+        i = i * len(index) + index[c]
+    return i
+
+
 def read_data(language, urls, left_to_right):
     path = os.path.join(os.path.dirname(__file__), ".data", language)
 
@@ -1,83 +1,289 @@
 # -*- coding: utf-8 -*-
 
 
+import threading
 from functools import partial
 from itertools import chain
 from math import log
 
-from .data import read_data
+import numpy as np
+
+from .data import read_compact_data
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(language, urls, left_to_right, max_gram=3):
+    """
+    Returns the prediction function for the language and max gram, creating
+    it only the first time it's asked for in the process.
+
+    Parameters
+    ----------
+    language : str
+        Language of the model
+    urls : List[str]
+        Urls of the n-gram files, ordered by n
+    left_to_right : bool
+        If the language is read left to right
+    max_gram : int (default : 3)
+        Maximum n-gram length used
+
+    Returns
+    -------
+    Callable[[str], Tuple[float, float]]
+        Function returning the log likelihood of a text for the language and
+        for a uniform distribution
+    """
+    data, other = _get_data(language, urls, left_to_right, max_gram)
+    return partial(predict, data=data, other=other)
+
+
+def get_batch_model(language, urls, left_to_right, max_gram=3):
+    """
+    Returns the batch prediction function for the language and max gram,
+    sharing the data of `get_model`.
+
+    Parameters
+    ----------
+    language : str
+        Language of the model
+    urls : List[str]
+        Urls of the n-gram files, ordered by n
+    left_to_right : bool
+        If the language is read left to right
+    max_gram : int (default : 3)
+        Maximum n-gram length used
+
+    Returns
+    -------
+    Callable[[List[str]], List[Tuple[float, float]]]
+        Function returning the log likelihood of each text for the language
+        and for a uniform distribution
+    """
+    data, other = _get_data(language, urls, left_to_right, max_gram)
+    return partial(batch_predict, data=data, other=other)
+
+
+def clear_models():
+    """
+    Removes all models from the process registry.
+    """
+    with _models_lock:
+        _models.clear()
 
 
 def create_model(language, urls, left_to_right, max_gram=3):
+    data, other = _read_data(language, urls, left_to_right, max_gram)
+    return partial(predict, data=data, other=other)
 
-    data = {
-        gram: val
-        for gram, val in read_data(language, urls, left_to_right).items()
-        if len(gram) <= max_gram
-    }
-    data = read_data(language, urls, left_to_right)
+
+def _get_data(language, urls, left_to_right, max_gram):
+    key = (language, max_gram)
+    if key not in _models:
+        with _models_lock:
+            if key not in _models:
+                _models[key] = _read_data(
+                    language, urls, left_to_right, max_gram
+                )
+    return _models[key]
+
+
+def _read_data(language, urls, left_to_right, max_gram):
+    data = read_compact_data(language, urls, left_to_right)
     data["n_grams"] = {
         gram: val for gram, val in data["n_grams"].items() if gram <= max_gram
     }
+    data["index"] = {c: i for i, c in enumerate(data["alphabet"])}
 
     other = {
+        "alphabet": data["alphabet"],
+        "index": data["index"],
         "n_grams": {
-            gram: {g: 1.0 / len(val) for g in val.keys()}
+            gram: np.full(len(val), 1.0 / len(val))
             for gram, val in data["n_grams"].items()
         },
         "left_to_right": data["left_to_right"],
     }
 
-    return partial(predict, data=data, other=other)
+    return data, other
 
 
 def predict(text, data, other):
-    l1 = log_likelihood(text, data["n_grams"], data["left_to_right"])
-    l0 = log_likelihood(text, other["n_grams"], other["left_to_right"])
+    l1 = log_likelihood(
+        text, data["n_grams"], data["index"], data["left_to_right"]
+    )
+    l0 = log_likelihood(
+        text, other["n_grams"], other["index"], other["left_to_right"]
+    )
 
     return l1, l0
 
 
-def log_likelihood(text, ngrams, left_to_right):
-    text = "".join(c for c in text.lower() if c == " " or c in ngrams[1])
+def batch_predict(texts, data, other):
+    """
+    Vectorized version of `predict` for a list of texts. The results are the
+    same up to floating point summation order.
+    """
+    texts = list(texts)
+    encoded = encode_texts(texts, data["alphabet"], data["left_to_right"])
+    l1 = batch_log_likelihood(encoded, data["n_grams"], len(texts))
+    l0 = batch_log_likelihood(encoded, other["n_grams"], len(texts))
+    return list(zip(l1.tolist(), l0.tolist()))
+
+
+def encode_texts(texts, alphabet, left_to_right):
+    """
+    Encodes the characters of all texts as their position in the alphabet.
+
+    Parameters
+    ----------
+    texts : List[str]
+        Texts to encode
+    alphabet : str
+        Characters of the language
+    left_to_right : bool
+        If the language is read left to right
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Encoded texts under the format
+            {
+                chars: np.ndarray[int]
+                    Position of each character in the alphabet
+                texts: np.ndarray[int]
+                    Index of the text of each character
+                positions: np.ndarray[int]
+                    Position of each character in its word
+            }
+    """
+    codes = np.array(sorted(ord(c) for c in alphabet), dtype=np.int64)
+    order = np.argsort([ord(c) for c in alphabet])
+
+    # texts are separated by a space so words never span two texts
+    code_points = [
+        np.frombuffer((text.lower() + " ").encode("utf-32-le"), np.uint32)
+        for text in texts
+    ]
+    lengths = [len(c) for c in code_points]
+    code_points = (
+        np.concatenate(code_points).astype(np.int64)
+        if code_points
+        else np.empty(0, dtype=np.int64)
+    )
+    text_ids = np.repeat(np.arange(len(texts)), lengths)
+
+    i = np.minimum(np.searchsorted(codes, code_points), max(len(codes) - 1, 0))
+    in_alphabet = codes[i] == code_points if len(codes) else code_points < 0
+    is_space = code_points == ord(" ")
+
+    # characters which aren't in the alphabet nor spaces are removed
+    kept = in_alphabet | is_space
+    chars = np.where(in_alphabet, order[i], -1)[kept]
+    text_ids = text_ids[kept]
+
+    if not left_to_right:
+        chars = chars[::-1]
+        text_ids = text_ids[::-1]
+
+    is_char = chars >= 0
+    starts = is_char & ~np.concatenate(([False], is_char[:-1]))
+    start_indices = np.maximum.accumulate(
+        np.where(starts, np.arange(len(chars)), 0)
+    )
+    positions = np.arange(len(chars)) - start_indices
+
+    return {
+        "chars": chars[is_char],
+        "texts": text_ids[is_char],
+        "positions": positions[is_char],
+    }
+
+
+def batch_log_likelihood(encoded, ngrams, n_texts):
+    """
+    Computes the log likelihood of each encoded text.
+
+    Parameters
+    ----------
+    encoded : Dict[str, np.ndarray]
+        Texts as returned by `encode_texts`
+    ngrams : Dict[int, np.ndarray]
+        Probability of each n-gram in the compact format, indexed by n
+    n_texts : int
+        Number of texts
+
+    Returns
+    -------
+    np.ndarray[float]
+        Log likelihood of each text
+    """
+    chars = encoded["chars"]
+    positions = encoded["positions"]
+    n = len(ngrams)
+    size = len(ngrams[1])
+
+    # each character contributes the probability of the longest n-gram ending
+    # with it (up to n) given the n-gram preceding it
+    grams = np.minimum(positions + 1, n)
+    n_gram_ids = chars.copy()
+    log_likelihoods = np.zeros(len(chars))
+
+    mask = grams == 1
+    log_likelihoods[mask] = np.log(ngrams[1][chars[mask]])
+    for gram in range(2, n + 1):
+        n_gram_ids[1:] = n_gram_ids[:-1] * size + chars[1:]
+        mask = grams == gram
+        log_likelihoods[mask] = np.log(
+            ngrams[gram][n_gram_ids[mask]]
+            / ngrams[gram - 1][n_gram_ids[mask] // size]
+        )
+
+    return np.bincount(
+        encoded["texts"],
+        weights=log_likelihoods + 1e-16,
+        minlength=n_texts,
+    )
+
+
+def log_likelihood(text, ngrams, index, left_to_right):
+    text = "".join(c for c in text.lower() if c == " " or c in index)
     if not left_to_right:
         text = text[::-1]
-    words = [
-        [c for c in word.lower() if c in ngrams[1]] for word in text.split()
-    ]
+    words = [[index[c] for c in word] for word in text.split()]
 
-    if len(ngrams) == 1:
+    def p(gram, word):
+        i = 0
+        for c in word:
+            i = i * len(index) + c
+        return ngrams[gram][i]
+
+    n = len(ngrams)
+
+    if n == 1:
         return sum(
-            sum(
-                log(ngrams[1].get(word[i], 1e-16)) + 1e-16
-                for i in range(len(word))
-            )
+            sum(log(p(1, word[i : i + 1])) + 1e-16 for i in range(len(word)))
             for word in words
         )
     else:
         return sum(
             sum(
                 chain(
-                    (log(ngrams[1].get(word[0], 1e-16)) + 1e-16,),
+                    (log(p(1, word[:1])) + 1e-16,),
                     (
-                        log(
-                            ngrams[i].get("".join(word[:i]), 1e-16)
-                            / ngrams[i - 1].get("".join(word[: i - 1]), 1e-16)
-                        )
+                        log(p(i, word[:i]) / p(i - 1, word[: i - 1]))
                         + 1e-16
-                        for i in range(2, min(len(ngrams), len(word) + 1))
+                        for i in range(2, min(n, len(word) + 1))
                     ),
                     (
                         log(
-                            ngrams[len(ngrams)].get(
-                                "".join(word[i : i + len(ngrams)]), 1e-16
-                            )
-                            / ngrams[len(ngrams) - 1].get(
-                                "".join(word[i : i + len(ngrams) - 1]), 1e-16
-                            )
+                            p(n, word[i : i + n])
+                            / p(n - 1, word[i : i + n - 1])
                         )
                         + 1e-16
-                        for i in range(len(word) - len(ngrams) + 1)
+                        for i in range(len(word) - n + 1)
                     ),
                 )
             )
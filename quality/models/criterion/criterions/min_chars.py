@@ -36,21 +36,19 @@ class MinCharsCriterion(Criterion):
         criterion.save()
         return criterion
 
-    def evaluate(self, answer, rules_pk):
+    def evaluate(self, answer, rules):
         if not isinstance(answer, str):
             answer = answer.rationale
-        rules = MinCharsCriterionRules.objects.get(pk=rules_pk)
+        rules = MinCharsCriterionRules.resolve(rules)
         evaluation = {
             "version": self.version,
             "quality": float(len(answer.replace(" ", "")) >= rules.min_chars),
         }
-        evaluation.update(
-            {criterion: val["value"] for criterion, val in rules}
-        )
+        evaluation.update(rules.get_values())
         return evaluation
 
-    def batch_evaluate(self, answers, rules_pk):
-        rules = MinCharsCriterionRules.objects.get(pk=rules_pk)
+    def batch_evaluate(self, answers, rules):
+        rules = MinCharsCriterionRules.resolve(rules)
 
         evaluations = [
             {
@@ -70,9 +68,7 @@ class MinCharsCriterion(Criterion):
         ]
 
         for evaluation in evaluations:
-            evaluation.update(
-                {criterion: val["value"] for criterion, val in rules}
-            )
+            evaluation.update(rules.get_values())
 
         return evaluations
 
@@ -38,21 +38,19 @@ class MinWordsCriterion(Criterion):
         criterion.save()
         return criterion
 
-    def evaluate(self, answer, rules_pk):
+    def evaluate(self, answer, rules):
         if not isinstance(answer, str):
             answer = answer.rationale
-        rules = MinWordsCriterionRules.objects.get(pk=rules_pk)
+        rules = MinWordsCriterionRules.resolve(rules)
         evaluation = {
             "version": self.version,
             "quality": float(len(answer.split()) >= rules.min_words),
         }
-        evaluation.update(
-            {criterion: val["value"] for criterion, val in rules}
-        )
+        evaluation.update(rules.get_values())
         return evaluation
 
-    def batch_evaluate(self, answers, rules_pk):
-        rules = MinWordsCriterionRules.objects.get(pk=rules_pk)
+    def batch_evaluate(self, answers, rules):
+        rules = MinWordsCriterionRules.resolve(rules)
 
         evaluations = [
             {
@@ -72,9 +70,7 @@ class MinWordsCriterion(Criterion):
         ]
 
         for evaluation in evaluations:
-            evaluation.update(
-                {criterion: val["value"] for criterion, val in rules}
-            )
+            evaluation.update(rules.get_values())
 
         return evaluations
 
@@ -39,10 +39,10 @@ class NegWordsCriterion(Criterion):
 
         return criterion
 
-    def evaluate(self, answer, rules_pk):
+    def evaluate(self, answer, rules):
         if not isinstance(answer, str):
             answer = answer.rationale
-        rules = NegWordsCriterionRules.objects.get(pk=rules_pk)
+        rules = NegWordsCriterionRules.resolve(rules)
         answer_words = answer.split()
         evaluation = {
             "version": self.version,
@@ -52,13 +52,11 @@ class NegWordsCriterion(Criterion):
             )
             / (len(answer_words) + 1e-16),
         }
-        evaluation.update(
-            {criterion: val["value"] for criterion, val in rules}
-        )
+        evaluation.update(rules.get_values())
         return evaluation
 
-    def batch_evaluate(self, answers, rules_pk):
-        rules = NegWordsCriterionRules.objects.get(pk=rules_pk)
+    def batch_evaluate(self, answers, rules):
+        rules = NegWordsCriterionRules.resolve(rules)
 
         answers = [
             (answer if isinstance(answer, str) else answer.rationale).split()
@@ -78,9 +76,7 @@ class NegWordsCriterion(Criterion):
         ]
 
         for evaluation in evaluations:
-            evaluation.update(
-                {criterion: val["value"] for criterion, val in rules}
-            )
+            evaluation.update(rules.get_values())
 
         return evaluations
 
@@ -39,14 +39,14 @@ class RightAnswerCriterion(Criterion):
         criterion.save()
         return criterion
 
-    def evaluate(self, answer, rules_pk):
+    def evaluate(self, answer, rules):
         try:
             first_correct = answer.first_correct
             correct = answer.correct
         except AttributeError:
             raise ValueError("The Answer object is needed")
 
-        rules = RightAnswerCriterionRules.objects.get(pk=rules_pk)
+        rules = RightAnswerCriterionRules.resolve(rules)
 
         if rules.only_last:
             quality = correct
@@ -54,13 +54,12 @@ class RightAnswerCriterion(Criterion):
             quality = 0.5 * (correct + first_correct)
 
         evaluation = {"version": self.version, "quality": float(quality)}
-        evaluation.update(
-            {criterion: val["value"] for criterion, val in rules}
-        )
+        evaluation.update(rules.get_values())
         return evaluation
 
-    def batch_evaluate(self, answers, rules_pk):
-        return [self.evaluate(answer, rules_pk) for answer in answers]
+    def batch_evaluate(self, answers, rules):
+        rules = RightAnswerCriterionRules.resolve(rules)
+        return [self.evaluate(answer, rules) for answer in answers]
 
 
 class RightAnswerCriterionRules(CriterionRules):
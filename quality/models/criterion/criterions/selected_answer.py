@@ -41,13 +41,13 @@ class SelectedAnswerCriterion(Criterion):
         criterion.save()
         return criterion
 
-    def evaluate(self, answer, rules_pk):
+    def evaluate(self, answer, rules):
         try:
             shown = answer.shown_answer.filter(shown_answer=answer)
         except AttributeError:
             raise ValueError("The Answer object is needed")
 
-        rules = SelectedAnswerCriterionRules.objects.get(pk=rules_pk)
+        rules = SelectedAnswerCriterionRules.resolve(rules)
 
         if not shown:
             quality = rules.default_if_never_shown
@@ -57,13 +57,12 @@ class SelectedAnswerCriterion(Criterion):
             ) / len(shown)
 
         evaluation = {"version": self.version, "quality": quality}
-        evaluation.update(
-            {criterion: val["value"] for criterion, val in rules}
-        )
+        evaluation.update(rules.get_values())
         return evaluation
 
-    def batch_evaluate(self, answers, rules_pk):
-        return [self.evaluate(answer, rules_pk) for answer in answers]
+    def batch_evaluate(self, answers, rules):
+        rules = SelectedAnswerCriterionRules.resolve(rules)
+        return [self.evaluate(answer, rules) for answer in answers]
 
 
 class SelectedAnswerCriterionRules(CriterionRules):
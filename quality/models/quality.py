@@ -4,8 +4,10 @@
 import hashlib
 import json
 import logging
+import uuid
 from itertools import chain
 
+from django.core.cache import cache
 from django.db import models
 
 from .criterion.criterion_list import criterions, get_criterion
@@ -76,21 +78,10 @@ class Quality(models.Model):
                     threshold: float
                 }]
         """
-        if not self.criterions.exists():
-            return None, []
+        plan = self.get_plan()
 
-        criterions_ = [
-            {
-                "criterion": (
-                    get_criterion(c.name)["criterion"].objects.get(
-                        version=c.version
-                    )
-                ),
-                "rules": c.rules,
-                "weight": c.weight,
-            }
-            for c in self.criterions.all()
-        ]
+        if not plan.criterions:
+            return None, []
 
         if cache:
             quality, qualities = QualityCache.get(self, answer)
@@ -99,7 +90,7 @@ class Quality(models.Model):
             qualities = [
                 dict(
                     chain(
-                        iter(dict(c["criterion"]).items()),
+                        iter(c["description"].items()),
                         iter(
                             {
                                 "weight": c["weight"],
@@ -110,7 +101,7 @@ class Quality(models.Model):
                         ),
                     )
                 )
-                for c in criterions_
+                for c in plan.criterions
             ]
             quality = float(
                 sum(q["quality"]["quality"] * q["weight"] for q in qualities)
@@ -122,27 +113,23 @@ class Quality(models.Model):
         return quality, qualities
 
     def batch_evaluate(self, answers, cache=False):
-        if not self.criterions.exists():
+        plan = self.get_plan()
+
+        if not plan.criterions:
             return [(None, [])]
 
         answers = list(answers)
 
-        criterions_ = [
-            {
-                "criterion": (
-                    get_criterion(c.name)["criterion"].objects.get(
-                        version=c.version
-                    )
-                ),
-                "rules": c.rules,
-                "weight": c.weight,
-            }
-            for c in self.criterions.all()
-        ]
+        criterions_ = plan.criterions
 
         if cache:
-            cached = [QualityCache.get(self, answer) for answer in answers]
+            cache_criterions = plan.fingerprint
+            cached = QualityCache.batch_get(
+                self, answers, criterions=cache_criterions
+            )
             answers = [a for a, c in zip(answers, cached) if c[0] is None]
+            if not answers:
+                return cached
         else:
             cached = [(None, None) for _ in answers]
 
@@ -154,7 +141,7 @@ class Quality(models.Model):
             [
                 dict(
                     chain(
-                        iter(dict(c["criterion"]).items()),
+                        iter(c["description"].items()),
                         iter({"weight": c["weight"], "quality": q}.items()),
                     )
                 )
@@ -174,8 +161,9 @@ class Quality(models.Model):
         combined = [(q, qq) for q, qq in zip(quality, qualities)]
 
         if cache:
-            for (q, qq), answer in zip(combined, answers):
-                QualityCache.cache(self, answer, q, qq)
+            QualityCache.batch_cache(
+                self, answers, combined, criterions=cache_criterions
+            )
 
             gen = iter(combined)
             combined = [q if q[0] is not None else next(gen) for q in cached]
@@ -221,9 +209,11 @@ class Quality(models.Model):
 
         rules = criterion_class["rules"].get_or_create()
 
-        return UsesCriterion.objects.create(
+        criterion = UsesCriterion.objects.create(
             quality=self, name=name, version=version, rules=rules.pk, weight=1
         )
+        QualityPlan.invalidate()
+        return criterion
 
     def update_criterion(self, name, field, value):
         """
@@ -287,10 +277,24 @@ class Quality(models.Model):
                 setattr(rules, field, value)
             rules.save()
 
+        QualityPlan.invalidate()
+
         return criterion, old_value, value
 
     def remove_criterion(self, name):
         UsesCriterion.objects.filter(quality=self, name=name).delete()
+        QualityPlan.invalidate()
+
+    def get_plan(self):
+        """
+        Returns the compiled evaluation plan of the quality.
+
+        Returns
+        -------
+        QualityPlan
+            Plan of the current configuration
+        """
+        return QualityPlan.get(self)
 
     @property
     def available(self):
@@ -306,6 +310,110 @@ class Quality(models.Model):
         ]
 
 
+class QualityPlan:
+    """
+    Criterions of a quality with their rules, weights and description read
+    once and kept in memory, so that evaluations don't query the
+    configuration. Plans are kept per process and rebuilt when the version
+    shared through the cache changes, which happens each time the criterions
+    or rules of any quality change.
+    """
+
+    _plans = {}
+
+    def __init__(self, quality):
+        self.criterions = []
+        for c in quality.criterions.all():
+            criterion_class = get_criterion(c.name)
+            criterion = criterion_class["criterion"].objects.get(
+                version=c.version
+            )
+            rules = criterion_class["rules"].resolve(c.rules)
+            rules.preload()
+            self.criterions.append(
+                {
+                    "criterion": criterion,
+                    "rules": rules,
+                    "rules_pk": c.rules,
+                    "weight": c.weight,
+                    "description": dict(criterion),
+                }
+            )
+        self.fingerprint = [
+            dict(
+                chain(
+                    iter(c["description"].items()),
+                    list(
+                        {"rules": c["rules_pk"], "weight": c["weight"]}.items()
+                    ),
+                )
+            )
+            for c in self.criterions
+        ]
+
+    @classmethod
+    def get(cls, quality):
+        """
+        Returns the plan of the quality, compiling it if the configuration
+        changed since it was last compiled in this process. If the version
+        can't be read from the cache, the plan is compiled each time.
+
+        Parameters
+        ----------
+        quality : Quality
+            Quality to evaluate
+
+        Returns
+        -------
+        QualityPlan
+            Plan of the quality
+        """
+        version = cls.get_version()
+        if version is not None:
+            plan = cls._plans.get(quality.pk)
+            if plan is not None and plan[0] == version:
+                return plan[1]
+        plan = cls(quality)
+        if version is not None:
+            cls._plans[quality.pk] = (version, plan)
+        return plan
+
+    @staticmethod
+    def get_version():
+        """
+        Returns the current version of the quality configuration. Versions
+        are random tokens so that a version evicted from the cache is never
+        reused.
+
+        Returns
+        -------
+        Optional[str]
+            Version or None if the cache is unavailable
+        """
+        key = QualityPlan._version_key()
+        cache.add(key, uuid.uuid4().hex, None)
+        return cache.get(key)
+
+    @staticmethod
+    def invalidate():
+        """
+        Changes the version of the quality configuration so that every
+        process recompiles its plans.
+        """
+        cache.set(QualityPlan._version_key(), uuid.uuid4().hex, None)
+
+    @classmethod
+    def clear(cls):
+        """
+        Forgets the plans compiled in this process.
+        """
+        cls._plans.clear()
+
+    @staticmethod
+    def _version_key():
+        return "quality:plan:version"
+
+
 class UsesCriterion(models.Model):
     quality = models.ForeignKey(
         Quality, related_name="criterions", on_delete=models.CASCADE
@@ -342,70 +450,118 @@ class QualityCache(models.Model):
     quality = models.FloatField()
     qualities = models.TextField()
 
+    @staticmethod
+    def fingerprint(quality):
+        """
+        Returns the description of the criterions of the quality used in the
+        hash of cached answers, as compiled in the quality's plan.
+
+        Parameters
+        ----------
+        quality : Quality
+            Quality used
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Description of each criterion with its rules and weight
+        """
+        return quality.get_plan().fingerprint
+
+    @staticmethod
+    def _hash(criterions, rationale):
+        return hashlib.md5(
+            json.dumps({"text": rationale, "criterions": criterions}).encode()
+        ).hexdigest()
+
     @classmethod
     def get(cls, quality, answer):
-        if isinstance(answer, str):
-            answer_pk = None
-            rationale = answer
-        else:
-            answer_pk = answer.pk
-            rationale = answer.rationale
+        return cls.batch_get(quality, [answer])[0]
 
-        criterions = [
-            dict(
-                chain(
-                    iter(
-                        get_criterion(c.name)["criterion"].objects.get(
-                            version=c.version
-                        )
-                    ),
-                    list({"rules": c.rules, "weight": c.weight}.items()),
-                )
+    @classmethod
+    def batch_get(cls, quality, answers, criterions=None):
+        """
+        Returns the cached quality of each answer in a single query.
+
+        Parameters
+        ----------
+        quality : Quality
+            Quality used
+        answers : Iterable[Union[Answer, str]]
+            Answers or rationales to look up
+        criterions : Optional[List[Dict[str, Any]]] (default : None)
+            Criterions as returned by `fingerprint` if already computed
+
+        Returns
+        -------
+        List[Tuple[Optional[float], Optional[List[Dict[str, Any]]]]]
+            Quality and criterion results of each answer or (None, None) if
+            not cached
+        """
+        if criterions is None:
+            criterions = cls.fingerprint(quality)
+
+        hashes = [
+            cls._hash(
+                criterions,
+                answer if isinstance(answer, str) else answer.rationale,
             )
-            for c in quality.criterions.all()
+            for answer in answers
         ]
 
-        hash_ = hashlib.md5(
-            json.dumps({"text": rationale, "criterions": criterions}).encode()
-        ).hexdigest()
+        cached = {
+            hash_: (quality_, qualities)
+            for hash_, quality_, qualities in cls.objects.filter(
+                hash__in=set(hashes)
+            ).values_list("hash", "quality", "qualities")
+        }
 
-        if cls.objects.filter(hash=hash_).exists():
-            cache = cls.objects.get(hash=hash_)
-            return cache.quality, json.loads(cache.qualities)
-        else:
-            return None, None
+        return [
+            (cached[hash_][0], json.loads(cached[hash_][1]))
+            if hash_ in cached
+            else (None, None)
+            for hash_ in hashes
+        ]
 
     @classmethod
     def cache(cls, quality_instance, answer, quality, qualities):
-        if isinstance(answer, str):
-            answer_pk = None
-            rationale = answer
-        else:
-            answer_pk = answer.pk
-            rationale = answer.rationale
+        cls.batch_cache(quality_instance, [answer], [(quality, qualities)])
 
-        criterions = [
-            dict(
-                chain(
-                    iter(
-                        get_criterion(c.name)["criterion"].objects.get(
-                            version=c.version
-                        )
-                    ),
-                    list({"rules": c.rules, "weight": c.weight}.items()),
-                )
-            )
-            for c in quality_instance.criterions.all()
-        ]
+    @classmethod
+    def batch_cache(cls, quality_instance, answers, results, criterions=None):
+        """
+        Caches the quality of each answer in a single query, keeping already
+        cached values.
 
-        hash_ = hashlib.md5(
-            json.dumps({"text": rationale, "criterions": criterions}).encode()
-        ).hexdigest()
+        Parameters
+        ----------
+        quality_instance : Quality
+            Quality used
+        answers : Iterable[Union[Answer, str]]
+            Answers or rationales evaluated
+        results : Iterable[Tuple[float, List[Dict[str, Any]]]]
+            Quality and criterion results of each answer
+        criterions : Optional[List[Dict[str, Any]]] (default : None)
+            Criterions as returned by `fingerprint` if already computed
+        """
+        if criterions is None:
+            criterions = cls.fingerprint(quality_instance)
+
+        caches = {}
+        for answer, (quality, qualities) in zip(answers, results):
+            if isinstance(answer, str):
+                answer_pk = None
+                rationale = answer
+            else:
+                answer_pk = answer.pk
+                rationale = answer.rationale
+            hash_ = cls._hash(criterions, rationale)
+            if hash_ not in caches:
+                caches[hash_] = cls(
+                    answer=answer_pk,
+                    hash=hash_,
+                    quality=quality,
+                    qualities=json.dumps(qualities),
+                )
 
-        if not cls.objects.filter(hash=hash_):
-            cls.objects.create(
-                answer=answer_pk,
-                hash=hash_,
-                quality=quality,
-                qualities=json.dumps(qualities),
-            )
+        cls.objects.bulk_create(caches.values(), ignore_conflicts=True)
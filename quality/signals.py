@@ -1,9 +1,23 @@
+from itertools import chain
 from operator import itemgetter
 
-from django.db.models.signals import post_migrate
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+)
 from django.dispatch import receiver
 
-from .models import LikelihoodLanguage, Quality, QualityType, QualityUseType
+from .models import (
+    LikelihoodCriterionRules,
+    LikelihoodLanguage,
+    Quality,
+    QualityPlan,
+    QualityType,
+    QualityUseType,
+    UsesCriterion,
+)
 from .models.criterion.criterion_list import criterions
 
 
@@ -75,3 +89,19 @@ def add_likelihood_languages(sender, **kwargs):
             language=language["language"]
         ).exists():
             LikelihoodLanguage.objects.create(**language)
+
+
+def invalidate_quality_plans(sender, **kwargs):
+    QualityPlan.invalidate()
+
+
+for model in chain(
+    (UsesCriterion, LikelihoodLanguage),
+    *(criterion.values() for criterion in criterions.values())
+):
+    post_save.connect(invalidate_quality_plans, sender=model)
+    post_delete.connect(invalidate_quality_plans, sender=model)
+
+m2m_changed.connect(
+    invalidate_quality_plans, sender=LikelihoodCriterionRules.languages.through
+)
@@ -1,3 +1,13 @@
+import pytest
+
+from quality.models import QualityPlan
+
+
 def pytest_collection_modifyitems(config, items):
     for item in items:
         item.add_marker("django_db")
+
+
+@pytest.fixture(autouse=True)
+def clear_quality_plans():
+    QualityPlan.clear()
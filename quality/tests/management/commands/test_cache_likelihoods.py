@@ -0,0 +1,51 @@
+import mock
+from django.core.management import call_command
+
+from peerinst.models import Answer
+from peerinst.tests.fixtures import *  # noqa
+from quality.models import LikelihoodLanguage
+
+
+def run(checkpoint, *args):
+    computed = []
+
+    def batch(answers, language, max_gram):
+        answers = list(answers)
+        computed.extend((language.pk, answer.pk) for answer in answers)
+        return [(0, 0)] * len(answers)
+
+    with mock.patch(
+        "quality.management.commands.cache_likelihoods.LikelihoodCache.batch",
+        side_effect=batch,
+    ):
+        call_command(
+            "cache_likelihoods",
+            "--range-size",
+            "2",
+            "--checkpoint",
+            str(checkpoint),
+            *args
+        )
+    return computed
+
+
+def test_cache_likelihoods__resumes(answers, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    pks = sorted(Answer.objects.values_list("pk", flat=True))
+    languages = list(LikelihoodLanguage.objects.values_list("pk", flat=True))
+
+    computed = run(checkpoint)
+
+    assert sorted(computed) == sorted(
+        (language, pk) for language in languages for pk in pks
+    )
+
+    # only the last range, which may still get new answers, is recomputed
+    computed = run(checkpoint)
+
+    assert {pk for _, pk in computed} <= set(pks[-2:])
+    assert {language for language, _ in computed} == set(languages)
+
+    computed = run(checkpoint, "--restart")
+
+    assert len(computed) == len(languages) * len(pks)
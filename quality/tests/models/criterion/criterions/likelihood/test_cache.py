@@ -149,3 +149,32 @@ def test_batch__rationale_only(answers):
         assert abs(l1[0] - l2[0]) < 1e-5
         assert abs(l1[1] - l2[1]) < 1e-5
     assert time_taken_2 < time_taken_1
+
+
+def test_batch__bulk_queries(answers, django_assert_num_queries):
+    answers = answers[:3]
+    answers[0].rationale = (
+        "All happy families are alike; each unhappy family is unhappy in its "
+        "own way."
+    )
+    answers[1].rationale = (
+        "It was a bright cold day in April, and the clocks were striking "
+        "thirteen."
+    )
+    answers[2].rationale = answers[0].rationale
+    for answer in answers:
+        answer.save()
+
+    english = LikelihoodLanguage.objects.get(language="english")
+    LikelihoodCache.get(answers[0], english, 3)
+    n = LikelihoodCache.objects.count()
+
+    with django_assert_num_queries(2):
+        likelihoods = LikelihoodCache.batch(answers, english, 3)
+
+    assert LikelihoodCache.objects.count() == n + 1
+    assert likelihoods[0] == likelihoods[2]
+    assert likelihoods[0] == LikelihoodCache.get(answers[0], english, 3)
+
+    with django_assert_num_queries(1):
+        assert LikelihoodCache.batch(answers, english, 3) == likelihoods
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
 
-from quality.models.criterion.criterions.likelihood.data import read_data
+from quality.models.criterion.criterions.likelihood.data import (
+    encode,
+    read_compact_data,
+    read_data,
+)
 
 
 def test_read_data__english():
@@ -48,3 +52,24 @@ def test_read_data__french():
     assert abs(1 - sum(data["n_grams"][2].values())) < 1e-5
     assert abs(1 - sum(data["n_grams"][3].values())) < 1e-5
     assert data["left_to_right"]
+
+
+def test_read_compact_data__english():
+    urls = [
+        "http://practicalcryptography.com/media/cryptanalysis/files/"
+        "english_monograms.txt",
+        "http://practicalcryptography.com/media/cryptanalysis/files/"
+        "english_bigrams_1.txt",
+        "http://practicalcryptography.com/media/cryptanalysis/files/"
+        "english_trigrams.txt.zip",
+    ]
+    data = read_data("english", urls, True)
+    compact = read_compact_data("english", urls, True)
+    index = {c: i for i, c in enumerate(compact["alphabet"])}
+
+    assert len(compact["alphabet"]) == 26
+    assert compact["left_to_right"]
+    for gram in (1, 2, 3):
+        assert len(compact["n_grams"][gram]) == 26 ** gram
+        for n_gram, val in data["n_grams"][gram].items():
+            assert compact["n_grams"][gram][encode(n_gram, index)] == val
@@ -8,7 +8,11 @@ from operator import sub
 
 import pytest
 
-from quality.models.criterion.criterions.likelihood.model import create_model
+from quality.models.criterion.criterions.likelihood.model import (
+    create_model,
+    get_batch_model,
+    get_model,
+)
 
 
 @pytest.fixture
@@ -48,6 +52,43 @@ def test_create_model(english, french):
     predict = create_model(*french)
 
 
+def test_get_model(english, french):
+    predict_english = get_model(*english)
+    predict_french = get_model(*french)
+
+    assert get_model(*english) is predict_english
+    assert get_model(*french) is predict_french
+    assert get_model(*english, max_gram=1) is not predict_english
+
+
+def test_get_model__same_as_create_model(english):
+    test = "All happy families are alike; each unhappy family is unhappy."
+    assert get_model(*english)(test) == create_model(*english)(test)
+
+
+def test_batch_predict(english, french):
+    test = [
+        "All happy families are alike; each unhappy family is unhappy in its "
+        "own way.",
+        "Je cherchais un endroit tranquille où mourir.",
+        "",
+        "   ",
+        "a",
+        "".join(
+            random.choice([" "] + list(string.printable + "éàè"))
+            for _ in range(200)
+        ),
+    ]
+    for language in (english, french):
+        for max_gram in (1, 2, 3):
+            predict = get_model(*language, max_gram=max_gram)
+            batch_predict = get_batch_model(*language, max_gram=max_gram)
+            for t, (l1, l0) in zip(test, batch_predict(test)):
+                l1_, l0_ = predict(t)
+                assert l1 == pytest.approx(l1_, rel=1e-9, abs=1e-9)
+                assert l0 == pytest.approx(l0_, rel=1e-9, abs=1e-9)
+
+
 def test_predict__english(english):
     test = (
         "It is a truth universally acknowledged, that a single man in "
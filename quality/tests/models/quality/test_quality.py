@@ -646,3 +646,35 @@ def test_available(assignment_validation_quality):
         assert len(available_info) == 3
         for criterion_ in available_info:
             assert isinstance(criterion_, dict)
+
+
+def test_evaluate__plan_compiled_once(
+    locmem_cache,
+    global_validation_quality_with_criteria,
+    django_assert_num_queries,
+):
+    quality = global_validation_quality_with_criteria
+    quality_, qualities = quality.evaluate("a rationale")
+
+    with django_assert_num_queries(0):
+        assert quality.evaluate("a rationale") == (quality_, qualities)
+        assert quality.batch_evaluate(["a rationale"]) == [
+            (quality_, qualities)
+        ]
+
+
+def test_evaluate__plan_recompiled_on_update(
+    locmem_cache, global_validation_quality_with_criteria
+):
+    quality = global_validation_quality_with_criteria
+    _, qualities = quality.evaluate("a rationale")
+    assert qualities[0]["weight"] == 1
+
+    quality.update_criterion("neg_words", "weight", 2)
+
+    _, qualities = quality.evaluate("a rationale")
+    assert qualities[0]["weight"] == 2
+
+    quality.remove_criterion("neg_words")
+
+    assert quality.evaluate("a rationale") == (None, [])
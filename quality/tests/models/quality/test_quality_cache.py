@@ -45,3 +45,54 @@ def test_get(global_validation_quality, answers):
     )
     assert quality_ == quality
     assert qualities_ == qualities
+
+
+def test_batch_get(global_validation_quality, answers):
+    answers = answers[:3]
+    for i, answer in enumerate(answers):
+        answer.rationale = "test {}".format(i)
+        answer.save()
+
+    qualities = {"name": "test", "quality": 1, "threshold": 1}
+
+    QualityCache.cache(global_validation_quality, answers[0], 1, qualities)
+
+    cached = QualityCache.batch_get(
+        global_validation_quality, answers + [answers[0].rationale]
+    )
+    assert cached == [
+        (1, qualities),
+        (None, None),
+        (None, None),
+        (1, qualities),
+    ]
+
+
+def test_batch_cache(
+    global_validation_quality, answers, django_assert_num_queries
+):
+    answers = answers[:3]
+    for i, answer in enumerate(answers):
+        answer.rationale = "test {}".format(i)
+        answer.save()
+
+    qualities = {"name": "test", "quality": 1, "threshold": 1}
+    criterions = QualityCache.fingerprint(global_validation_quality)
+
+    QualityCache.cache(global_validation_quality, answers[0], 0, qualities)
+
+    n = QualityCache.objects.count()
+    with django_assert_num_queries(1):
+        QualityCache.batch_cache(
+            global_validation_quality,
+            answers + [answers[1].rationale],
+            [(1, qualities)] * 4,
+            criterions=criterions,
+        )
+    assert QualityCache.objects.count() == n + 2
+
+    with django_assert_num_queries(1):
+        cached = QualityCache.batch_get(
+            global_validation_quality, answers, criterions=criterions
+        )
+    assert [q for q, _ in cached] == [0, 1, 1]
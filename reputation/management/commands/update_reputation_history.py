@@ -6,7 +6,8 @@ from datetime import datetime
 
 from django.core.management.base import BaseCommand
 
-from reputation.models import Reputation, ReputationHistory
+from peerinst.utils import batch
+from reputation.models import Reputation, ReputationHistory, ReputationType
 
 logger = logging.getLogger("reputation")
 
@@ -14,17 +15,28 @@ logger = logging.getLogger("reputation")
 class Command(BaseCommand):
     help = "Compute and save the reputations in the history."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of reputations evaluated at once",
+        )
+
     def handle(self, *args, **options):
-        reputations = Reputation.objects.all()
-
-        n = reputations.count()
-        step = 1.0 / n * 100
-        progress = 0
-
-        for reputation in reputations.iterator():
-            ReputationHistory.create(reputation)
-            progress = progress + step
-            print(
-                "{} - ({:>6.2f}%) -".format(datetime.now(), progress)
-                + " Updating reputations"
-            )
+        n = Reputation.objects.count()
+        done = 0
+
+        for reputation_type in ReputationType.objects.all():
+            reputations = Reputation.of_type(reputation_type)
+            for reputations_ in batch(
+                reputations.iterator(), options["batch_size"]
+            ):
+                done += ReputationHistory.batch_create(list(reputations_))
+                print(
+                    "{} - ({:>6.2f}%) -".format(
+                        datetime.now(), done / n * 100
+                    )
+                    + " Updating reputations"
+                )
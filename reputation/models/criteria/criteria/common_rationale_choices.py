@@ -2,6 +2,7 @@
 
 
 from django.db import models
+from django.db.models import Count, F
 
 from reputation.logger import logger
 
@@ -50,6 +51,30 @@ class CommonRationaleChoicesCriterion(Criterion):
             logger.error("TypeError: {}".format(msg))
             raise TypeError(msg)
 
+    def _batch_evaluate(self, students):
+        from peerinst.models import Answer
+
+        if students[0].__class__.__name__ != "Student":
+            msg = "`instance` has to be of type Student."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
+        usernames = self._get_usernames(students)
+        # answers from other students having chosen one of the rationales
+        # chosen by the student, each counted once
+        counts = dict(
+            Answer.objects.annotate(
+                chosen_by=F("chosen_rationale__answer__user_token")
+            )
+            .filter(chosen_by__in=usernames)
+            .exclude(user_token=F("chosen_by"))
+            .values("chosen_by")
+            .annotate(n=Count("pk", distinct=True))
+            .order_by()
+            .values_list("chosen_by", "n")
+        )
+        return [(counts.get(username, 0), {}) for username in usernames]
+
     def info(self):
         return super(CommonRationaleChoicesCriterion, self).info(
             CommonRationaleChoicesCriterion.general_info()
@@ -2,6 +2,7 @@
 
 
 from django.db import models
+from django.db.models import Count
 
 from reputation.logger import logger
 
@@ -52,6 +53,38 @@ class ConvincingRationalesCriterion(Criterion):
             logger.error("TypeError: {}".format(msg))
             raise TypeError(msg)
 
+    def _batch_evaluate(self, students):
+        from peerinst.models import Answer, ShownRationale
+
+        if students[0].__class__.__name__ != "Student":
+            msg = "`instance` has to be of type Student."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
+        usernames = self._get_usernames(students)
+        chosen = dict(
+            Answer.objects.filter(
+                Answer.student_filter(usernames, prefix="chosen_rationale__")
+            )
+            .values("chosen_rationale__user_token")
+            .annotate(n=Count("pk"))
+            .order_by()
+            .values_list("chosen_rationale__user_token", "n")
+        )
+        shown = dict(
+            ShownRationale.objects.filter(
+                Answer.student_filter(usernames, prefix="shown_answer__")
+            )
+            .values("shown_answer__user_token")
+            .annotate(n=Count("pk"))
+            .order_by()
+            .values_list("shown_answer__user_token", "n")
+        )
+        return [
+            (chosen.get(username, 0), {"times_shown": shown.get(username, 0)})
+            for username in usernames
+        ]
+
     def info(self):
         return super(ConvincingRationalesCriterion, self).info(
             ConvincingRationalesCriterion.general_info()
@@ -2,6 +2,7 @@
 
 
 from django.db import models
+from django.db.models import Count
 
 from reputation.logger import logger
 
@@ -51,6 +52,33 @@ class NAnswersCriterion(Criterion):
             logger.error("TypeError: {}".format(msg))
             raise TypeError(msg)
 
+    def _batch_evaluate(self, instances):
+        from peerinst.models import Answer
+
+        if instances[0].__class__.__name__ == "Question":
+            counts = dict(
+                Answer.objects.filter(question__in=instances)
+                .values("question")
+                .annotate(n=Count("pk"))
+                .order_by()
+                .values_list("question", "n")
+            )
+            return [(counts.get(i.pk, 0), {}) for i in instances]
+        elif instances[0].__class__.__name__ == "Student":
+            usernames = self._get_usernames(instances)
+            counts = dict(
+                Answer.objects.filter(Answer.student_filter(usernames))
+                .values("user_token")
+                .annotate(n=Count("pk"))
+                .order_by()
+                .values_list("user_token", "n")
+            )
+            return [(counts.get(username, 0), {}) for username in usernames]
+        else:
+            msg = "`question` has to be of type Question."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
     def info(self):
         return super(NAnswersCriterion, self).info(
             NAnswersCriterion.general_info()
@@ -2,6 +2,7 @@
 
 
 from django.db import models
+from django.db.models import Count
 
 from reputation.logger import logger
 
@@ -51,6 +52,23 @@ class NQuestionsCriterion(Criterion):
 
         return teacher.user.question_set.count(), {}
 
+    def _batch_evaluate(self, teachers):
+        from peerinst.models import Question
+
+        if teachers[0].__class__.__name__ != "Teacher":
+            msg = "`teacher` has to be of type Teacher."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
+        counts = dict(
+            Question.objects.filter(user__in=[t.user_id for t in teachers])
+            .values("user")
+            .annotate(n=Count("pk"))
+            .order_by()
+            .values_list("user", "n")
+        )
+        return [(counts.get(teacher.user_id, 0), {}) for teacher in teachers]
+
     def info(self):
         return super(NQuestionsCriterion, self).info(
             NQuestionsCriterion.general_info()
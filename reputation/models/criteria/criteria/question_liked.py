@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import Count, F
 
 from reputation.logger import logger
 
@@ -129,6 +132,74 @@ class QuestionLikedCriterion(Criterion):
             logger.error("TypeError: {}".format(msg))
             raise TypeError(msg)
 
+    def _batch_evaluate(self, instances):
+        from peerinst.models import Answer, Assignment, Teacher
+
+        liked = Teacher.favourite_questions.through.objects.all()
+        used = Answer.objects.filter(assignment__questions=F("question"))
+
+        if instances[0].__class__.__name__ == "Question":
+            n_liked = dict(
+                liked.filter(question__in=instances)
+                .values("question")
+                .annotate(n=Count("pk"))
+                .order_by()
+                .values_list("question", "n")
+            )
+            n_used = dict(
+                used.filter(question__in=instances)
+                .values("question")
+                .annotate(n=Count("assignment", distinct=True))
+                .order_by()
+                .values_list("question", "n")
+            )
+            return [
+                (
+                    n_liked.get(question.pk, 0) * self.points_liked
+                    + n_used.get(question.pk, 0) * self.points_used,
+                    {},
+                )
+                for question in instances
+            ]
+        elif instances[0].__class__.__name__ == "Teacher":
+            users = [teacher.user_id for teacher in instances]
+            # likes and uses by the teacher themselves are ignored
+            n_liked = dict(
+                liked.filter(question__user__in=users)
+                .exclude(teacher__user=F("question__user"))
+                .values("question__user")
+                .annotate(n=Count("pk"))
+                .order_by()
+                .values_list("question__user", "n")
+            )
+            uses = set(
+                used.filter(question__user__in=users)
+                .order_by()
+                .values_list("question__user", "question", "assignment")
+                .distinct()
+            )
+            owners = set(
+                Assignment.owner.through.objects.filter(
+                    assignment__in={assignment for _, _, assignment in uses}
+                ).values_list("user", "assignment")
+            )
+            n_used = defaultdict(int)
+            for user, _, assignment in uses:
+                if (user, assignment) not in owners:
+                    n_used[user] += 1
+            return [
+                (
+                    n_liked.get(user, 0) * self.points_liked
+                    + n_used[user] * self.points_used,
+                    {},
+                )
+                for user in users
+            ]
+        else:
+            msg = "`question` has to be of type Question."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
     def info(self):
         return super(QuestionLikedCriterion, self).info(
             QuestionLikedCriterion.general_info()
@@ -2,6 +2,7 @@
 
 
 from django.db import models
+from django.db.models import Count
 
 from reputation.logger import logger
 
@@ -56,6 +57,26 @@ class RationaleEvaluationCriterion(Criterion):
             logger.error("TypeError: {}".format(msg))
             raise TypeError(msg)
 
+    def _batch_evaluate(self, teachers):
+        from peerinst.models import AnswerAnnotation
+
+        if teachers[0].__class__.__name__ != "Teacher":
+            msg = "`question` has to be of type Teacher."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
+        counts = dict(
+            AnswerAnnotation.objects.filter(
+                annotator__in=[t.user_id for t in teachers],
+                score__isnull=False,
+            )
+            .values("annotator")
+            .annotate(n=Count("pk"))
+            .order_by()
+            .values_list("annotator", "n")
+        )
+        return [(counts.get(teacher.user_id, 0), {}) for teacher in teachers]
+
     def info(self):
         return super(RationaleEvaluationCriterion, self).info(
             RationaleEvaluationCriterion.general_info()
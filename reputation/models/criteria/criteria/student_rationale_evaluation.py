@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import Count
 
 from reputation.logger import logger
 
@@ -67,6 +70,31 @@ class StudentRationaleEvaluationCriterion(Criterion):
             logger.error("TypeError: {}".format(msg))
             raise TypeError(msg)
 
+    def _batch_evaluate(self, students):
+        from peerinst.models import Answer, AnswerAnnotation
+
+        if students[0].__class__.__name__ != "Student":
+            msg = "`question` has to be of type Student."
+            logger.error("TypeError: {}".format(msg))
+            raise TypeError(msg)
+
+        usernames = self._get_usernames(students)
+        points = defaultdict(int)
+        for username, score, n in (
+            AnswerAnnotation.objects.filter(
+                Answer.student_filter(usernames, prefix="answer__"),
+                score__isnull=False,
+            )
+            .values("answer__user_token", "score")
+            .annotate(n=Count("pk"))
+            .order_by()
+            .values_list("answer__user_token", "score", "n")
+        ):
+            points[username] += (
+                getattr(self, "points_score_{}".format(score)) * n
+            )
+        return [(points[username], {}) for username in usernames]
+
     def info(self):
         return super(StudentRationaleEvaluationCriterion, self).info(
             StudentRationaleEvaluationCriterion.general_info()
@@ -3,6 +3,7 @@
 
 from itertools import chain
 
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as translate
@@ -108,14 +109,54 @@ class Criterion(models.Model):
         TypeError
             If the `model` isn't in the for_reputation_types
         """
-        if not self.for_reputation_types.filter(
-            type=model.__class__.__name__.lower()
-        ):
+        self._check_type(model.__class__.__name__.lower())
+
+    def batch_evaluate(self, models):
+        """
+        Evaluates the reputation score of all the given `models` of the same
+        type. Classes inheriting should override `_batch_evaluate` to compute
+        the scores with grouped queries instead of evaluating each model.
+
+        Parameters
+        ----------
+        models : Iterable[Model]
+            Models being evaluated. Must all be of the same type and in
+            `for_reputation_types`
+
+        Returns
+        -------
+        List[Tuple[float, Dict[str, Any]]]
+            Reputation as evaluated by the criterion and details for each
+            model
+
+        Raises
+        ------
+        TypeError
+            If the `models` aren't in the for_reputation_types
+        """
+        models = list(models)
+        if not models:
+            return []
+        self._check_type(models[0].__class__.__name__.lower())
+        return self._batch_evaluate(models)
+
+    def _batch_evaluate(self, models):
+        return [self.evaluate(model) for model in models]
+
+    @staticmethod
+    def _get_usernames(students):
+        usernames = dict(
+            User.objects.filter(
+                pk__in=[student.student_id for student in students]
+            ).values_list("pk", "username")
+        )
+        return [usernames[student.student_id] for student in students]
+
+    def _check_type(self, type_):
+        if not self.for_reputation_types.filter(type=type_):
             msg = "The criterion {} isn't available ".format(
                 str(self)
-            ) + "for reputation type {}.".format(
-                model.__class__.__name__.lower()
-            )
+            ) + "for reputation type {}.".format(type_)
             logger.error(msg)
             raise TypeError(msg)
 
@@ -2,9 +2,13 @@
 
 
 import json
+from collections import defaultdict
 from datetime import date as date_
 
-from django.db import IntegrityError, models
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, models, transaction
 
 from ..logger import logger
 from .reputation_type import ReputationType
@@ -75,6 +79,120 @@ class Reputation(models.Model):
             return None, []
         return self.reputation_type.evaluate(reputation_model, criterion)
 
+    def get_cached(self, criterion=None):
+        """
+        Returns the reputation as `evaluate` would, but using the last
+        evaluation stored in the cache (or today's history) when there is
+        one. If the reputation was invalidated since, the stored value is
+        returned anyway and a refresh is scheduled.
+
+        Parameters
+        ----------
+        criterion : Optional[str] (default : None)
+            Name of the criterion for which reputation is returned. If None,
+            returns all criteria
+
+        Returns
+        -------
+        Same as `evaluate`
+
+        Raises
+        ------
+        ValueError
+            If this reputation doesn't correspond to any type of reputation
+        ValueError
+            If the given criterion isn't part of the list for this reputation
+            type
+        """
+        version = cache.get(self._version_key, 0)
+        cached = cache.get(self._cache_key)
+
+        if cached is None:
+            history = ReputationHistory.objects.filter(
+                reputation=self, date=date_.today()
+            ).first()
+            if history is None:
+                value = self.refresh_cache(version)
+            else:
+                value = (
+                    history.reputation_value,
+                    json.loads(history.reputation_details),
+                )
+                self._schedule_refresh(version)
+        else:
+            if cached["version"] != version:
+                self._schedule_refresh(version)
+            value = cached["value"]
+
+        if criterion is None:
+            return value
+        try:
+            reputation = next(r for r in value[1] if r["name"] == criterion)
+        except StopIteration:
+            return self.evaluate(criterion)
+        return reputation["reputation"], reputation
+
+    def refresh_cache(self, version=None):
+        """
+        Evaluates the reputation and stores it in the cache.
+
+        Parameters
+        ----------
+        version : Optional[int] (default : None)
+            Version of the reputation read before the evaluation. If None,
+            the current version is used
+
+        Returns
+        -------
+        Same as `evaluate` with `criterion` None
+        """
+        if version is None:
+            version = cache.get(self._version_key, 0)
+        value = self.evaluate()
+        cache.set(
+            self._cache_key,
+            {"version": version, "value": value},
+            settings.REPUTATION_CACHE_TIMEOUT,
+        )
+        return value
+
+    @staticmethod
+    def invalidate(reputations):
+        """
+        Marks the cached values of the reputations as out of date so they
+        are refreshed the next time they are read.
+
+        Parameters
+        ----------
+        reputations : Iterable[Union[Reputation, int]]
+            Reputations (or their primary keys) to invalidate
+        """
+        for reputation in reputations:
+            key = "reputation:{}:version".format(
+                getattr(reputation, "pk", reputation)
+            )
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+    @property
+    def _cache_key(self):
+        return "reputation:{}".format(self.pk)
+
+    @property
+    def _version_key(self):
+        return "reputation:{}:version".format(self.pk)
+
+    def _schedule_refresh(self, version):
+        from ..tasks import refresh_reputation_cache
+
+        # only one refresh is scheduled per version
+        if cache.add(
+            "reputation:{}:refresh:{}".format(self.pk, version), True, 60
+        ):
+            refresh_reputation_cache(self.pk)
+
     @property
     def reputation_model(self):
         """
@@ -102,6 +220,35 @@ class Reputation(models.Model):
             logger.error(msg)
             raise ValueError(msg)
 
+    @staticmethod
+    def of_type(reputation_type):
+        """
+        Returns the reputations of the given type with their linked model
+        selected in the same query.
+
+        Parameters
+        ----------
+        reputation_type : ReputationType
+            Type of the reputations
+
+        Returns
+        -------
+        QuerySet[Reputation]
+            Reputations ordered by primary key
+        """
+        reputations = Reputation.objects.filter(
+            reputation_type=reputation_type
+        ).select_related("reputation_type")
+        try:
+            Reputation._meta.get_field(reputation_type.model_name)
+        except FieldDoesNotExist:
+            pass
+        else:
+            reputations = reputations.select_related(
+                reputation_type.model_name
+            )
+        return reputations.order_by("pk")
+
     @staticmethod
     def create(cls):
         """
@@ -162,3 +309,73 @@ class ReputationHistory(models.Model):
             instance.save()
 
         return instance
+
+    @staticmethod
+    def batch_create(reputations):
+        """
+        Computes and saves today's history of all the reputations, evaluating
+        the criteria once per reputation type and writing the history in bulk.
+        Histories already saved today are updated.
+
+        Parameters
+        ----------
+        reputations : Iterable[Reputation]
+            Reputations to save, preferably with their reputation type and
+            linked model selected (see `Reputation.of_type`)
+
+        Returns
+        -------
+        int
+            Number of histories saved
+        """
+        by_type = defaultdict(list)
+        for reputation in reputations:
+            by_type[reputation.reputation_type].append(reputation)
+
+        values = {}
+        for reputation_type, reputations_ in by_type.items():
+            instances = []
+            for reputation in reputations_:
+                try:
+                    instances.append(
+                        (reputation.pk, reputation.reputation_model)
+                    )
+                except ValueError:
+                    values[reputation.pk] = (None, [])
+            values.update(
+                zip(
+                    (pk for pk, _ in instances),
+                    reputation_type.batch_evaluate(
+                        [instance for _, instance in instances]
+                    ),
+                )
+            )
+
+        existing = {
+            history.reputation_id: history
+            for history in ReputationHistory.objects.filter(
+                reputation__in=values, date=date_.today()
+            )
+        }
+        for pk, history in existing.items():
+            history.reputation_value = values[pk][0]
+            history.reputation_details = json.dumps(values[pk][1])
+
+        with transaction.atomic():
+            ReputationHistory.objects.bulk_update(
+                existing.values(), ["reputation_value", "reputation_details"]
+            )
+            ReputationHistory.objects.bulk_create(
+                [
+                    ReputationHistory(
+                        reputation_id=pk,
+                        reputation_value=value,
+                        reputation_details=json.dumps(details),
+                    )
+                    for pk, (value, details) in values.items()
+                    if pk not in existing
+                ],
+                ignore_conflicts=True,
+            )
+
+        return len(values)
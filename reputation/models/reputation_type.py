@@ -45,7 +45,31 @@ class ReputationType(models.Model):
         TypeError
             If the given `model` doesn't correspond to the `type`
         """
-        evaluation, details = criterion.evaluate(model)
+        return self._points(criterion, *criterion.evaluate(model))
+
+    def _points(self, criterion, evaluation, details):
+        """
+        Converts a criterion evaluation to points using its point thresholds.
+
+        Parameters
+        ----------
+        criterion : Criterion
+            Criterion used for the evaluation
+        evaluation : float
+            Value returned by the criterion
+        details : Dict[str, Any]
+            Details returned by the criterion
+
+        Returns
+        -------
+        Dict[str, Any]
+            Reputation as evaluated by the criterion as
+            {
+                reputation: float,
+                details: Dict[str, Any]
+                equation: str
+            }
+        """
         evaluation = max(0, evaluation)
 
         if criterion.thresholds:
@@ -162,29 +186,10 @@ class ReputationType(models.Model):
 
         if criterion is None:
             reputations = [
-                dict(
-                    chain(
-                        list(
-                            self._calculate_points(criterion_, model).items()
-                        ),
-                        criterion_.__iter__(),
-                    )
+                self._combine(
+                    self._calculate_points(criterion_, model), criterion_
                 )
-                for criterion_ in (
-                    get_criterion(c.name).objects.get(version=c.version)
-                    for c in self.criteria.all()
-                )
-            ]
-            reputations = [
-                {
-                    key: (
-                        "{}\n{}".format(val, reputation["equation"])
-                        if key == "description"
-                        else val
-                    )
-                    for key, val in list(reputation.items())
-                }
-                for reputation in reputations
+                for criterion_ in self._get_criteria()
             ]
             reputation = sum(r["reputation"] for r in reputations)
         else:
@@ -201,24 +206,79 @@ class ReputationType(models.Model):
                 logger.error("ValueError: {}".format(msg))
                 raise ValueError(msg)
 
-            reputations = dict(
-                chain(
-                    list(self._calculate_points(criterion_, model).items()),
-                    criterion_.__iter__(),
-                )
+            reputations = self._combine(
+                self._calculate_points(criterion_, model), criterion_
             )
-            reputations = {
-                key: (
-                    "{}\n{}".format(val, reputations["equation"])
-                    if key == "description"
-                    else val
-                )
-                for key, val in list(reputations.items())
-            }
             reputation = reputations["reputation"]
 
         return reputation, reputations
 
+    def batch_evaluate(self, models):
+        """
+        Returns the reputation of each of the models as `evaluate` would for
+        all criteria, evaluating each criterion once for all models.
+
+        Parameters
+        ----------
+        models : List[Union[Question, Assignment, Teacher, Student]]
+            Models for which to evaluate the reputation
+
+        Returns
+        -------
+        List[Tuple[Optional[float], List[Dict[str, Any]]]]
+            Reputation and individual criteria of each model
+
+        Raises
+        ------
+        TypeError
+            If one of the given `models` doesn't correspond to the `type`
+        """
+        models = list(models)
+        for model in models:
+            if model.__class__.__name__.lower() != self.type:
+                msg = (
+                    "The type of `model` doesn't correspond to the correct "
+                    "type; is {} instead of {}.".format(
+                        model.__class__.__name__.lower(), self.type
+                    )
+                )
+                logger.error("TypeError: {}".format(msg))
+                raise TypeError(msg)
+
+        criteria = self._get_criteria()
+        if not models or not criteria:
+            return [(None, []) for _ in models]
+
+        evaluations = [
+            [
+                self._combine(self._points(criterion, *evaluation), criterion)
+                for evaluation in criterion.batch_evaluate(models)
+            ]
+            for criterion in criteria
+        ]
+
+        return [
+            (sum(r["reputation"] for r in reputations), list(reputations))
+            for reputations in zip(*evaluations)
+        ]
+
+    def _get_criteria(self):
+        return [
+            get_criterion(c.name).objects.get(version=c.version)
+            for c in self.criteria.all()
+        ]
+
+    def _combine(self, points, criterion):
+        reputation = dict(chain(list(points.items()), criterion.__iter__()))
+        return {
+            key: (
+                "{}\n{}".format(val, reputation["equation"])
+                if key == "description"
+                else val
+            )
+            for key, val in list(reputation.items())
+        }
+
 
 class UsesCriterion(models.Model):
     reputation_type = models.ForeignKey(
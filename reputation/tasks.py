@@ -1,12 +1,27 @@
 # -*- coding: utf-8 -*-
 
 
-from dalite.celery import app
+from dalite.celery import app, try_async
 
 
 @app.task
-def update_reputation_history():
-    from .models import Reputation, ReputationHistory
+def update_reputation_history(batch_size=1000):
+    from peerinst.utils import batch
 
-    for reputation in Reputation.objects.all().iterator():
-        ReputationHistory.create(reputation)
+    from .models import Reputation, ReputationHistory, ReputationType
+
+    for reputation_type in ReputationType.objects.all():
+        reputations = Reputation.of_type(reputation_type)
+        for reputations_ in batch(reputations.iterator(), batch_size):
+            ReputationHistory.batch_create(list(reputations_))
+
+
+@try_async(policy="queue")
+@app.task
+def refresh_reputation_cache(reputation_pk):
+    from .models import Reputation
+
+    try:
+        Reputation.objects.get(pk=reputation_pk).refresh_cache()
+    except Reputation.DoesNotExist:
+        pass
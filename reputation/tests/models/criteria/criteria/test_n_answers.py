@@ -35,6 +35,22 @@ def test_evaluate__student(n_answers_criterion, student, answers):
     assert n_answers_criterion.evaluate(student)[0] == len(answers)
 
 
+def test_batch_evaluate__question(n_answers_criterion, questions, answers):
+    for i, answer in enumerate(answers):
+        answer.question = questions[i % 2]
+        answer.save()
+
+    assert n_answers_criterion.batch_evaluate(questions) == [
+        n_answers_criterion.evaluate(question) for question in questions
+    ]
+
+
+def test_batch_evaluate__student(n_answers_criterion, students, answers):
+    assert n_answers_criterion.batch_evaluate(students) == [
+        n_answers_criterion.evaluate(student) for student in students
+    ]
+
+
 def test_evaluate__wrong_model_type(n_answers_criterion, teacher):
     with pytest.raises(TypeError):
         n_answers_criterion.evaluate(teacher)
@@ -28,6 +28,15 @@ def test_evaluate(n_questions_criterion, teacher, questions):
     )
 
 
+def test_batch_evaluate(n_questions_criterion, teachers, questions):
+    questions[0].user = teachers[1].user
+    questions[0].save()
+
+    assert n_questions_criterion.batch_evaluate(teachers) == [
+        n_questions_criterion.evaluate(teacher) for teacher in teachers
+    ]
+
+
 def test_evaluate__wrong_model_type(n_questions_criterion, question):
     with pytest.raises(TypeError):
         n_questions_criterion.evaluate(question)
@@ -88,6 +88,40 @@ def test_evaluate__teacher__liked_used_self(
     assert question_liked_criterion.evaluate(teachers[0])[0] == 0
 
 
+def test_batch_evaluate__question(
+    question_liked_criterion, questions, assignment, teacher, answers
+):
+    for question in questions[:2]:
+        teacher.favourite_questions.add(question)
+        assignment.questions.add(question)
+    answers[0].question = questions[0]
+    answers[0].assignment = assignment
+    answers[0].save()
+
+    assert question_liked_criterion.batch_evaluate(questions) == [
+        question_liked_criterion.evaluate(question) for question in questions
+    ]
+
+
+def test_batch_evaluate__teacher(
+    question_liked_criterion, questions, assignment, teachers, answers
+):
+    assignment.owner.add(teachers[1].user)
+    for i, question in enumerate(questions):
+        question.user = teachers[i % 2].user
+        question.save()
+        teachers[(i + 1) % 2].favourite_questions.add(question)
+        assignment.questions.add(question)
+    for i in range(min(len(questions), len(answers))):
+        answers[i].question = questions[i]
+        answers[i].assignment = assignment
+        answers[i].save()
+
+    assert question_liked_criterion.batch_evaluate(teachers) == [
+        question_liked_criterion.evaluate(teacher) for teacher in teachers
+    ]
+
+
 def test_evaluate__wrong_model_type(question_liked_criterion, student):
     with pytest.raises(TypeError):
         question_liked_criterion.evaluate(student)
@@ -32,6 +32,20 @@ def test_evaluate__teacher(rationale_evaluation_criterion, teacher, answers):
     assert rationale_evaluation_criterion.evaluate(teacher)[0] == len(answers)
 
 
+def test_batch_evaluate(rationale_evaluation_criterion, teachers, answers):
+    for i, answer in enumerate(answers):
+        AnswerAnnotation.objects.create(
+            answer=answer,
+            annotator=teachers[i % 2].user,
+            score=None if i % 3 == 0 else i % 4,
+        )
+
+    assert rationale_evaluation_criterion.batch_evaluate(teachers) == [
+        rationale_evaluation_criterion.evaluate(teacher)
+        for teacher in teachers
+    ]
+
+
 def test_evaluate__wrong_model_type(rationale_evaluation_criterion, student):
     with pytest.raises(TypeError):
         rationale_evaluation_criterion.evaluate(student)
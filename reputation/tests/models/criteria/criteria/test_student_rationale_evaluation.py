@@ -121,6 +121,22 @@ def test_evaluate__different_scores(
     )
 
 
+def test_batch_evaluate(
+    student_rationale_evaluation_criterion, students, answers, teacher
+):
+    for i, answer in enumerate(answers):
+        AnswerAnnotation.objects.create(
+            answer=answer, annotator=teacher.user, score=i % 4
+        )
+
+    assert student_rationale_evaluation_criterion.batch_evaluate(
+        students
+    ) == [
+        student_rationale_evaluation_criterion.evaluate(student)
+        for student in students
+    ]
+
+
 def test_evaluate__wrong_model_type(
     student_rationale_evaluation_criterion, teacher
 ):
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
+import mock
 import pytest
 
 from peerinst.models import Assignment, Question, Teacher
@@ -62,3 +63,54 @@ def test_create__object_passed(question, assignment, teacher):
 def test_create__wrong_type():
     with pytest.raises(ReputationType.DoesNotExist):
         reputation = Reputation.create("StudentAssignment")
+
+
+def test_get_cached(question_reputation, locmem_cache):
+    reputation = (1, [{"name": "fake", "reputation": 1}])
+
+    with mock.patch.object(
+        Reputation, "evaluate", return_value=reputation
+    ) as evaluate:
+        assert question_reputation.get_cached() == reputation
+        assert question_reputation.get_cached("fake") == (
+            1,
+            reputation[1][0],
+        )
+        assert evaluate.call_count == 1
+
+
+def test_get_cached__invalidated(question_reputation, locmem_cache):
+    reputation_1 = (1, [{"name": "fake", "reputation": 1}])
+    reputation_2 = (2, [{"name": "fake", "reputation": 2}])
+
+    with mock.patch.object(Reputation, "evaluate", return_value=reputation_1):
+        question_reputation.get_cached()
+
+    with mock.patch(
+        "reputation.tasks.refresh_reputation_cache"
+    ) as refresh, mock.patch.object(
+        Reputation, "evaluate", return_value=reputation_2
+    ):
+        Reputation.invalidate([question_reputation])
+
+        assert question_reputation.get_cached() == reputation_1
+        assert question_reputation.get_cached() == reputation_1
+        refresh.assert_called_once_with(question_reputation.pk)
+
+        question_reputation.refresh_cache()
+        assert question_reputation.get_cached() == reputation_2
+
+
+def test_invalidate__on_favourite(question_reputation, question, teacher):
+    with mock.patch(
+        "peerinst.signals.invalidate_reputations_async"
+    ) as invalidate_async, mock.patch.object(
+        Reputation, "invalidate"
+    ) as invalidate:
+        teacher.favourite_questions.add(question)
+        invalidate_async.assert_called_once_with(question_pks=[question.pk])
+        invalidate.assert_not_called()
+
+    with mock.patch.object(Reputation, "invalidate") as invalidate:
+        teacher.favourite_questions.remove(question)
+        assert question_reputation.pk in list(invalidate.call_args[0][0])
@@ -7,7 +7,7 @@ import mock
 import pytest
 
 from peerinst.tests.fixtures import *  # noqa
-from reputation.models import ReputationHistory
+from reputation.models import Reputation, ReputationHistory
 from reputation.tests.fixtures import *  # noqa
 
 
@@ -77,3 +77,19 @@ def test_create__exists(teacher_reputation):
         assert history_elem.reputation.pk == teacher_reputation.pk
         assert history_elem.reputation_value == reputation_2[0]
         assert json.loads(history_elem.reputation_details) == reputation_2[1]
+
+
+def test_batch_create(question_reputation, teacher_reputation):
+    n = ReputationHistory.objects.count()
+
+    ReputationHistory.batch_create(Reputation.objects.all())
+    ReputationHistory.batch_create(Reputation.objects.all())
+
+    assert ReputationHistory.objects.count() == n + 2
+    for reputation in (question_reputation, teacher_reputation):
+        history = ReputationHistory.objects.get(reputation=reputation)
+        value, details = reputation.evaluate()
+        assert history.reputation_value == value
+        assert json.loads(history.reputation_details) == json.loads(
+            json.dumps(details)
+        )